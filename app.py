@@ -1,227 +1,44 @@
 import os
+import time
 import streamlit as st
-from multi_agents import *
-from langgraph.graph import StateGraph, END
-from PIL import Image
-import re
+from multi_agents import ESCALATION_MARGIN, NODE_MODELS, STRUCTURED_SCORING
+from batch import SCREENING_CONCURRENCY, SCREENING_TIMEOUT
+from pipeline import (
+    DEDUPE_TEXT,
+    SCORING_LABELS,
+    SCREENING_MODE,
+    SCREENING_MODES,
+    Leaderboard,
+    best_fit,
+    compaction_summary,
+    collect_resume_paths,
+    rank_results,
+    role_names,
+    screen_roles,
+)
+from compaction import RESUME_COMPACTION
+from extraction import save_upload
+from jobs import JOB_POLL_SECONDS, JOB_QUEUE, JobQueue
+from metrics import MetricsRecorder
+from result_store import ResultStore
+from skill_index import SEARCH_SOURCES, SOURCES, SkillIndex
 
 def load_image(image_file):
-    return Image.open(image_file)
+    from PIL import Image
 
-def _extract_first_int(pattern: str, s: str):
-    m = re.search(pattern, s, flags=re.IGNORECASE)
-    if not m:
-        return None
-    val = m.group(1)
-    try:
-        return int(val)
-    except Exception:
-        return None
-
-def parse_total_score(text: str):
-    if not isinstance(text, str):
-        return None
-    # 0) Prefer summing simple category breakdown if present; clamp per category to cap
-    try:
-        skills = _extract_first_int(r"Skills[^\n:]*:\s*(\d{1,3})", text)
-        if skills is None:
-            skills = _extract_first_int(r"Skills\s*Match[^\n:]*:\s*(\d{1,3})", text)
-
-        experience = _extract_first_int(r"Experience[^\n:]*:\s*(\d{1,3})", text)
-        if experience is None:
-            experience = _extract_first_int(r"Experience\s*Match[^\n:]*:\s*(\d{1,3})", text)
-
-        education = _extract_first_int(r"Education[^\n:]*:\s*(\d{1,3})", text)
-        if education is None:
-            education = _extract_first_int(r"Education\s*Match[^\n:]*:\s*(\d{1,3})", text)
-
-        extras = _extract_first_int(r"Extras[^\n:]*:\s*(\d{1,3})", text)
-        if extras is None:
-            extras = _extract_first_int(r"Certifications[^\n:]*:\s*(\d{1,3})", text)
-        if extras is None:
-            extras = _extract_first_int(r"Certifications\s*Match[^\n:]*:\s*(\d{1,3})", text)
-        if extras is None:
-            extras = _extract_first_int(r"Awards[^\n:]*:\s*(\d{1,3})", text)
-        if extras is None:
-            extras = _extract_first_int(r"Side\s*Projects[^\n:]*:\s*(\d{1,3})", text)
-
-        parts = [v for v in [skills, experience, education, extras] if v is not None]
-        if len(parts) >= 3:
-            # clamp each category to its cap before summing
-            s_val = min(skills if skills is not None else 0, 30)
-            e_val = min(experience if experience is not None else 0, 50)
-            ed_val = min(education if education is not None else 0, 10)
-            ex_val = min(extras if extras is not None else 0, 10)
-            total_breakdown = s_val + e_val + ed_val + ex_val
-            if 0 <= total_breakdown <= 100:
-                return total_breakdown
-    except Exception:
-        pass
-    # 1) Prefer explicit Total Score line, take the number after colon if within 0..100
-    m = re.search(r"Total\s*Score[^\n:]*:\s*(\d{1,3})(?:\s*/\s*(\d{1,3}))?", text, flags=re.IGNORECASE)
-    if m:
-        try:
-            val = int(m.group(1))
-            if 0 <= val <= 100:
-                return val
-        except Exception:
-            pass
-    # 2) Prefer numerator when denominator is 100
-    m = re.search(r"(\d{1,3})\s*/\s*100", text)
-    if m:
-        try:
-            val = int(m.group(1))
-            if 0 <= val <= 100:
-                return val
-        except Exception:
-            pass
-    # 3) Handle phrasing like "85 out of 100"
-    m = re.search(r"(\d{1,3})\s*out\s*of\s*100", text, flags=re.IGNORECASE)
-    if m:
-        try:
-            val = int(m.group(1))
-            if 0 <= val <= 100:
-                return val
-        except Exception:
-            pass
-    # 4) Fallback: choose largest plausible integer < 100; avoid denominators and stray 100s
-    candidates = []
-    for match in re.finditer(r"\b(\d{1,3})\b", text):
-        num = int(match.group(1))
-        if num > 100:
-            continue
-        start = max(0, match.start() - 20)
-        end = min(len(text), match.end() + 20)
-        context = text[start:end].lower()
-        if ("out of" in context) or ("/100" in context):
-            continue
-        # Avoid picking 100 in fallback unless clearly marked as total score nearby
-        if num == 100 and ("total score" not in context and "score:" not in context):
-            continue
-        candidates.append(num)
-    if candidates:
-        return max(candidates)
-    return None
-
-def normalize_recruiter_output(text: str):
-    if not isinstance(text, str) or not text:
-        return text
-    caps = {
-        "Skills": 30,
-        "Skills Match": 30,
-        "Experience": 50,
-        "Experience Match": 50,
-        "Education": 10,
-        "Education Match": 10,
-        "Extras": 10,
-        "Certifications": 10,
-        "Certifications Match": 10,
-        "Awards": 10,
-        "Side Projects": 10,
-    }
-
-    normalized = text
-
-    def _cap_num(num: int, cap: int, den: int = None):
-        val = min(num, cap)
-        if den is not None:
-            val = min(val, den)
-        return val
-
-    # Cap (NN points), ": NN points", and "NN/YY" for each label
-    for label, cap in caps.items():
-        # (NN points)
-        normalized = re.sub(
-            rf"({re.escape(label)}[^\n]*?\()(\d{{1,3}})(\s*points?\))",
-            lambda m: f"{m.group(1)}{_cap_num(int(m.group(2)), cap)}{m.group(3)}",
-            normalized,
-            flags=re.IGNORECASE,
-        )
-        # : NN points
-        normalized = re.sub(
-            rf"({re.escape(label)}[^\n:]*:\s*)(\d{{1,3}})(\s*points?)",
-            lambda m: f"{m.group(1)}{_cap_num(int(m.group(2)), cap)}{m.group(3)}",
-            normalized,
-            flags=re.IGNORECASE,
-        )
-        # NN/YY
-        normalized = re.sub(
-            rf"({re.escape(label)}[^\n]*?)(\d{{1,3}})\s*/\s*(\d{{1,3}})",
-            lambda m: f"{m.group(1)}{_cap_num(int(m.group(2)), cap, int(m.group(3)))}/{m.group(3)}",
-            normalized,
-            flags=re.IGNORECASE,
-        )
-
-    # Recompute clamped total and update Total Score line if present
-    s_val = _extract_first_int(r"Skills[^\n:]*:\s*(\d{1,3})", normalized) or _extract_first_int(r"Skills\s*Match[^\n:]*:\s*(\d{1,3})", normalized) or 0
-    e_val = _extract_first_int(r"Experience[^\n:]*:\s*(\d{1,3})", normalized) or _extract_first_int(r"Experience\s*Match[^\n:]*:\s*(\d{1,3})", normalized) or 0
-    ed_val = _extract_first_int(r"Education[^\n:]*:\s*(\d{1,3})", normalized) or _extract_first_int(r"Education\s*Match[^\n:]*:\s*(\d{1,3})", normalized) or 0
-    ex_val = (
-        _extract_first_int(r"Extras[^\n:]*:\s*(\d{1,3})", normalized)
-        or _extract_first_int(r"Certifications[^\n:]*:\s*(\d{1,3})", normalized)
-        or _extract_first_int(r"Certifications\s*Match[^\n:]*:\s*(\d{1,3})", normalized)
-        or _extract_first_int(r"Awards[^\n:]*:\s*(\d{1,3})", normalized)
-        or _extract_first_int(r"Side\s*Projects[^\n:]*:\s*(\d{1,3})", normalized)
-        or 0
-    )
-    # clamp again to be safe
-    s_val = min(s_val, 30)
-    e_val = min(e_val, 50)
-    ed_val = min(ed_val, 10)
-    ex_val = min(ex_val, 10)
-    total = s_val + e_val + ed_val + ex_val
-    total = max(0, min(total, 100))
-
-    # Update Total Score in common formats
-    # 1) Total Score: NN/100
-    if re.search(r"Total\s*Score[^\n:]*:\s*\d{1,3}\s*/\s*100", normalized, flags=re.IGNORECASE):
-        normalized = re.sub(
-            r"(Total\s*Score[^\n:]*:\s*)(\d{1,3})(\s*/\s*100)",
-            lambda m: f"{m.group(1)}{total}{m.group(3)}",
-            normalized,
-            flags=re.IGNORECASE,
-        )
-    # 2) Total Score: NN out of 100
-    if re.search(r"Total\s*Score[^\n:]*:\s*\d{1,3}\s*out\s*of\s*100", normalized, flags=re.IGNORECASE):
-        normalized = re.sub(
-            r"(Total\s*Score[^\n:]*:\s*)(\d{1,3})(\s*out\s*of\s*100)",
-            lambda m: f"{m.group(1)}{total}{m.group(3)}",
-            normalized,
-            flags=re.IGNORECASE,
-        )
-    # 3) Total Score: NN    (case-insensitive; also handle 'Total score' lowercased)
-    if re.search(r"Total\s*Score[^\n:]*:\s*\d{1,3}(?![^\n]*?/\s*100)(?![^\n]*?out\s*of\s*100)", normalized, flags=re.IGNORECASE):
-        normalized = re.sub(
-            r"(Total\s*Score[^\n:]*:\s*)(\d{1,3})(?![^\n]*?/\s*100)(?![^\n]*?out\s*of\s*100)",
-            lambda m: f"{m.group(1)}{total}",
-            normalized,
-            flags=re.IGNORECASE,
-        )
+    return Image.open(image_file)
 
-    return normalized
-
-def sum_breakdown_clamped(text: str):
-    if not isinstance(text, str) or not text:
-        return None
-    skills = _extract_first_int(r"Skills[^\n:]*:\s*(\d{1,3})", text) or _extract_first_int(r"Skills\s*Match[^\n:]*:\s*(\d{1,3})", text)
-    experience = _extract_first_int(r"Experience[^\n:]*:\s*(\d{1,3})", text) or _extract_first_int(r"Experience\s*Match[^\n:]*:\s*(\d{1,3})", text)
-    education = _extract_first_int(r"Education[^\n:]*:\s*(\d{1,3})", text) or _extract_first_int(r"Education\s*Match[^\n:]*:\s*(\d{1,3})", text)
-    extras = (
-        _extract_first_int(r"Extras[^\n:]*:\s*(\d{1,3})", text)
-        or _extract_first_int(r"Certifications[^\n:]*:\s*(\d{1,3})", text)
-        or _extract_first_int(r"Certifications\s*Match[^\n:]*:\s*(\d{1,3})", text)
-        or _extract_first_int(r"Awards[^\n:]*:\s*(\d{1,3})", text)
-        or _extract_first_int(r"Side\s*Projects[^\n:]*:\s*(\d{1,3})", text)
-    )
-    parts_present = [v for v in [skills, experience, education, extras] if v is not None]
-    if len(parts_present) < 3:
-        return None
-    s_val = min(skills or 0, 30)
-    e_val = min(experience or 0, 50)
-    ed_val = min(education or 0, 10)
-    ex_val = min(extras or 0, 10)
-    total = s_val + e_val + ed_val + ex_val
-    return max(0, min(total, 100))
+def render_partials(placeholder, partials: dict, tail: int = 600):
+    # The scoring agent's answer so far for each resume still being screened
+    # (the last `tail` characters of it)
+    if not partials:
+        placeholder.empty()
+        return
+    with placeholder.container():
+        st.markdown("#### Being scored")
+        for resume_path, (label, text) in partials.items():
+            st.caption(f"{os.path.basename(resume_path)} — {label}")
+            st.text(("…" if len(text) > tail else "") + text[-tail:])
 
 def main():
     st.set_page_config(
@@ -289,6 +106,78 @@ def main():
     with col2:
         top_n = st.number_input("Number of top resumes", min_value=1, max_value=1000, value=20, step=1)
 
+    col3, col4 = st.columns(2)
+    with col3:
+        concurrency = st.number_input(
+            "Resumes screened in parallel", min_value=1, max_value=64, value=SCREENING_CONCURRENCY, step=1
+        )
+    with col4:
+        resume_timeout = st.number_input(
+            "Timeout per resume (seconds)", min_value=10, max_value=3600, value=int(SCREENING_TIMEOUT), step=10
+        )
+
+    screening_mode = st.selectbox(
+        "Screening mode",
+        SCREENING_MODES,
+        index=SCREENING_MODES.index(SCREENING_MODE) if SCREENING_MODE in SCREENING_MODES else 0,
+        format_func=lambda m: {
+            "multi": "Multi-agent (separate contact, red-flag and scoring calls)",
+            "fused": "Fused (one structured call per resume)",
+        }[m],
+    )
+    structured_output = st.checkbox(
+        "Structured JSON scoring (typed scores instead of parsing free text)", value=STRUCTURED_SCORING
+    )
+
+    compact_resume = st.checkbox(
+        "Compact resume text (drop repeated headers/footers, send each agent only the sections it needs)",
+        value=RESUME_COMPACTION,
+    )
+    dedupe_text = st.checkbox(
+        "Also skip re-saved copies of the same resume (matching text; extracts every resume before screening)",
+        value=DEDUPE_TEXT,
+    )
+    rescreen = st.checkbox("Re-screen resumes that already have stored results", value=False)
+    use_queue = st.checkbox(
+        "Run as a background job (screened by worker.py processes; keeps running if this tab is closed)",
+        value=JOB_QUEUE,
+    )
+    if use_queue and not JobQueue().active_workers():
+        st.warning(
+            "No workers are running, so a background job would wait in the queue. "
+            "Start them with `python worker.py --workers N`, or untick the box to screen in this session."
+        )
+
+    with st.expander("Models"):
+        col7, col8 = st.columns(2)
+        with col7:
+            extract_model = st.text_input("Extraction model (contact details, JD requirements)",
+                                          value=NODE_MODELS["extract"])
+            score_model = st.text_input("Scoring model", value=NODE_MODELS["score"])
+        with col8:
+            redflag_model = st.text_input("Red-flag model", value=NODE_MODELS["redflag"])
+            escalate_model = st.text_input("Escalation model (re-scores near the minimum score; empty = off)",
+                                           value=NODE_MODELS["escalate"])
+        escalation_margin = st.number_input(
+            "Escalate scores within this many points of the minimum score",
+            min_value=0, max_value=100, value=ESCALATION_MARGIN, step=1,
+        )
+    models = {"extract": extract_model, "redflag": redflag_model, "score": score_model, "escalate": escalate_model}
+
+    with st.expander("Embedding pre-filter"):
+        use_prefilter = st.checkbox(
+            "Skip the LLM for resumes that are clearly unrelated to the job description", value=False
+        )
+        col5, col6 = st.columns(2)
+        with col5:
+            prefilter_top_k = st.number_input(
+                "Screen only the top K most similar resumes (0 = no limit)", min_value=0, max_value=100000, value=0, step=10
+            )
+        with col6:
+            prefilter_threshold = st.number_input(
+                "Minimum similarity (0 = no threshold)", min_value=0.0, max_value=1.0, value=0.0, step=0.05
+            )
+
     # Upload multiple resume PDFs or choose a folder
     pdf_files = st.file_uploader("Upload Resume(s) (PDF)", type=["pdf"], accept_multiple_files=True)
     folder_path = st.text_input(
@@ -298,39 +187,53 @@ def main():
 
     def save_uploaded_pdfs(files):
         saved_paths = []
-        if not files:
-            return saved_paths
-        os.makedirs("uploads", exist_ok=True)
-        for file in files:
-            dest_path = os.path.join("uploads", file.name)
-            with open(dest_path, "wb") as f:
-                f.write(file.read())
-            saved_paths.append(dest_path)
+        for file in files or []:
+            file.seek(0)
+            saved_paths.append(save_upload(file, file.name))
         return saved_paths
 
-    # Upload JD text or paste manually
-    text_file = st.file_uploader("Upload Job Description (TXT)", type=["txt"])
-    job_description = ""
-    if text_file is not None:
-        job_description = text_file.read().decode("utf-8", errors="ignore")
+    # Upload JD text or paste manually; several files screen the same resume
+    # pool against each role, named after its file
+    text_files = st.file_uploader(
+        "Upload Job Description(s) (TXT) — upload several to screen against multiple roles",
+        type=["txt"],
+        accept_multiple_files=True,
+    )
+    jobs = {}
+    if text_files:
+        for role, text_file in zip(role_names([f.name for f in text_files]), text_files):
+            jobs[role] = text_file.getvalue().decode("utf-8", errors="ignore")
     else:
-        job_description = st.text_area("Or paste the Job Description here:")
+        jobs["JD"] = st.text_area("Or paste the Job Description here:")
+    multi_role = len(jobs) > 1
 
     # Save job description to file
-    if job_description.strip() != "":
+    job_description = next(iter(jobs.values()))
+    if not multi_role and job_description.strip() != "":
         with open("JD.txt", "w", encoding="utf-8") as f:
             f.write(job_description)
 
+    # Identifies the resume set, JD and scoring options behind a stored result
+    # set, so the page can tell whether the results on screen are still current
+    inputs_key = (
+        tuple((f.name, f.size) for f in (pdf_files or [])),
+        folder_path,
+        tuple(jobs.items()),
+        screening_mode,
+        structured_output,
+        compact_resume,
+        tuple(models.items()),
+        (min_score, escalation_margin) if escalate_model else None,
+    )
+
     # Start pipeline
     if st.button("Match Resume(s)"):
         # Build list of resume paths
         resume_paths = []
         resume_paths.extend(save_uploaded_pdfs(pdf_files))
-        if folder_path and os.path.isdir(folder_path):
-            for name in os.listdir(folder_path):
-                if name.lower().endswith(".pdf"):
-                    resume_paths.append(os.path.join(folder_path, name))
-        # Deduplicate while preserving order
+        resume_paths.extend(collect_resume_paths(folder_path))
+        # Deduplicate paths while preserving order; files with the same
+        # content under different paths are collapsed by run_screening
         seen = set()
         resume_paths = [p for p in resume_paths if not (p in seen or seen.add(p))]
 
@@ -338,91 +241,320 @@ def main():
             st.warning("Please upload at least one resume PDF or provide a valid folder path.")
             return
 
-        if not job_description.strip():
+        if not all(text.strip() for text in jobs.values()):
             st.warning("Please provide a Job Description (upload a TXT or paste text).")
             return
 
-        # Define LangGraph workflow (compile once)
-        workflow = StateGraph(AgentState)
-        workflow.add_node("Resume_agent", agent)
-        workflow.add_node("JD_agent", JD_agent)
-        workflow.add_node("Redflag_agent", redflag_agent)   
-        workflow.add_node("Recruiter_agent", recruit_agent)
-
-        workflow.set_entry_point("Resume_agent")
-
-        workflow.add_edge("Resume_agent", "JD_agent")
-        workflow.add_edge("Resume_agent", "Redflag_agent")
-        workflow.add_edge("JD_agent", "Recruiter_agent")
-        workflow.add_edge("Redflag_agent", "Recruiter_agent")
-        workflow.add_edge("Recruiter_agent", END)
-        app = workflow.compile()
-
-        # Process each resume, collect scores with progress
-        scored = []
-        progress_bar = st.progress(0)
-        status = st.empty()
-        total = len(resume_paths)
-        with st.spinner("Processing resumes..."):
-            for idx, resume_path in enumerate(resume_paths):
-                status.write(f"Processing: {os.path.basename(resume_path)} ({idx+1}/{total})")
-                inputs = {
-                    "messages": [
-                        "You are a recruitment expert and your role is to match a candidate's profile with a given job description."
-                    ],
-                    "resume_path": resume_path,
-                    "jd_text": job_description,
-                }
-
-                outputs = app.stream(inputs)
-                messages_collected = []
-                recruiter_output_texts = []
-                for output in outputs:
-                    for key, value in output.items():
-                        messages = value.get("messages", [])
-                        for msg in messages:
-                            text_msg = str(msg)
-                            if key == "Recruiter_agent":
-                                text_msg = normalize_recruiter_output(text_msg)
-                            messages_collected.append((key, text_msg))
-                            if key == "Recruiter_agent":
-                                recruiter_output_texts.append(text_msg)
-
-                # Prefer the last recruiter output as final; reconcile score using clamped breakdown
-                recruiter_text = recruiter_output_texts[-1] if recruiter_output_texts else ""
-                breakdown_sum = sum_breakdown_clamped(recruiter_text)
-                score_from_text = parse_total_score(recruiter_text)
-                # Prefer clamped breakdown sum when available to avoid LLM inconsistencies
-                if breakdown_sum is not None:
-                    score = breakdown_sum
-                else:
-                    score = score_from_text
-                scored.append({
-                    "resume_path": resume_path,
-                    "score": score if score is not None else -1,
-                    "details": messages_collected,
-                })
+        settings = {"structured_output": structured_output, "compact_resume": compact_resume, "models": models}
+        if escalate_model:
+            settings["escalation"] = {"min_score": min_score, "margin": escalation_margin}
+        prefilter = None
+        if use_prefilter:
+            prefilter = {"top_k": prefilter_top_k or None, "threshold": prefilter_threshold or None}
+
+        if use_queue:
+            if prefilter or dedupe_text:
+                st.info("The embedding pre-filter and text deduplication only apply to runs in this session.")
+            job_id = JobQueue().submit(
+                resume_paths, jobs, settings, screening_mode, reuse_stored=not rescreen, timeout=resume_timeout
+            )
+            st.session_state["job_id"] = job_id
+            st.query_params["job"] = job_id
+            st.session_state.pop("screening", None)
+        else:
+            st.session_state.pop("job_id", None)
+            st.query_params.pop("job", None)
+            # Process each resume, collect scores with progress
+            progress_bar = st.progress(0)
+            status = st.empty()
+
+            # Live leaderboard, updated as each resume finishes
+            board = Leaderboard(top_n, min_score)
+            live_top = st.empty()
+            # The scoring agents' answers as they stream in
+            live_output = st.empty()
+            partials = {}
+
+            def show_partial(resume_path, label, text):
+                if label in SCORING_LABELS:
+                    partials[resume_path] = (label, text)
+                    render_partials(live_output, partials)
+
+            def render_live_top():
+                # With several roles each candidate is listed under their best-fit role
+                header = "| # | Resume | Role | Score |\n|---|---|---|---|" if multi_role else "| # | Resume | Score |\n|---|---|---|"
+                rows = [
+                    f"| {rank} | {os.path.basename(item['resume_path'])} | "
+                    + (f"{item['role']} | " if multi_role else "")
+                    + f"{item['score']} |"
+                    for rank, item in enumerate(board.top(), start=1)
+                ]
+                live_top.markdown(
+                    "#### Leaderboard so far\n\n" + header + "\n" + "\n".join(rows)
+                    if rows else "#### Leaderboard so far\n\nNo resumes have met the score threshold yet."
+                )
+
+            def report_progress(done, total, resume_path, role_results):
+                status.write(f"Processed: {os.path.basename(resume_path)} ({done}/{total})")
+                progress_bar.progress(int(done / total * 100))
+                if partials.pop(resume_path, None) is not None:
+                    render_partials(live_output, partials)
+                role, result = max(role_results.items(), key=lambda item: item[1]["score"])
+                if board.add(dict(result, role=role)):
+                    render_live_top()
+
+            render_live_top()
+            metrics = MetricsRecorder()
+            # PDFs are parsed on a process pool and screened as soon as each one
+            # is ready; stored results are reused unless re-screening is requested,
+            # and a run interrupted by a session reset resumes from its journal
+            with st.spinner("Processing resumes..."):
+                try:
+                    results_by_role = screen_roles(
+                        resume_paths,
+                        jobs,
+                        settings,
+                        screening_mode,
+                        store=ResultStore(),
+                        reuse_stored=not rescreen,
+                        prefilter=prefilter,
+                        dedupe_text=dedupe_text,
+                        max_workers=concurrency,
+                        timeout=resume_timeout,
+                        on_progress=report_progress,
+                        on_status=status.write,
+                        metrics=metrics,
+                        checkpoint=True,
+                        index=SkillIndex(),
+                        on_partial=show_partial,
+                    )
+                except RuntimeError as ex:
+                    st.error(str(ex))
+                    return
+                finally:
+                    metrics.finish()
+                    metrics.export()
+            status.write("Processing complete.")
+            live_top.empty()
+            live_output.empty()
+
+            # Keep the results across reruns so changing filters doesn't re-screen
+            st.session_state["screening"] = {
+                "inputs_key": inputs_key,
+                "results_by_role": results_by_role,
+                "mode": screening_mode,
+                "metrics": metrics.summary(),
+            }
 
-                progress_bar.progress(int((idx + 1) / total * 100))
-        status.write("Processing complete.")
+    # Background jobs: the page polls the queue while workers screen the
+    # job, and the job's results can be reopened later (the job id is kept
+    # in the URL)
+    queue = JobQueue()
+    recent = queue.recent_jobs()
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
+    if recent and (use_queue or job_id):
+        with st.expander("Background jobs", expanded=job_id is not None):
+            labels = {job["job_id"]: f"{job['job_id']} — {job['status']} ({job['total']} resume(s))" for job in recent}
+            if job_id and job_id not in labels and queue.job(job_id):
+                labels[job_id] = job_id
+            options = [None] + list(labels)
+            picked = st.selectbox(
+                "Job", options, index=options.index(job_id) if job_id in options else 0,
+                format_func=lambda value: "—" if value is None else labels[value],
+            )
+            if picked != job_id:
+                job_id = picked
+                st.session_state["job_id"] = job_id
+                if job_id:
+                    st.query_params["job"] = job_id
+                else:
+                    st.query_params.pop("job", None)
+            workers = queue.active_workers()
+            if workers:
+                st.caption(
+                    f"{len(workers)} worker(s) running: "
+                    + ", ".join(f"{worker['worker_id']} ({worker['ollama_url']})" for worker in workers)
+                )
+            else:
+                st.warning("No workers are running. Start them with `python worker.py --workers N`.")
+
+    job = queue.job(job_id) if job_id else None
+    if job is not None:
+        counts = job["counts"]
+        finished = counts["done"] + counts["failed"] + counts["cancelled"]
+        st.markdown(f"### Job {job['job_id']} — {job['status']}")
+        st.progress(int(finished / job["total"] * 100) if job["total"] else 100)
+        st.caption(
+            f"{counts['done']} of {job['total']} resume(s) screened, {counts['running']} in progress, "
+            f"{counts['queued']} queued"
+            + (f", {counts['failed']} failed" if counts["failed"] else "")
+            + (f", {counts['cancelled']} cancelled" if counts["cancelled"] else "")
+        )
+        active = job["status"] in ("queued", "running", "cancelling")
+        if active and job["status"] != "cancelling" and st.button("Cancel job"):
+            queue.cancel(job["job_id"])
+            st.rerun()
+        if counts["running"]:
+            render_partials(st.empty(), queue.partials(job["job_id"]))
+        # Keep polling until every resume is screened
+        st.session_state["poll_job"] = active
+        screening = {
+            "inputs_key": None,
+            "results_by_role": queue.results(job["job_id"]),
+            "mode": job["mode"],
+            "metrics": queue.metrics_summary(job["job_id"]),
+        }
+    else:
+        st.session_state["poll_job"] = False
+        screening = st.session_state.get("screening")
+    if screening is None:
+        return
+    if screening["inputs_key"] not in (None, inputs_key):
+        st.caption("Showing results from the last run. Inputs have changed since; click \"Match Resume(s)\" to re-screen.")
+
+    results_by_role = screening["results_by_role"]
+    # Per-file outcomes (quarantine, duplicates) are the same for every role
+    scored = next(iter(results_by_role.values()))
+    compaction = compaction_summary(scored, screening["mode"], roles=len(results_by_role))
+    if compaction["resumes"]:
+        st.caption(
+            f"Resume compaction: ~{compaction['tokens_after']:,} of ~{compaction['tokens_before']:,} resume tokens "
+            f"sent to the LLM for {compaction['resumes']} resume(s), "
+            f"~{compaction['tokens_saved']:,} saved ({compaction['saved_pct']:.0f}%)."
+        )
 
+    summary = screening["metrics"]
+    if summary and summary["stages"]:
+        with st.expander(
+            f"Pipeline metrics — {summary['resumes']} resume(s) screened, {summary['resumes_per_min']:.1f} resumes/min"
+        ):
+            st.dataframe(
+                [
+                    {
+                        "Stage": name,
+                        "Runs": stats["count"],
+                        "p50 (s)": round(stats["p50_s"], 2),
+                        "p95 (s)": round(stats["p95_s"], 2),
+                        "Prompt tokens": stats["prompt_tokens"],
+                        "Output tokens": stats["completion_tokens"],
+                        "Prompt eval (s)": round(stats["prompt_eval_s"], 1),
+                        "Generation (s)": round(stats["eval_s"], 1),
+                        "Errors": stats["errors"],
+                    }
+                    for name, stats in summary["stages"].items()
+                ],
+                hide_index=True,
+            )
+
+    reused = sum(1 for results in results_by_role.values() for result in results if result.get("cached"))
+    if reused:
+        st.caption(f"Reused {reused} stored result(s) from earlier runs.")
+    duplicates = [result for result in scored if result.get("duplicate_of")]
+    if duplicates:
+        with st.expander(f"Duplicate files ({len(duplicates)}) — screened once"):
+            for result in duplicates:
+                st.markdown(
+                    f"- **{os.path.basename(result['resume_path'])}** is a copy of "
+                    f"{os.path.basename(result['duplicate_of'])}"
+                )
+    quarantine = [
+        result for result in scored if result.get("quarantine") and not result.get("duplicate_of")
+    ]
+    if quarantine:
+        with st.expander(f"Quarantined files ({len(quarantine)}) — not sent to the LLM"):
+            for result in quarantine:
+                st.markdown(f"- **{os.path.basename(result['resume_path'])}**: {result['quarantine']}")
+
+    # Keyword search over the skill index: answered from disk, no LLM call
+    index = SkillIndex()
+    with st.expander(f"🔎 Skill search ({len(index)} resume(s) indexed)"):
+        query = st.text_input(
+            "Skills",
+            placeholder='pytorch AND (kubernetes OR "docker swarm") NOT php',
+            help="AND, OR, NOT and parentheses; words next to each other must all match; quote phrases. "
+                 "Matches are ranked by overlap with the job requirements.",
+        )
+        col_pool, col_sources, col_role = st.columns(3)
+        search_all = col_pool.checkbox("Search every screened resume", value=False)
+        with_evaluations = col_sources.checkbox("Also match recruiter evaluations", value=False)
+        role = (
+            col_role.selectbox("Rank against", list(results_by_role))
+            if len(results_by_role) > 1 else next(iter(results_by_role))
+        )
+        requirements = next(
+            (text for result in results_by_role[role] for label, text in result["details"] if label == "JD_agent"),
+            "",
+        )
+        scores = {result["resume_path"]: result["score"] for result in results_by_role[role]}
+        started = time.perf_counter()
+        try:
+            ranked = index.rank(
+                requirements,
+                None if search_all else list(scores),
+                query,
+                SOURCES if with_evaluations else SEARCH_SOURCES,
+            )
+        except ValueError as ex:
+            st.error(str(ex))
+            ranked = None
+        if ranked is not None:
+            st.caption(f"{len(ranked)} resume(s) match, found in {(time.perf_counter() - started) * 1000:.0f} ms.")
+            st.dataframe(
+                [
+                    {
+                        "Resume": os.path.basename(item["resume_path"]),
+                        "Requirement overlap (%)": item["score"],
+                        "Screening score": scores.get(item["resume_path"]),
+                        "Matched": ", ".join(item["matched"][:10]),
+                        "Missing": ", ".join(item["missing"][:10]),
+                    }
+                    for item in ranked[:max(top_n, 50)]
+                ],
+                hide_index=True,
+            )
+
+    def render_top(results, key_prefix):
         # Filter and sort
-        filtered = [s for s in scored if s["score"] is not None and s["score"] >= min_score]
-        filtered.sort(key=lambda x: x["score"], reverse=True)
-        top = filtered[: top_n]
-        # Guard: drop any entries with empty filenames (platform-specific edge cases)
-        top = [t for t in top if os.path.basename(t["resume_path"]).strip()]
-        print("Top resumes: ", top)
-        # Display
-        st.markdown("## 🔝 Top Resumes")
+        top = rank_results(results, min_score, top_n)
         if not top:
             st.info("No resumes met the score threshold.")
-        for item in top:
+        for idx, item in enumerate(top):
             st.subheader(f"{os.path.basename(item['resume_path'])} — Score: {item['score']}")
-            with st.expander("Show details"):
+            # Details are only rendered for the resumes a recruiter actually opens
+            if st.toggle("Show details", key=f"{key_prefix}details-{idx}-{item['resume_path']}"):
                 for key, text_msg in item["details"]:
                     st.markdown(f"**{key} Output:** {text_msg}")
 
+    if len(results_by_role) == 1:
+        # Display
+        st.markdown("## 🔝 Top Resumes")
+        render_top(scored, "")
+        return
+
+    # Resume x role score matrix, best candidates first
+    fits = best_fit(results_by_role)
+    matrix = []
+    for idx, result in enumerate(scored):
+        if result["resume_path"] not in fits:
+            continue
+        row = {"Resume": os.path.basename(result["resume_path"])}
+        for role, results in results_by_role.items():
+            row[role] = results[idx]["score"] if results[idx]["score"] >= 0 else None
+        row["Best fit"] = fits[result["resume_path"]][0]
+        matrix.append(row)
+    matrix.sort(key=lambda row: max(v for k, v in row.items() if k in results_by_role and v is not None),
+                reverse=True)
+    st.markdown("## 📊 Score Matrix")
+    st.dataframe(matrix, hide_index=True)
+
+    st.markdown("## 🔝 Top Resumes per Role")
+    for tab, (role, results) in zip(st.tabs(list(results_by_role)), results_by_role.items()):
+        with tab:
+            render_top(results, f"{role}-")
+
 if __name__ == "__main__":
     main()
+    if st.session_state.get("poll_job"):
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
 
@@ -0,0 +1,111 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Defaults for concurrent screening; the Ollama server queues requests beyond
+# its own OLLAMA_NUM_PARALLEL, so keep this near that value.
+SCREENING_CONCURRENCY = int(os.getenv("SCREENING_CONCURRENCY", "4"))
+SCREENING_TIMEOUT = float(os.getenv("SCREENING_TIMEOUT", "600"))
+
+# How often the coordinating thread wakes up to check for timed-out items
+_POLL_INTERVAL = 0.5
+
+
+# Marks the end of a streamed item source
+_END = object()
+
+
+def run_batch(items, worker, on_error, max_workers=SCREENING_CONCURRENCY,
+              timeout=SCREENING_TIMEOUT, on_progress=None, on_tick=None):
+    # Runs worker(item) for every item on a bounded thread pool and returns the
+    # results in input order. An item that raises or runs longer than `timeout`
+    # seconds gets on_error(item, exc) as its result instead. on_progress(done,
+    # total, item, result) is always called from the calling thread, so it is
+    # safe to update Streamlit widgets from it. on_tick(), if given, is called
+    # from the calling thread every time it wakes up (at least every
+    # _POLL_INTERVAL while items run), e.g. to show work in progress.
+    #
+    # items may be a list or any iterator; an iterator is drained on a
+    # background thread that submits each item as soon as it arrives, so the
+    # first items are processed while later ones are still being produced
+    # (e.g. resumes as they finish parsing). Its total is unknown up front, so
+    # on_progress then gets the number of items received so far.
+    received = []
+    started = {}
+    arrived = queue.Queue()
+
+    def _run(idx):
+        started[idx] = time.monotonic()
+        return worker(received[idx])
+
+    def _submit(item):
+        received.append(item)
+        idx = len(received) - 1
+        arrived.put((idx, executor.submit(_run, idx), None))
+
+    def _feed():
+        try:
+            for item in items:
+                _submit(item)
+        except Exception as ex:
+            arrived.put((_END, None, ex))
+            return
+        arrived.put((_END, None, None))
+
+    executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)))
+    try:
+        if isinstance(items, (list, tuple)):
+            _feed()
+        else:
+            threading.Thread(target=_feed, daemon=True).start()
+
+        results = {}
+        pending = {}
+        done_count = 0
+        source_done = False
+        while pending or not source_done:
+            # Pick up newly submitted items; block briefly for more only when idle
+            block = not pending
+            while not source_done:
+                try:
+                    idx, future, error = arrived.get(timeout=_POLL_INTERVAL) if block else arrived.get_nowait()
+                except queue.Empty:
+                    break
+                block = False
+                if idx is _END:
+                    source_done = True
+                    if error is not None:
+                        raise error
+                    break
+                pending[future] = idx
+            if not pending:
+                continue
+
+            finished, _ = wait(pending, timeout=_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            if on_tick is not None:
+                on_tick()
+            now = time.monotonic()
+            for future in list(pending):
+                idx = pending[future]
+                if future in finished:
+                    try:
+                        result = future.result()
+                    except Exception as ex:
+                        result = on_error(received[idx], ex)
+                elif timeout and idx in started and now - started[idx] > timeout:
+                    # The worker thread can't be killed; its result is discarded
+                    # and the LLM client's own request timeout lets it finish.
+                    future.cancel()
+                    result = on_error(received[idx], TimeoutError(f"Timed out after {timeout:g}s"))
+                else:
+                    continue
+                del pending[future]
+                results[idx] = result
+                done_count += 1
+                if on_progress is not None:
+                    on_progress(done_count, len(received), received[idx], result)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return [results[idx] for idx in range(len(received))]
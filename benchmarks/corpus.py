@@ -0,0 +1,108 @@
+import os
+import random
+
+# Synthetic resume corpus for the offline benchmarks: deterministic, text-only
+# PDFs of one to three pages with the sections a real resume has (contact,
+# summary, skills, experience, education), written without any PDF library.
+
+CORPUS_VERSION = "1"
+
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+LAST_NAMES = ["Nguyen", "Garcia", "Smith", "Kowalski", "Okafor", "Tanaka", "Silva", "Müller", "Haddad", "Larsen"]
+SKILLS = ["Python", "SQL", "Java", "Go", "TypeScript", "React", "Django", "Flask", "FastAPI", "PostgreSQL",
+          "Kubernetes", "Docker", "AWS", "GCP", "Terraform", "Kafka", "Spark", "Airflow", "Redis", "Git"]
+TITLES = ["Software Engineer", "Backend Developer", "Data Engineer", "Platform Engineer", "Full Stack Developer"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Analytics", "Hooli"]
+DEGREES = ["B.Sc. Computer Science", "B.Eng. Software Engineering", "M.Sc. Data Science", "B.A. Mathematics"]
+DUTIES = [
+    "Built and maintained REST APIs serving {n} requests per day",
+    "Migrated {n} services from a monolith to containers on Kubernetes",
+    "Reduced batch job runtime by {n}% by rewriting the hot path",
+    "Led a team of {n} engineers delivering the billing platform",
+    "Designed data pipelines ingesting {n} GB per day into the warehouse",
+    "Added monitoring and alerting that cut incident response time by {n}%",
+]
+
+LINES_PER_PAGE = 55
+
+
+def _pdf_string(text: str) -> str:
+    # Literal string for a content stream; the standard fonts cover Latin-1
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def write_pdf(path: str, pages) -> None:
+    # pages: list of lists of text lines
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        content = "BT /F1 10 Tf 50 760 Td 13 TL " + " ".join(f"{_pdf_string(line)} '" for line in lines) + " ET"
+        data = content.encode("latin-1")
+        objects.append(f"<< /Length {len(data)} >>\nstream\n{content}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objects)} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def resume_lines(index: int, seed: int = 0):
+    rng = random.Random(f"{seed}:{index}")
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [
+        name,
+        f"{name.split()[0].lower()}.{index}@example.com | +1 555 {index % 10000:04d} | Remote",
+        "",
+        "SUMMARY",
+        f"{rng.choice(TITLES)} with {rng.randint(1, 15)} years of experience building backend systems.",
+        "",
+        "SKILLS",
+        ", ".join(rng.sample(SKILLS, rng.randint(4, 10))),
+        "",
+        "EXPERIENCE",
+    ]
+    # 5-20 roles, one to three pages in all
+    for _ in range(rng.randint(1, 4) * 5):
+        lines += [
+            f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({rng.randint(2005, 2020)} - {rng.randint(2021, 2025)})",
+            *(f"- {duty.format(n=rng.randint(2, 90))}" for duty in rng.sample(DUTIES, 3)),
+            f"  Stack: {', '.join(rng.sample(SKILLS, 4))}",
+            "",
+        ]
+    lines += ["EDUCATION", f"{rng.choice(DEGREES)}, State University, {rng.randint(2000, 2020)}"]
+    return lines
+
+
+def generate_corpus(folder: str, count: int, seed: int = 0):
+    # Writes resume_00000.pdf ... into folder, reusing files a previous run of
+    # the same corpus version and seed already wrote. Returns the paths.
+    os.makedirs(folder, exist_ok=True)
+    marker = os.path.join(folder, ".corpus")
+    stamp = f"{CORPUS_VERSION}:{seed}"
+    if os.path.exists(marker):
+        with open(marker, encoding="utf-8") as f:
+            existing = f.read().strip()
+        if existing != stamp:
+            raise ValueError(f"{folder} holds a different corpus ({existing}); pick another --corpus-dir")
+    paths = []
+    for index in range(count):
+        path = os.path.join(folder, f"resume_{index:05d}.pdf")
+        if not os.path.exists(path):
+            lines = resume_lines(index, seed)
+            write_pdf(path, [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)])
+        paths.append(path)
+    with open(marker, "w", encoding="utf-8") as f:
+        f.write(stamp)
+    return paths
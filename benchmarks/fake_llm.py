@@ -0,0 +1,139 @@
+import hashlib
+import json
+import random
+import time
+
+# Deterministic stand-in for ChatOllama, injected with multi_agents.set_llm so
+# the pipeline can be benchmarked without an Ollama server. Each call sleeps
+# for a configurable latency and answers in the shape the calling agent
+# expects; answers are derived from a hash of the prompt, so a corpus gets the
+# same spread of scores on every run (the jitter is not seeded).
+
+CANNED_RECRUITER_TEXT = """Total Score: {total}/100
+Score Breakdown:
+- Skills Match: {skills}/30
+- Experience Match: {experience}/50
+- Education Match: {education}/10
+- Extras: {extras}/10
+
+Summary: The candidate covers most of the core stack and has relevant project work. Cloud and leadership experience are thinner than the role asks for.
+
+Recommendation: {recommendation}"""
+
+CANNED_CONTACT = "Name: {name}\nEmail: candidate@example.com\nPhone: +1 555 0100\nLocation: Remote"
+CANNED_RED_FLAGS = "- Short tenure at one employer\n- Education dates missing"
+CANNED_JD_REQUIREMENTS = "Python, SQL, 3+ years of backend development, REST APIs, cloud deployment, bachelor's degree."
+
+
+class FakeResponse:
+    # The attributes of an AIMessage the pipeline reads
+    def __init__(self, content: str, response_metadata: dict):
+        self.content = content
+        self.response_metadata = response_metadata
+        self.usage_metadata = {
+            "input_tokens": response_metadata["prompt_eval_count"],
+            "output_tokens": response_metadata["eval_count"],
+            "total_tokens": response_metadata["prompt_eval_count"] + response_metadata["eval_count"],
+        }
+
+    def __str__(self):
+        return self.content
+
+
+class FakeChunk:
+    # One streamed piece of an answer; the last one carries the metadata
+    def __init__(self, content: str, response_metadata: dict = None, usage_metadata: dict = None):
+        self.content = content
+        self.response_metadata = response_metadata or {}
+        self.usage_metadata = usage_metadata
+
+
+class FakeChatModel:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0, outputs: dict = None):
+        # latency/jitter in seconds; outputs overrides the canned text per
+        # kind ("recruiter", "recruiter_json", "fused", "redflag", "contact", "jd")
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self.outputs = outputs or {}
+        self.calls = 0
+
+    @staticmethod
+    def kind(prompt: str) -> str:
+        if "respond with ONLY a JSON object" in prompt:
+            return "fused" if '"red_flags"' in prompt else "recruiter_json"
+        if "assign a score out of 100" in prompt:
+            return "recruiter"
+        if "**red flags**" in prompt:
+            return "redflag"
+        if "contact details" in prompt:
+            return "contact"
+        if "job requirements" in prompt:
+            return "jd"
+        return "other"
+
+    def _scores(self, rng) -> dict:
+        scores = {
+            "skills": rng.randint(5, 30),
+            "experience": rng.randint(10, 50),
+            "education": rng.randint(3, 10),
+            "extras": rng.randint(0, 10),
+        }
+        scores["total"] = sum(scores.values())
+        scores["recommendation"] = (
+            "I recommend this candidate for the job." if scores["total"] > 75
+            else "I recommend this candidate for an entry-level position." if scores["total"] >= 50
+            else "I do not recommend this candidate."
+        )
+        return scores
+
+    def _respond(self, kind: str, rng) -> str:
+        if kind in self.outputs:
+            return self.outputs[kind]
+        if kind == "recruiter":
+            return CANNED_RECRUITER_TEXT.format(**self._scores(rng))
+        if kind in ("recruiter_json", "fused"):
+            data = dict(self._scores(rng), summary="Solid backend fundamentals; limited cloud experience.")
+            if kind == "fused":
+                data.update(name=f"Candidate {rng.randint(1, 99999)}", contact="candidate@example.com",
+                            red_flags=["Short tenure at one employer"])
+            return json.dumps(data)
+        if kind == "redflag":
+            return CANNED_RED_FLAGS
+        if kind == "contact":
+            return CANNED_CONTACT.format(name=f"Candidate {rng.randint(1, 99999)}")
+        if kind == "jd":
+            return CANNED_JD_REQUIREMENTS
+        return "OK"
+
+    def _rng(self, prompt: str):
+        return random.Random(hashlib.sha256(f"{self.seed}:{prompt}".encode("utf-8")).hexdigest())
+
+    def reply(self, prompt: str) -> str:
+        # The canned answer to a prompt, without the simulated latency
+        return self._respond(self.kind(prompt), self._rng(prompt))
+
+    def invoke(self, prompt, **kwargs):
+        prompt = str(prompt)
+        delay = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+        if delay:
+            time.sleep(delay)
+        self.calls += 1
+        content = self.reply(prompt)
+        # Rough token counts and an even split of the delay, in Ollama's units (ns)
+        metadata = {
+            "prompt_eval_count": len(prompt) // 4,
+            "eval_count": len(content) // 4,
+            "prompt_eval_duration": int(delay * 0.3 * 1e9),
+            "eval_duration": int(delay * 0.7 * 1e9),
+        }
+        return FakeResponse(content, metadata)
+
+    def stream(self, prompt, **kwargs):
+        # The invoke answer in pieces of a few tokens, then an empty final
+        # chunk with the counts and timings, as ChatOllama.stream yields them
+        response = self.invoke(prompt)
+        content = response.content
+        for i in range(0, len(content), 16):
+            yield FakeChunk(content[i:i + 16])
+        yield FakeChunk("", response.response_metadata, response.usage_metadata)
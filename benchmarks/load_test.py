@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Load test against the mock Ollama server (benchmarks.ollama_mock): starts
+# the mock with the given latency, concurrency limit and error injection,
+# then screens the same synthetic corpus through the app's pipeline
+# (pipeline.screen_roles, as app.py and cli.py call it) at increasing
+# parallelism. Each level runs in a fresh process with an empty cache and
+# reports throughput, tail latency of the agent calls and how resumes failed:
+# "failed" resumes had at least one agent call fail, "unscored" ones got no
+# score at all; the server columns count rejected (503), failed (500) and
+# cut-off responses, answers capped at num_predict ("capped") and streams the
+# client closed early ("closed").
+# Run from the repository root:
+#   python -m benchmarks.load_test --levels 1,2,4,8,16 --parallel 4 --latency lognormal --latency-ms 300 --spread 0.6
+#   python -m benchmarks.load_test --levels 8,32 --max-queue 8 --error-rate 0.05 --disconnect-rate 0.02
+#   python -m benchmarks.load_test --levels 4 --token-ms 5 --ramble-rate 0.3
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CORPUS_DIR = os.path.join(REPO_ROOT, ".cache", "benchmark_corpus")
+
+# Stages timed per LangGraph node that call the LLM
+LLM_STAGES = ("Resume_agent", "Redflag_agent", "Recruiter_agent", "Fused_agent")
+
+
+def _quantile(values, pct: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def run_one(level: int, args) -> dict:
+    # Runs in the child interpreter, with OLLAMA_BASE_URL pointing at the mock
+    from benchmarks.corpus import generate_corpus
+    from benchmarks.throughput import JOB_DESCRIPTION
+    from metrics import MetricsRecorder
+    from pipeline import screen_roles
+
+    paths = generate_corpus(args.corpus_dir, args.resumes, seed=args.seed)
+    settings = {"structured_output": args.structured, "compact_resume": True}
+    metrics = MetricsRecorder()
+    start = time.perf_counter()
+    results = screen_roles(paths, {"JD": JOB_DESCRIPTION}, settings, args.mode,
+                           max_workers=level, timeout=args.timeout, metrics=metrics)["JD"]
+    elapsed = time.perf_counter() - start
+
+    calls = [r["seconds"] for r in metrics.records if r["stage"] in LLM_STAGES]
+    failed = [r for r in results if r.get("errors")]
+    return {
+        "level": level,
+        "seconds": elapsed,
+        "resumes_per_s": len(results) / elapsed if elapsed > 0 else 0.0,
+        "call_p50_s": _quantile(calls, 50),
+        "call_p95_s": _quantile(calls, 95),
+        "call_p99_s": _quantile(calls, 99),
+        "failed": len(failed),
+        "unscored": sum(1 for r in results if r["score"] < 0),
+        "timed_out": sum(1 for r in failed if any("Timed out" in e for e in r["errors"])),
+    }
+
+
+def start_mock(args):
+    # Starts the mock server in its own process; returns (process, base_url)
+    command = [
+        sys.executable, "-m", "benchmarks.ollama_mock", "--port", "0",
+        "--latency", args.latency, "--latency-ms", str(args.latency_ms), "--spread", str(args.spread),
+        "--token-ms", str(args.token_ms), "--parallel", str(args.parallel), "--max-queue", str(args.max_queue),
+        "--error-rate", str(args.error_rate), "--disconnect-rate", str(args.disconnect_rate),
+        "--ramble-rate", str(args.ramble_rate), "--seed", str(args.seed),
+    ]
+    process = subprocess.Popen(command, cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline().strip()
+    if not line.startswith("Mock Ollama listening on "):
+        process.kill()
+        raise RuntimeError(f"Mock Ollama server failed to start: {line}")
+    return process, line.rsplit(" ", 1)[-1]
+
+
+def mock_request(base_url: str, path: str, method: str = "GET") -> dict:
+    import requests
+
+    resp = requests.request(method, base_url + path, json={} if method == "POST" else None, timeout=5)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def measure(level: int, base_url: str, argv) -> dict:
+    mock_request(base_url, "/mock/reset", "POST")
+    with tempfile.TemporaryDirectory(prefix="resume-load-") as cache_dir:
+        env = dict(os.environ, RESUME_CACHE_DIR=cache_dir, OLLAMA_BASE_URL=base_url)
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.load_test", "--run-one", str(level), *argv],
+            cwd=REPO_ROOT, env=env, capture_output=True, text=True,
+        )
+    if out.returncode != 0:
+        raise RuntimeError(f"Load test at parallelism {level} failed:\n{out.stderr}")
+    row = json.loads(out.stdout.strip().splitlines()[-1])
+    row["server"] = mock_request(base_url, "/mock/stats")
+    return row
+
+
+def main(argv=None) -> int:
+    from benchmarks.ollama_mock import add_arguments
+
+    parser = argparse.ArgumentParser(description="Load-test the screening pipeline against a mock Ollama server.")
+    parser.add_argument("--levels", default="1,2,4,8,16",
+                        help="Comma-separated screening concurrency levels (default: 1,2,4,8,16)")
+    parser.add_argument("--resumes", type=int, default=40, help="Synthetic resumes per level (default: 40)")
+    parser.add_argument("--mode", choices=("multi", "fused"), default="multi", help="Screening mode (default: multi)")
+    parser.add_argument("--structured", action=argparse.BooleanOptionalAction, default=False,
+                        help="Ask the recruiter agent for JSON scores")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Timeout per resume in seconds (default: 120)")
+    parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR,
+                        help="Where the synthetic PDFs are written and reused between runs")
+    add_arguments(parser)
+    parser.add_argument("--run-one", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one is not None:
+        print(json.dumps(run_one(args.run_one, args)))
+        return 0
+
+    child_argv = [
+        "--resumes", str(args.resumes), "--mode", args.mode,
+        "--structured" if args.structured else "--no-structured",
+        "--timeout", str(args.timeout), "--corpus-dir", os.path.abspath(args.corpus_dir), "--seed", str(args.seed),
+    ]
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+    process, base_url = start_mock(args)
+    try:
+        print(f"mock: {args.latency} {args.latency_ms:g}ms (spread {args.spread:g}), parallel={args.parallel}, "
+              f"max_queue={args.max_queue}, error_rate={args.error_rate:g}, disconnect_rate={args.disconnect_rate:g}, "
+              f"ramble_rate={args.ramble_rate:g}")
+        print(f"{'workers':>8}{'resumes/s':>11}{'call p50 s':>12}{'p95 s':>8}{'p99 s':>8}{'failed':>8}{'unscored':>10}"
+              f"{'timeouts':>10}{'503s':>6}{'500s':>6}{'cut':>5}{'capped':>8}{'closed':>8}{'peak queue':>12}")
+        for level in levels:
+            row = measure(level, base_url, child_argv)
+            server = row["server"]
+            print(f"{row['level']:>8}{row['resumes_per_s']:>11.2f}{row['call_p50_s']:>12.2f}{row['call_p95_s']:>8.2f}"
+                  f"{row['call_p99_s']:>8.2f}{row['failed']:>8}{row['unscored']:>10}{row['timed_out']:>10}"
+                  f"{server['rejected']:>6}{server['errors']:>6}{server['disconnects']:>5}{server['truncated']:>8}"
+                  f"{server['cancelled']:>8}{server['peak_waiting']:>12}", flush=True)
+    finally:
+        process.terminate()
+        process.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import argparse
+import time
+
+from batch import SCREENING_CONCURRENCY, run_batch
+from multi_agents import ensure_ollama_available, prepare_jd_requirements
+from pipeline import (
+    SCREENING_MODES,
+    build_workflow,
+    collect_resume_paths,
+    extract_resumes,
+    mode_agreement,
+    screen_resume,
+    screening_failed,
+    screening_key,
+    split_cached,
+    store_result,
+)
+from result_store import ResultStore
+
+# Screens a sample of resumes in both multi-agent and fused mode and reports
+# how closely the fused scores track the multi-agent ones. Results are kept in
+# the result store, so re-running on the same sample is cheap. Run from the
+# repository root:
+#   python -m benchmarks.mode_agreement resumes/ --jd JD.txt --limit 50
+
+
+def screen_sample(mode: str, paths, extracted, jd_text: str, jd_requirements: str, concurrency: int):
+    store = ResultStore()
+    settings = {"structured_output": True}
+    key = screening_key(jd_text, settings, mode)
+    hashes = {p: extracted[p]["resume_hash"] for p in paths}
+    cached, to_screen = split_cached(store, hashes, paths, key)
+    app = build_workflow(mode)
+    start = time.perf_counter()
+    screened = run_batch(
+        to_screen,
+        lambda p: screen_resume(app, p, extracted[p], jd_text, jd_requirements, settings),
+        screening_failed,
+        max_workers=concurrency,
+        on_progress=lambda done, total, path, result: store_result(store, hashes, result, key),
+    )
+    elapsed = time.perf_counter() - start
+    return cached + screened, len(to_screen), elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare fused and multi-agent screening on a sample of resumes.")
+    parser.add_argument("folder", help="Folder containing resume PDFs")
+    parser.add_argument("--jd", required=True, help="Path to the job description text file")
+    parser.add_argument("--limit", type=int, default=50, help="Number of resumes to sample (default: 50)")
+    parser.add_argument("--min-score", type=int, default=85, help="Threshold used for agreement (default: 85)")
+    parser.add_argument("--top-n", type=int, default=20, help="Top-N used for overlap (default: 20)")
+    parser.add_argument("--concurrency", type=int, default=SCREENING_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    with open(args.jd, "r", encoding="utf-8", errors="ignore") as f:
+        jd_text = f.read()
+    extracted, _ = extract_resumes(collect_resume_paths(args.folder)[: args.limit])
+    paths = list(extracted)
+    if not paths:
+        parser.error(f"No readable resume PDFs found in {args.folder}")
+
+    ensure_ollama_available()
+    jd_requirements = prepare_jd_requirements(jd_text)
+
+    # LLM calls per resume in each mode (the JD is prepared once per batch)
+    calls_per_resume = {"multi": 3, "fused": 1}
+    results = {}
+    for mode in SCREENING_MODES:
+        results[mode], screened, elapsed = screen_sample(
+            mode, paths, extracted, jd_text, jd_requirements, args.concurrency
+        )
+        per_resume = f"{elapsed / screened:.2f}s/resume" if screened else "all cached"
+        print(f"{mode:<6} screened {screened:>4} new resume(s) in {elapsed:.1f}s ({per_resume}), "
+              f"{calls_per_resume[mode]} LLM call(s) per resume")
+
+    metrics = mode_agreement(results["multi"], results["fused"], args.min_score, args.top_n)
+    print(f"\nAgreement on {metrics['compared']} resume(s) scored in both modes:")
+    for name, value in metrics.items():
+        if name == "compared":
+            continue
+        print(f"  {name:<26} {value:.3f}" if isinstance(value, float) else f"  {name:<26} {value}")
+
+
+if __name__ == "__main__":
+    main()
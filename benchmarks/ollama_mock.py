@@ -0,0 +1,297 @@
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fake_llm import FakeChatModel
+
+# Stand-in Ollama server for load and failure testing: implements /api/tags
+# and /api/chat (streamed NDJSON or a single JSON body, as the ollama client
+# asks) with canned agent answers from benchmarks.fake_llm. Responses take a
+# latency drawn from a configurable distribution, at most --parallel requests
+# are generated at once with up to --max-queue more waiting (503 beyond that,
+# like OLLAMA_NUM_PARALLEL / OLLAMA_MAX_QUEUE), and a share of requests can
+# fail with a 500 or drop the connection mid-stream, and a share can ramble
+# on past the answer (as small models do) until the request's num_predict
+# cap or the client closing the stream ends them. Run from the repository
+# root and point the app at it:
+#   python -m benchmarks.ollama_mock --port 11435 --latency lognormal --latency-ms 800 --parallel 2
+#   OLLAMA_BASE_URL=http://127.0.0.1:11435 streamlit run app.py
+# GET /mock/stats returns request counters; POST /mock/reset clears them.
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+class MockOllama:
+    # Server-side behaviour and counters, shared by the handler threads
+    def __init__(self, model: str = "llama3.2", latency: str = "fixed", latency_ms: float = 0.0,
+                 spread: float = 0.0, token_ms: float = 0.0, parallel: int = 1, max_queue: int = 512,
+                 error_rate: float = 0.0, disconnect_rate: float = 0.0, ramble_rate: float = 0.0,
+                 seed: int = 0):
+        # latency_ms is the median time to first token; spread is the +/- ms
+        # range for "uniform" and sigma for "lognormal"; token_ms is added
+        # per streamed chunk
+        self.model = model
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.spread = spread
+        self.token_ms = token_ms
+        self.error_rate = error_rate
+        self.disconnect_rate = disconnect_rate
+        self.ramble_rate = ramble_rate
+        self.max_queue = max_queue
+        self.answers = FakeChatModel(seed=seed)
+        self.rng = random.Random(seed)
+        self.slots = threading.BoundedSemaphore(parallel)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        # Requests still running or queued keep being counted as such
+        with self.lock:
+            stats = getattr(self, "stats", {})
+            in_flight, waiting = stats.get("in_flight", 0), stats.get("waiting", 0)
+            self.stats = {"requests": 0, "completed": 0, "rejected": 0, "errors": 0, "disconnects": 0,
+                          "cancelled": 0, "truncated": 0,
+                          "in_flight": in_flight, "peak_in_flight": in_flight,
+                          "waiting": waiting, "peak_waiting": waiting}
+
+    def count(self, key: str, delta: int = 1) -> None:
+        with self.lock:
+            self.stats[key] += delta
+            peak = "peak_" + key
+            if peak in self.stats:
+                self.stats[peak] = max(self.stats[peak], self.stats[key])
+
+    def enqueue(self) -> bool:
+        # Counts a request as waiting for a slot, or refuses it when the queue is full
+        with self.lock:
+            self.stats["requests"] += 1
+            if self.stats["waiting"] >= self.max_queue:
+                self.stats["rejected"] += 1
+                return False
+            self.stats["waiting"] += 1
+            self.stats["peak_waiting"] = max(self.stats["peak_waiting"], self.stats["waiting"])
+            return True
+
+    def draw(self):
+        # (first-token delay in seconds, fail?, disconnect?, ramble?)
+        with self.lock:
+            if self.latency == "uniform":
+                ms = self.latency_ms + self.rng.uniform(-self.spread, self.spread)
+            elif self.latency == "lognormal" and self.latency_ms > 0:
+                ms = self.rng.lognormvariate(math.log(self.latency_ms), self.spread)
+            else:
+                ms = self.latency_ms
+            return (max(0.0, ms) / 1000, self.rng.random() < self.error_rate,
+                    self.rng.random() < self.disconnect_rate, self.rng.random() < self.ramble_rate)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _chunks(text: str, size: int = 16):
+    # Streamed pieces of roughly a few tokens each
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+# What a rambling model keeps adding after its answer: a few varied lines,
+# then the same line over and over
+RAMBLE_LINES = [
+    "\n\nAdditionally, the candidate may benefit from further review.",
+    "\nPlease note that this assessment is based only on the resume provided.",
+] + ["\nOverall, the candidate should be considered carefully."] * 200
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    mock = None  # MockOllama, set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": self.mock.model, "model": self.mock.model,
+                                              "modified_at": _now(), "size": 0, "digest": "mock"}]})
+        elif self.path == "/api/version":
+            self._send_json(200, {"version": "0.0.0-mock"})
+        elif self.path == "/mock/stats":
+            with self.mock.lock:
+                self._send_json(200, dict(self.mock.stats))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path == "/mock/reset":
+            self._read_json()
+            self.mock.reset()
+            self._send_json(200, {})
+        elif self.path == "/api/chat":
+            self._chat(self._read_json())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _chat(self, request: dict) -> None:
+        mock = self.mock
+        if not mock.enqueue():
+            self._send_json(503, {"error": "server busy, please try again.  maximum pending requests exceeded"})
+            return
+        started = time.perf_counter()
+        with mock.slots:
+            mock.count("waiting", -1)
+            mock.count("in_flight")
+            try:
+                self._generate(request, started)
+            finally:
+                mock.count("in_flight", -1)
+
+    def _generate(self, request: dict, started: float) -> None:
+        mock = self.mock
+        delay, fail, disconnect, ramble = mock.draw()
+        time.sleep(delay)
+        if fail:
+            mock.count("errors")
+            self._send_json(500, {"error": "mock: injected model failure"})
+            return
+
+        prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+        content = mock.answers.reply(prompt)
+        prompt_tokens, chunks = len(prompt) // 4, _chunks(content)
+        if ramble:
+            chunks += [piece for line in RAMBLE_LINES for piece in _chunks(line)]
+        # Each chunk counts as one token against the request's num_predict
+        num_predict = (request.get("options") or {}).get("num_predict") or -1
+        done_reason = "stop"
+        if 0 < num_predict < len(chunks):
+            chunks, done_reason = chunks[:num_predict], "length"
+            mock.count("truncated")
+        model = request.get("model") or mock.model
+        if not request.get("stream", True):
+            time.sleep(mock.token_ms * len(chunks) / 1000)
+            body = {"model": model, "created_at": _now(),
+                    "message": {"role": "assistant", "content": "".join(chunks)},
+                    "done": True, "done_reason": done_reason}
+            self._send_json(200, dict(body, **self._timings(started, delay, prompt_tokens, len(chunks))))
+            mock.count("completed")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for index, piece in enumerate(chunks):
+                if disconnect and index >= len(chunks) // 2:
+                    mock.count("disconnects")
+                    self.close_connection = True
+                    return
+                self._write_line({"model": model, "created_at": _now(),
+                                  "message": {"role": "assistant", "content": piece}, "done": False})
+                time.sleep(mock.token_ms / 1000)
+            self._write_line(dict({"model": model, "created_at": _now(),
+                                   "message": {"role": "assistant", "content": ""},
+                                   "done": True, "done_reason": done_reason},
+                                  **self._timings(started, delay, prompt_tokens, len(chunks))))
+            self.wfile.write(b"0\r\n\r\n")
+            mock.count("completed")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, e.g. on an early stop condition
+            mock.count("cancelled")
+            self.close_connection = True
+
+    def _write_line(self, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _timings(self, started: float, delay: float, prompt_tokens: int, tokens: int) -> dict:
+        # Ollama's response timings, in nanoseconds
+        total = time.perf_counter() - started
+        return {
+            "total_duration": int(total * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(delay * 1e9),
+            "eval_count": tokens,
+            "eval_duration": int(max(0.0, total - delay) * 1e9),
+        }
+
+
+def serve(mock: MockOllama, host: str = "127.0.0.1", port: int = 11435) -> ThreadingHTTPServer:
+    # Returns a started server (port 0 picks a free one: server.server_port)
+    handler = type("MockHandler", (Handler,), {"mock": mock})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--model", default="llama3.2", help="Model name reported by /api/tags (default: llama3.2)")
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="fixed",
+                        help="Distribution of the time to first token (default: fixed)")
+    parser.add_argument("--latency-ms", type=float, default=200.0,
+                        help="Median time to first token in ms (default: 200)")
+    parser.add_argument("--spread", type=float, default=0.0,
+                        help="+/- ms for uniform, sigma for lognormal (default: 0)")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="Delay per streamed chunk in ms (default: 0)")
+    parser.add_argument("--parallel", type=int, default=1,
+                        help="Requests generated at once, like OLLAMA_NUM_PARALLEL (default: 1)")
+    parser.add_argument("--max-queue", type=int, default=512,
+                        help="Requests allowed to wait before 503s, like OLLAMA_MAX_QUEUE (default: 512)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0,
+                        help="Share of streamed responses cut off halfway")
+    parser.add_argument("--ramble-rate", type=float, default=0.0,
+                        help="Share of answers that run on with repeated lines until num_predict")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latencies, failures and answers (default: 0)")
+
+
+def mock_from_args(args) -> MockOllama:
+    return MockOllama(
+        model=args.model, latency=args.latency, latency_ms=args.latency_ms, spread=args.spread,
+        token_ms=args.token_ms, parallel=args.parallel, max_queue=args.max_queue,
+        error_rate=args.error_rate, disconnect_rate=args.disconnect_rate, ramble_rate=args.ramble_rate,
+        seed=args.seed,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve a mock Ollama API for load and failure testing.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=11435, help="Port to listen on (default: 11435)")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = serve(mock_from_args(args), args.host, args.port)
+    print(f"Mock Ollama listening on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
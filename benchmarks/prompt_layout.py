@@ -0,0 +1,88 @@
+import argparse
+import statistics
+import time
+
+from multi_agents import NODE_MODELS, OUTPUT_TOKEN_BUDGETS, PROMPT_LAYOUTS, build_recruiter_prompt, get_llm
+from pipeline import collect_resume_paths, extract_resumes
+
+# Measures per-resume recruiter latency for each prompt layout against a live
+# Ollama server, on the scoring model. Each layout runs over all resumes in
+# one block, after an unmeasured warm-up call in that layout, and the order
+# of the layouts alternates between repeats so neither is always the one
+# that runs on a warm server. Run from the repository root:
+#   python -m benchmarks.prompt_layout resumes/ --jd JD.txt --limit 20 --repeats 2
+
+
+def run_layout(llm, layout: str, resumes, jd_text: str):
+    # Warm-up: loads the model and leaves this layout's prefix in the cache,
+    # as an earlier resume of the same batch would
+    llm.invoke(build_recruiter_prompt(resumes[-1]["resume_text"], jd_text, layout=layout))
+    rows = []
+    for resume in resumes:
+        prompt = build_recruiter_prompt(resume["resume_text"], jd_text, layout=layout)
+        start = time.perf_counter()
+        response = llm.invoke(prompt)
+        wall = time.perf_counter() - start
+        meta = response.response_metadata or {}
+        rows.append({
+            "wall": wall,
+            # Ollama reports durations in nanoseconds; cached prefix tokens are
+            # not re-evaluated, so prompt_eval_count drops on a cache hit
+            "prompt_eval_s": meta.get("prompt_eval_duration", 0) / 1e9,
+            "prompt_eval_count": meta.get("prompt_eval_count", 0),
+        })
+    return rows
+
+
+def summarize(layout: str, rows) -> dict:
+    return {
+        "layout": layout,
+        "mean_wall": statistics.mean(r["wall"] for r in rows),
+        "median_wall": statistics.median(r["wall"] for r in rows),
+        "mean_prompt_eval": statistics.mean(r["prompt_eval_s"] for r in rows),
+        "mean_prompt_tokens": statistics.mean(r["prompt_eval_count"] for r in rows),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare recruiter prompt layouts for Ollama prompt-cache reuse.")
+    parser.add_argument("folder", help="Folder containing resume PDFs")
+    parser.add_argument("--jd", required=True, help="Path to the job description text file")
+    parser.add_argument("--limit", type=int, default=20, help="Number of resumes per layout (default: 20)")
+    parser.add_argument("--repeats", type=int, default=2,
+                        help="Runs of each layout, alternating which goes first (default: 2)")
+    parser.add_argument("--model", default=NODE_MODELS["score"],
+                        help=f"Model to measure (default: the scoring model, {NODE_MODELS['score']})")
+    args = parser.parse_args(argv)
+
+    with open(args.jd, "r", encoding="utf-8", errors="ignore") as f:
+        jd_text = f.read()
+    paths = collect_resume_paths(args.folder)[: args.limit]
+    extracted, _ = extract_resumes(paths)
+    resumes = list(extracted.values())
+    if not resumes:
+        parser.error(f"No resume PDFs found in {args.folder}")
+
+    llm = get_llm(model=args.model, num_predict=OUTPUT_TOKEN_BUDGETS["recruiter"])
+    rows = {layout: [] for layout in PROMPT_LAYOUTS}
+    for repeat in range(max(1, args.repeats)):
+        order = PROMPT_LAYOUTS if repeat % 2 == 0 else PROMPT_LAYOUTS[::-1]
+        for layout in order:
+            rows[layout] += run_layout(llm, layout, resumes, jd_text)
+
+    print(f"model: {args.model}, {len(resumes)} resume(s) x {max(1, args.repeats)} repeat(s) per layout")
+    summaries = [summarize(layout, rows[layout]) for layout in PROMPT_LAYOUTS]
+    print(f"{'layout':<14}{'mean s':>10}{'median s':>10}{'prompt eval s':>15}{'prompt tokens':>15}")
+    for row in summaries:
+        print(
+            f"{row['layout']:<14}{row['mean_wall']:>10.2f}{row['median_wall']:>10.2f}"
+            f"{row['mean_prompt_eval']:>15.2f}{row['mean_prompt_tokens']:>15.0f}"
+        )
+    baseline, candidate = summaries[0], summaries[-1]
+    saved = baseline["mean_wall"] - candidate["mean_wall"]
+    print(f"\n{candidate['layout']} saves {saved:.2f}s per resume vs {baseline['layout']} "
+          f"({saved / baseline['mean_wall'] * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
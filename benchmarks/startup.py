@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Cold-start benchmark: imports the app modules in fresh interpreters and
+# fails if startup gets slower than a budget or if a heavy dependency starts
+# being imported eagerly again. Run from the repository root:
+#   python -m benchmarks.startup --runs 5 --max-seconds 1.5
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only load when a screening run actually needs them
+DEFERRED_MODULES = [
+    "langchain_ollama",
+    "langchain_community.chat_models",
+    "langchain_community.embeddings",
+    "langchain_community.vectorstores",
+    "langchain.chains",
+    "langgraph",
+    "chromadb",
+    "sentence_transformers",
+    "requests",
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {modules}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+def measure_once(modules) -> dict:
+    code = _PROBE.format(modules=", ".join(modules), deferred=DEFERRED_MODULES)
+    env = dict(os.environ)
+    # Point at a closed port: importing must not need a reachable Ollama server
+    env.setdefault("OLLAMA_BASE_URL", "http://127.0.0.1:9")
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold import time of the screening app.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time (default: 5)")
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="Fail if the median import time exceeds this budget")
+    parser.add_argument("--modules", nargs="+", default=["multi_agents", "pipeline", "app"],
+                        help="Modules to import (default: multi_agents pipeline app)")
+    args = parser.parse_args(argv)
+
+    samples = [measure_once(args.modules) for _ in range(args.runs)]
+    times = [s["seconds"] for s in samples]
+    loaded = sorted({m for s in samples for m in s["loaded"]})
+    median = statistics.median(times)
+    print(f"import {' '.join(args.modules)}: median {median:.3f}s, min {min(times):.3f}s, max {max(times):.3f}s")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: deferred modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"FAIL: median {median:.3f}s exceeds budget {args.max_seconds:.3f}s")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+# Offline throughput benchmark: screens a synthetic resume corpus through the
+# full pipeline (PDF parsing, compaction, LangGraph agents, score parsing)
+# with a deterministic fake chat model in place of Ollama, so the numbers
+# measure the app's own overhead plus whatever LLM latency is simulated.
+# Each corpus size runs in a fresh interpreter with an empty cache, reporting
+# resumes/sec, PDF parse time, score-parsing time and peak memory. Run from
+# the repository root:
+#   python -m benchmarks.throughput --sizes 10,100,1000 --latency-ms 50
+#   python -m benchmarks.throughput --sizes 10000 --concurrency 16
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CORPUS_DIR = os.path.join(REPO_ROOT, ".cache", "benchmark_corpus")
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+We are looking for an engineer with 5+ years of Python and SQL experience who
+has built and operated REST APIs in production. Experience with Docker,
+Kubernetes and a major cloud provider (AWS or GCP) is required; Kafka or
+Airflow is a plus. A degree in computer science or a related field is
+preferred."""
+
+
+def _peak_rss_mb() -> float:
+    # Peak resident memory of the screening process. The PDF extraction
+    # workers are forked by the forkserver rather than by this process, so
+    # they are not included. ru_maxrss is in KiB on Linux and bytes on macOS;
+    # Windows has no resource module.
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def time_score_parsing(count: int, seed: int) -> float:
+    # Mean microseconds to parse and normalise one free-text recruiter answer
+    from benchmarks.fake_llm import FakeChatModel
+    from scoring import normalize_recruiter_output, parse_total_score
+
+    model = FakeChatModel(seed=seed)
+    texts = [model._respond("recruiter", random.Random(f"{seed}:{i}")) for i in range(count)]
+    start = time.perf_counter()
+    for text in texts:
+        parse_total_score(normalize_recruiter_output(text))
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def run_one(size: int, args) -> dict:
+    # Runs in the child interpreter; RESUME_CACHE_DIR already points at an
+    # empty directory so every PDF is parsed cold
+    import multi_agents
+    from benchmarks.corpus import generate_corpus
+    from benchmarks.fake_llm import FakeChatModel
+    from metrics import MetricsRecorder
+    from pipeline import screen_roles
+
+    paths = generate_corpus(args.corpus_dir, size, seed=args.seed)
+    model = FakeChatModel(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, seed=args.seed)
+    multi_agents.set_llm(model)
+    settings = {"structured_output": args.structured, "compact_resume": args.compact}
+
+    metrics = MetricsRecorder()
+    start = time.perf_counter()
+    results = screen_roles(paths, {"JD": JOB_DESCRIPTION}, settings, args.mode,
+                           max_workers=args.concurrency, metrics=metrics)["JD"]
+    elapsed = time.perf_counter() - start
+    metrics.finish()
+
+    stages = metrics.summary()["stages"]
+    parse = stages.get("PDF_extraction", {})
+    return {
+        "size": size,
+        "seconds": elapsed,
+        "resumes_per_s": size / elapsed if elapsed > 0 else 0.0,
+        "errors": sum(1 for r in results if r.get("errors") or r.get("quarantine")),
+        "llm_calls": model.calls,
+        "prompt_tokens": sum(stats["prompt_tokens"] for stats in stages.values()),
+        "estimated_calls": sum(stats["estimated_calls"] for stats in stages.values()),
+        # Stages whose LLM calls left no prompt tokens in the metrics
+        "untracked_stages": sorted(name for name, stats in stages.items()
+                                   if stats["llm_calls"] and not stats["prompt_tokens"]),
+        "pdf_parse_p50_ms": parse.get("p50_s", 0.0) * 1000,
+        "pdf_parse_p95_ms": parse.get("p95_s", 0.0) * 1000,
+        "pdf_parse_total_s": parse.get("total_s", 0.0),
+        "score_parse_us": time_score_parsing(size, args.seed),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def measure(size: int, argv) -> dict:
+    with tempfile.TemporaryDirectory(prefix="resume-bench-") as cache_dir:
+        env = dict(os.environ, RESUME_CACHE_DIR=cache_dir)
+        # Point at a closed port: nothing in the run may reach a real server
+        env["OLLAMA_BASE_URL"] = "http://127.0.0.1:9"
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.throughput", "--run-one", str(size), *argv],
+            cwd=REPO_ROOT, env=env, capture_output=True, text=True,
+        )
+    if out.returncode != 0:
+        raise RuntimeError(f"Benchmark run with {size} resumes failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _fmt(value, spec: str) -> str:
+    return "n/a" if value is None else format(value, spec)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure offline screening throughput with a fake LLM.")
+    parser.add_argument("--sizes", default="10,100,1000",
+                        help="Comma-separated corpus sizes to run (default: 10,100,1000)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated LLM latency per call (default: 0)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the latency (default: 0)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Resumes screened in parallel (default: 4)")
+    parser.add_argument("--mode", choices=("multi", "fused"), default="multi", help="Screening mode (default: multi)")
+    parser.add_argument("--structured", action=argparse.BooleanOptionalAction, default=False,
+                        help="Ask the recruiter agent for JSON scores")
+    parser.add_argument("--compact", action=argparse.BooleanOptionalAction, default=True,
+                        help="Compact resume text before prompting (default: on)")
+    parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR,
+                        help="Where the synthetic PDFs are written and reused between runs")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the corpus and the fake model (default: 0)")
+    parser.add_argument("--run-one", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one is not None:
+        print(json.dumps(run_one(args.run_one, args)))
+        return 0
+
+    # Forwarded to each child run
+    child_argv = [
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+        "--concurrency", str(args.concurrency), "--mode", args.mode,
+        "--structured" if args.structured else "--no-structured",
+        "--compact" if args.compact else "--no-compact",
+        "--corpus-dir", os.path.abspath(args.corpus_dir), "--seed", str(args.seed),
+    ]
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    print(f"mode={args.mode} latency={args.latency_ms:g}ms±{args.jitter_ms:g} concurrency={args.concurrency}")
+    print(f"{'resumes':>8}{'wall s':>9}{'resumes/s':>11}{'parse p50 ms':>14}{'parse total s':>15}"
+          f"{'score µs':>10}{'peak MB':>9}{'prompt tok':>12}{'estimated':>11}{'errors':>8}")
+    failed = False
+    for size in sizes:
+        row = measure(size, child_argv)
+        print(f"{row['size']:>8}{row['seconds']:>9.2f}{row['resumes_per_s']:>11.1f}"
+              f"{row['pdf_parse_p50_ms']:>14.2f}{row['pdf_parse_total_s']:>15.2f}{row['score_parse_us']:>10.1f}"
+              f"{_fmt(row['peak_rss_mb'], '.0f'):>9}{row['prompt_tokens']:>12}{row['estimated_calls']:>11}"
+              f"{row['errors']:>8}",
+              flush=True)
+        if row["untracked_stages"]:
+            print(f"  LLM usage missing from the metrics of: {', '.join(row['untracked_stages'])}")
+        failed = failed or bool(row["errors"]) or bool(row["untracked_stages"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+from batch import SCREENING_CONCURRENCY, SCREENING_TIMEOUT
+from compaction import RESUME_COMPACTION
+from metrics import METRICS_FILE, METRICS_PROM_FILE, MetricsRecorder
+from multi_agents import ESCALATION_MARGIN, NODE_MODELS, PROMPT_LAYOUT, PROMPT_LAYOUTS, STRUCTURED_SCORING
+from pipeline import (
+    DEDUPE_TEXT,
+    ESCALATED_LABEL,
+    SCREENING_MODE,
+    SCREENING_MODES,
+    collect_resume_paths,
+    best_fit,
+    compaction_summary,
+    rank_results,
+    role_names,
+    screen_roles,
+)
+from result_store import ResultStore
+from skill_index import SkillIndex
+
+CSV_FIELDS = ["resume_path", "score", "details"]
+
+
+class ResultWriter:
+    # Appends one row per finished resume and flushes immediately, so a long
+    # overnight run leaves usable output behind even if it is interrupted.
+    # With several job descriptions each row also names its role.
+    def __init__(self, path: str, with_role: bool = False):
+        self.path = path
+        self.with_role = with_role
+        self.is_csv = bool(path) and path.lower().endswith(".csv")
+        if path and path != "-":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.stream = open(path, "w", encoding="utf-8", newline="")
+        else:
+            self.stream = sys.stdout
+        self.csv_writer = None
+        if self.is_csv:
+            fields = ["role"] + CSV_FIELDS if with_role else CSV_FIELDS
+            self.csv_writer = csv.DictWriter(self.stream, fieldnames=fields)
+            self.csv_writer.writeheader()
+
+    def write(self, result: dict, role: str = None) -> None:
+        if self.with_role:
+            result = dict(result, role=role)
+        if self.csv_writer is not None:
+            self.csv_writer.writerow({
+                **({"role": role} if self.with_role else {}),
+                "resume_path": result["resume_path"],
+                "score": result["score"],
+                "details": json.dumps(result["details"], ensure_ascii=False),
+            })
+        else:
+            self.stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def close(self) -> None:
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Screen a folder of resume PDFs against one or more job descriptions without the Streamlit UI."
+    )
+    parser.add_argument("folder", help="Folder containing resume PDFs")
+    parser.add_argument("--jd", required=True, action="append",
+                        help="Path to a job description text file; repeat to screen the pool against several roles")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Also scan subfolders for PDFs")
+    parser.add_argument("--min-score", type=int, default=85, help="Minimum score for the final ranking (default: 85)")
+    parser.add_argument("--top-n", type=int, default=20, help="Number of top resumes in the final ranking (default: 20)")
+    parser.add_argument(
+        "-o", "--output", default="-",
+        help="Where to stream every result as it finishes; .csv for CSV, anything else for JSONL (default: stdout)",
+    )
+    parser.add_argument("--concurrency", type=int, default=SCREENING_CONCURRENCY,
+                        help=f"Resumes screened in parallel (default: {SCREENING_CONCURRENCY})")
+    parser.add_argument("--timeout", type=float, default=SCREENING_TIMEOUT,
+                        help=f"Timeout per resume in seconds (default: {SCREENING_TIMEOUT:g})")
+    parser.add_argument("--prefilter-top-k", type=int, default=0,
+                        help="Only send the K resumes most similar to the JD (by embeddings) to the LLM")
+    parser.add_argument("--prefilter-threshold", type=float, default=0.0,
+                        help="Only send resumes with embedding similarity >= this value to the LLM")
+    parser.add_argument("--mode", choices=SCREENING_MODES, default=SCREENING_MODE,
+                        help="multi: separate agents; fused: one structured LLM call per resume")
+    parser.add_argument("--structured", action=argparse.BooleanOptionalAction, default=STRUCTURED_SCORING,
+                        help="Ask the recruiter agent for typed JSON scores instead of parsing free text")
+    parser.add_argument("--compact", action=argparse.BooleanOptionalAction, default=RESUME_COMPACTION,
+                        help="Strip repeated headers/footers and send each agent only the resume sections it needs")
+    parser.add_argument("--prompt-layout", choices=PROMPT_LAYOUTS, default=PROMPT_LAYOUT,
+                        help="Recruiter prompt layout; jd-first lets Ollama reuse its prompt cache across a batch")
+    parser.add_argument("--dedupe-text", action=argparse.BooleanOptionalAction, default=DEDUPE_TEXT,
+                        help="Also screen files with the same normalised text only once (extracts every resume first)")
+    parser.add_argument("--extract-model", default=NODE_MODELS["extract"],
+                        help=f"Model for contact and JD requirement extraction (default: {NODE_MODELS['extract']})")
+    parser.add_argument("--redflag-model", default=NODE_MODELS["redflag"],
+                        help=f"Model for the red-flag agent (default: {NODE_MODELS['redflag']})")
+    parser.add_argument("--score-model", default=NODE_MODELS["score"],
+                        help=f"Model for scoring (default: {NODE_MODELS['score']})")
+    parser.add_argument("--escalate-model", default=NODE_MODELS["escalate"],
+                        help="Re-score resumes near --min-score on this model (default: off)")
+    parser.add_argument("--escalation-margin", type=int, default=ESCALATION_MARGIN,
+                        help=f"Escalate scores within this many points of --min-score (default: {ESCALATION_MARGIN})")
+    parser.add_argument("--rescreen", action="store_true",
+                        help="Ignore stored results and screen every resume again")
+    parser.add_argument("--checkpoint", action=argparse.BooleanOptionalAction, default=True,
+                        help="Journal finished resumes so an interrupted run resumes where it stopped (default: on)")
+    return parser.parse_args(argv)
+
+
+def log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def log_metrics(summary: dict) -> None:
+    if not summary["stages"]:
+        return
+    log(f"Pipeline metrics (batch {summary['batch_id']}, {summary['resumes']} resume(s) screened, "
+        f"{summary['resumes_per_min']:.1f} resumes/min):")
+    log(f"  {'stage':<16}{'count':>7}{'p50 s':>9}{'p95 s':>9}{'prompt tok':>12}{'output tok':>12}{'errors':>8}")
+    for name, stats in summary["stages"].items():
+        log(f"  {name:<16}{stats['count']:>7}{stats['p50_s']:>9.2f}{stats['p95_s']:>9.2f}"
+            f"{stats['prompt_tokens']:>12}{stats['completion_tokens']:>12}{stats['errors']:>8}")
+    log(f"  Records appended to {METRICS_FILE}; summary written to {METRICS_PROM_FILE}")
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    texts = []
+    for jd_path in args.jd:
+        with open(jd_path, "r", encoding="utf-8", errors="ignore") as f:
+            texts.append(f.read())
+        if not texts[-1].strip():
+            log(f"Job description file is empty: {jd_path}")
+            return 2
+    # Roles are named after their JD files
+    jobs = dict(zip(role_names(args.jd), texts))
+    multi_role = len(jobs) > 1
+
+    resume_paths = collect_resume_paths(args.folder, recursive=args.recursive)
+    if not resume_paths:
+        log(f"No resume PDFs found in {args.folder}")
+        return 2
+
+    log(f"Found {len(resume_paths)} resume(s)" + (f" and {len(jobs)} roles" if multi_role else ""))
+    settings = {
+        "structured_output": args.structured,
+        "prompt_layout": args.prompt_layout,
+        "compact_resume": args.compact,
+        "models": {
+            "extract": args.extract_model,
+            "redflag": args.redflag_model,
+            "score": args.score_model,
+            "escalate": args.escalate_model,
+        },
+    }
+    if args.escalate_model:
+        settings["escalation"] = {"min_score": args.min_score, "margin": args.escalation_margin}
+    prefilter = None
+    if args.prefilter_top_k or args.prefilter_threshold:
+        prefilter = {"top_k": args.prefilter_top_k or None, "threshold": args.prefilter_threshold or None}
+
+    writer = ResultWriter(args.output, with_role=multi_role)
+    metrics = MetricsRecorder()
+
+    def report_progress(done, total, resume_path, role_results):
+        for role, result in role_results.items():
+            writer.write(result, role)
+        result = next(iter(role_results.values()))
+        note = " (stored)" if all(r.get("cached") for r in role_results.values()) else ""
+        if result.get("quarantine"):
+            note = f" — quarantined: {result['quarantine']}"
+        if result.get("duplicate_of"):
+            note = f" — duplicate of {result['duplicate_of']}"
+        if multi_role:
+            scores = "Scores: " + ", ".join(f"{role} {r['score']}" for role, r in role_results.items())
+        else:
+            scores = f"Score: {result['score']}"
+        log(f"[{done}/{total}] {os.path.basename(resume_path)} — {scores}{note}")
+
+    try:
+        results_by_role = screen_roles(
+            resume_paths,
+            jobs,
+            settings,
+            args.mode,
+            store=ResultStore(),
+            reuse_stored=not args.rescreen,
+            prefilter=prefilter,
+            dedupe_text=args.dedupe_text,
+            max_workers=args.concurrency,
+            timeout=args.timeout,
+            on_progress=report_progress,
+            on_status=log,
+            metrics=metrics,
+            checkpoint=args.checkpoint,
+            index=SkillIndex(),
+        )
+    except RuntimeError as ex:
+        log(str(ex))
+        return 1
+    finally:
+        writer.close()
+        metrics.finish()
+        metrics.export()
+
+    # Per-file outcomes (quarantine, duplicates) are the same for every role
+    scored = next(iter(results_by_role.values()))
+    reused = sum(1 for results in results_by_role.values() for result in results if result.get("cached"))
+    if reused:
+        log(f"Reused {reused} stored result(s)")
+    duplicates = sum(1 for result in scored if result.get("duplicate_of"))
+    if duplicates:
+        log(f"Skipped {duplicates} duplicate file(s); each shares the result of the copy that was screened")
+    quarantine = [result for result in scored if result.get("quarantine") and not result.get("duplicate_of")]
+    if quarantine:
+        log(f"Quarantined {len(quarantine)} file(s) that were not sent to the LLM:")
+        for result in quarantine:
+            log(f"  {result['resume_path']}: {result['quarantine']}")
+
+    compaction = compaction_summary(scored, args.mode, roles=len(jobs))
+    if compaction["resumes"]:
+        log(f"Resume compaction: ~{compaction['tokens_after']} of ~{compaction['tokens_before']} resume tokens sent, "
+            f"~{compaction['tokens_saved']} saved ({compaction['saved_pct']:.0f}%)")
+
+    escalated = sum(
+        1 for results in results_by_role.values() for result in results
+        if any(label == ESCALATED_LABEL for label, _ in result.get("details", []))
+    )
+    if escalated:
+        log(f"Escalated {escalated} near-threshold score(s) to {args.escalate_model}")
+
+    log_metrics(metrics.summary())
+
+    for role, results in results_by_role.items():
+        top = rank_results(results, args.min_score, args.top_n)
+        log(f"Top resumes for {role} (score >= {args.min_score}):" if multi_role
+            else f"Top resumes (score >= {args.min_score}):")
+        for rank, item in enumerate(top, start=1):
+            log(f"{rank:>3}. {item['score']:>3}  {item['resume_path']}")
+        if not top:
+            log("No resumes met the score threshold.")
+
+    if multi_role:
+        fits = sorted(best_fit(results_by_role).items(), key=lambda item: item[1][1], reverse=True)
+        log("Best-fit role per candidate:")
+        for resume_path, (role, score) in fits:
+            log(f"  {score:>3}  {role:<20}  {resume_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import os
+import re
+from collections import Counter
+
+# Resume compaction ahead of prompting: normalize whitespace, drop repeated
+# page headers/footers, split the resume into sections and give each agent
+# only the sections it needs, trimmed to a token budget.
+RESUME_COMPACTION = os.getenv("RESUME_COMPACTION", "1") not in ("0", "false", "no", "")
+
+# Rough tokens-per-character ratio for English resume text; close enough for
+# budgeting without loading a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Token budget per agent profile
+TOKEN_BUDGETS = {
+    "contact": int(os.getenv("RESUME_TOKEN_BUDGET_CONTACT", "400")),
+    "redflag": int(os.getenv("RESUME_TOKEN_BUDGET_REDFLAG", "1500")),
+    "recruiter": int(os.getenv("RESUME_TOKEN_BUDGET_RECRUITER", "3000")),
+    "fused": int(os.getenv("RESUME_TOKEN_BUDGET_FUSED", "3000")),
+}
+
+# Sections each agent profile needs, in priority order; sections not listed
+# (e.g. publications for the contact agent) are left out entirely. "intro" is
+# whatever comes between the contact lines and the first recognised heading,
+# which can be a whole experience or skills block under a heading we don't know.
+AGENT_SECTIONS = {
+    "contact": ["header", "intro"],
+    "redflag": ["header", "intro", "experience", "education", "skills", "other"],
+    "recruiter": ["intro", "summary", "skills", "experience", "education", "projects", "certifications", "other",
+                  "publications"],
+    "fused": ["header", "intro", "summary", "skills", "experience", "education", "projects", "certifications",
+              "other", "publications"],
+}
+
+SECTION_HEADINGS = {
+    "summary": ["summary", "profile", "objective", "about me", "professional summary", "career objective"],
+    "experience": ["experience", "work experience", "professional experience", "employment", "employment history",
+                   "work history", "career history", "internships", "internship"],
+    "education": ["education", "academic background", "academics", "qualifications", "academic qualifications"],
+    "skills": ["skills", "technical skills", "core competencies", "competencies", "technologies", "tools"],
+    "projects": ["projects", "academic projects", "personal projects", "key projects"],
+    "certifications": ["certifications", "certificates", "awards", "honors", "honours", "achievements",
+                       "courses", "training"],
+    "publications": ["publications", "research", "papers", "conference papers", "journal articles"],
+}
+_HEADING_LOOKUP = {alias: section for section, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+_PAGE_NUMBER = re.compile(r"^(page\s*)?\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+# Lines at the top/bottom of each page checked for repeated headers/footers
+_EDGE_LINES = 3
+# At most this many leading lines (up to the first blank line) are taken as
+# the contact header
+_HEADER_LINES = 6
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def normalize_whitespace(text: str) -> str:
+    lines = [_SPACES.sub(" ", line).strip() for line in text.splitlines()]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def strip_repeated_lines(pages):
+    # Removes page numbers and lines repeated at the top or bottom of most
+    # pages (running headers/footers); returns the cleaned page texts
+    page_lines = [normalize_whitespace(page).splitlines() for page in pages]
+    repeated = set()
+    if len(page_lines) >= 2:
+        counts = Counter()
+        for lines in page_lines:
+            edges = set(lines[:_EDGE_LINES] + lines[-_EDGE_LINES:])
+            counts.update(line for line in edges if line)
+        threshold = max(2, (len(page_lines) + 1) // 2)
+        repeated = {line for line, count in counts.items() if count >= threshold}
+    cleaned = []
+    for lines in page_lines:
+        kept = [line for line in lines if line not in repeated and not _PAGE_NUMBER.match(line)]
+        cleaned.append("\n".join(kept))
+    return cleaned
+
+
+def _heading_section(line: str):
+    candidate = line.strip().strip(":").strip().lower()
+    if not candidate or len(candidate) > 40:
+        return None
+    return _HEADING_LOOKUP.get(candidate)
+
+
+def split_sections(text: str) -> dict:
+    # The first few lines before any recognised heading are the "header"
+    # (name, contact) and the rest of that text is the "intro"; unrecognised
+    # content after a heading stays with that heading's section
+    sections = {}
+    current = "header"
+    for line in text.splitlines():
+        section = _heading_section(line)
+        if section is not None:
+            current = section
+        elif current == "header" and (len(sections.get("header", [])) >= _HEADER_LINES
+                                      or (not line and sections.get("header"))):
+            current = "intro"
+        sections.setdefault(current, []).append(line)
+    if set(sections) <= {"header", "intro"}:
+        # No headings found: treat the whole resume as one block
+        return {"other": text}
+    sections = {name: "\n".join(lines).strip() for name, lines in sections.items()}
+    return {name: text for name, text in sections.items() if text}
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[: cut if cut > 0 else max_chars]
+
+
+def fit_sections(sections: dict, profile: str, budget: int = None) -> str:
+    budget = TOKEN_BUDGETS[profile] if budget is None else budget
+    parts = []
+    remaining = budget
+    wanted = AGENT_SECTIONS[profile]
+    # A resume without headings is one "other" block; every profile gets it
+    names = ["other"] if list(sections) == ["other"] else wanted
+    for name in names:
+        text = sections.get(name)
+        if not text or remaining <= 0:
+            continue
+        piece = _truncate(text, remaining)
+        parts.append(piece)
+        remaining -= estimate_tokens(piece)
+    return "\n\n".join(parts)
+
+
+def compact_resume(pages, profiles=None) -> dict:
+    # Returns {"texts": {profile: text}, "stats": {...}} for the given pages
+    profiles = profiles or list(AGENT_SECTIONS)
+    original = " ".join(pages)
+    cleaned = normalize_whitespace("\n".join(strip_repeated_lines(pages)))
+    sections = split_sections(cleaned)
+    # Fall back to the start of the resume if a profile's sections are missing
+    texts = {
+        profile: fit_sections(sections, profile) or _truncate(cleaned, TOKEN_BUDGETS[profile])
+        for profile in profiles
+    }
+    original_tokens = estimate_tokens(original)
+    stats = {
+        "original_tokens": original_tokens,
+        "cleaned_tokens": estimate_tokens(cleaned),
+        "sections": sorted(sections),
+        "profile_tokens": {profile: estimate_tokens(text) for profile, text in texts.items()},
+    }
+    return {"texts": texts, "stats": stats}
+
+
+def budget_signature() -> str:
+    # Identifies the compaction settings, for keying stored results
+    return "compact2-" + "-".join(f"{TOKEN_BUDGETS[p]}" for p in sorted(TOKEN_BUDGETS))
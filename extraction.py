@@ -0,0 +1,270 @@
+import hashlib
+import json
+import os
+import time
+from collections import deque
+
+# On-disk cache for extracted resume text, keyed by the PDF's content hash so
+# renamed/moved files and re-runs against a new JD skip PDF parsing entirely.
+CACHE_DIR = os.getenv("RESUME_CACHE_DIR", ".cache")
+TEXT_CACHE_DIR = os.path.join(CACHE_DIR, "resume_text")
+
+# Parallel extraction: each PDF is parsed in its own child process (up to
+# EXTRACTION_WORKERS at a time) so a malformed or enormous file can be killed
+# after EXTRACTION_TIMEOUT seconds instead of stalling the whole batch. Only
+# the first MAX_PDF_PAGES pages are parsed; resumes rarely need more.
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "0")) or os.cpu_count() or 1
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "60"))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "20"))
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_upload(stream, name: str, upload_dir: str = "uploads") -> str:
+    # Streams an uploaded file to disk in chunks, hashing as it goes, and
+    # stores it as <upload_dir>/<hash prefix>/<name>. The same file uploaded
+    # twice lands on one path; different files with the same name don't clash.
+    os.makedirs(upload_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    tmp_path = os.path.join(upload_dir, f".upload-{os.getpid()}-{time.monotonic_ns()}.tmp")
+    with open(tmp_path, "wb") as f:
+        for chunk in iter(lambda: stream.read(1 << 20), b""):
+            digest.update(chunk)
+            f.write(chunk)
+    dest_dir = os.path.join(upload_dir, digest.hexdigest()[:16])
+    dest_path = os.path.join(dest_dir, os.path.basename(name))
+    if os.path.exists(dest_path):
+        os.remove(tmp_path)
+    else:
+        os.makedirs(dest_dir, exist_ok=True)
+        os.replace(tmp_path, dest_path)
+    return dest_path
+
+
+def _cache_path(content_hash: str) -> str:
+    return os.path.join(TEXT_CACHE_DIR, f"{content_hash}.json")
+
+
+def _read_cache(content_hash: str):
+    try:
+        with open(_cache_path(content_hash), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(content_hash: str, record: dict) -> None:
+    os.makedirs(TEXT_CACHE_DIR, exist_ok=True)
+    # Write to a temp file and rename so a crash never leaves a truncated entry
+    tmp_path = _cache_path(content_hash) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    os.replace(tmp_path, _cache_path(content_hash))
+
+
+def _read_pdf_pages(pdf_file: str, max_pages: int):
+    # Returns (page texts for the first max_pages pages, total page count)
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_file)
+    total_pages = len(reader.pages)
+    pages = [reader.pages[i].extract_text() for i in range(min(total_pages, max_pages))]
+    return pages, total_pages
+
+
+def _make_record(content_hash: str, pages, total_pages: int) -> dict:
+    return {
+        "resume_hash": content_hash,
+        "resume_text": " ".join(pages),
+        "pages": pages,
+        "page_count": len(pages),
+        "total_pages": total_pages,
+    }
+
+
+def _from_cache(content_hash: str, max_pages: int):
+    # A cached record is reused unless it was cut short by a lower page cap
+    # than the current one
+    record = _read_cache(content_hash)
+    if record is None:
+        return None
+    total_pages = record.get("total_pages", record["page_count"])
+    if record["page_count"] < min(total_pages, max_pages):
+        return None
+    if record["page_count"] > max_pages:
+        record = _make_record(content_hash, record["pages"][:max_pages], total_pages)
+    return record
+
+
+def cached_record(content_hash: str):
+    # The extraction record of a resume parsed before, or None
+    return _read_cache(content_hash)
+
+
+def quarantine_reason(record: dict):
+    # Why an extracted resume should not be sent to the LLM, or None
+    if not record["resume_text"].strip():
+        return "No extractable text (scanned or image-only PDF?)"
+    return None
+
+
+def extract_resume(pdf_file: str, use_cache: bool = True, max_pages: int = MAX_PDF_PAGES) -> dict:
+    content_hash = file_sha256(pdf_file)
+    if use_cache:
+        cached = _from_cache(content_hash, max_pages)
+        if cached is not None:
+            return cached
+
+    pages, total_pages = _read_pdf_pages(pdf_file, max_pages)
+    record = _make_record(content_hash, pages, total_pages)
+    if use_cache:
+        _write_cache(content_hash, record)
+    return record
+
+
+def _extraction_worker(conn) -> None:
+    # Child process loop: parses one PDF per request until the pipe closes.
+    # Replies ("ok", pages, total_pages) or ("error", message, 0).
+    while True:
+        try:
+            pdf_file, max_pages = conn.recv()
+        except EOFError:
+            return
+        try:
+            pages, total_pages = _read_pdf_pages(pdf_file, max_pages)
+            conn.send(("ok", pages, total_pages))
+        except Exception as ex:
+            conn.send(("error", f"{type(ex).__name__}: {ex}", 0))
+
+
+def _process_context():
+    import multiprocessing
+
+    # forkserver children start from a clean single-threaded server, which is
+    # safe to fork from inside Streamlit's threads
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(["pypdf"])
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def _start_worker(ctx):
+    conn, child_conn = ctx.Pipe()
+    process = ctx.Process(target=_extraction_worker, args=(child_conn,), daemon=True)
+    process.start()
+    child_conn.close()
+    return conn, process
+
+
+def _stop_worker(conn, process, kill: bool = False) -> None:
+    if kill:
+        process.kill()
+    conn.close()
+    process.join(timeout=None if kill else 5)
+    if process.is_alive():
+        process.kill()
+        process.join()
+
+
+def iter_extract(pdf_files, hashes=None, max_workers: int = EXTRACTION_WORKERS,
+                 timeout: float = EXTRACTION_TIMEOUT, max_pages: int = MAX_PDF_PAGES, use_cache: bool = True,
+                 on_parsed=None):
+    # Yields (pdf_file, record, None) for every parsed resume and
+    # (pdf_file, None, reason) for one that is quarantined (unreadable, failed
+    # to parse, timed out or has no text), in completion order. Cache hits are
+    # yielded straight away; the rest are parsed by a pool of worker processes,
+    # and a worker that exceeds the timeout is killed and replaced.
+    # hashes optionally maps pdf_file to an already computed content hash;
+    # on_parsed(pdf_file, seconds, error) is called for every file actually
+    # parsed (not for cache hits).
+    from multiprocessing.connection import wait
+
+    hashes = dict(hashes or {})
+    queued = deque(pdf_files)
+    idle = []
+    running = {}  # worker connection -> (process, pdf_file, content_hash, deadline, started)
+    ctx = None
+    try:
+        while queued or running:
+            while queued and len(running) < max(1, int(max_workers)):
+                pdf_file = queued.popleft()
+                content_hash = hashes.get(pdf_file)
+                if content_hash is None:
+                    try:
+                        content_hash = file_sha256(pdf_file)
+                    except OSError as ex:
+                        yield pdf_file, None, f"Unreadable file: {ex}"
+                        continue
+                cached = _from_cache(content_hash, max_pages) if use_cache else None
+                if cached is not None:
+                    reason = quarantine_reason(cached)
+                    yield pdf_file, None if reason else cached, reason
+                    continue
+                reused = bool(idle)
+                if reused:
+                    conn, process = idle.pop()
+                else:
+                    ctx = ctx or _process_context()
+                    conn, process = _start_worker(ctx)
+                try:
+                    conn.send((pdf_file, max_pages))
+                except OSError as ex:
+                    _stop_worker(conn, process, kill=True)
+                    if reused:
+                        # An idle worker that died before getting this file:
+                        # send the file again, to another or a fresh worker
+                        queued.appendleft(pdf_file)
+                        hashes[pdf_file] = content_hash
+                        continue
+                    yield pdf_file, None, f"Could not start a PDF parser: {ex}"
+                    continue
+                started = time.monotonic()
+                deadline = started + timeout if timeout else None
+                running[conn] = (process, pdf_file, content_hash, deadline, started)
+            if not running:
+                continue
+
+            deadlines = [entry[3] for entry in running.values() if entry[3] is not None]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            for conn in wait(list(running), timeout=wait_for):
+                process, pdf_file, content_hash, _, started = running.pop(conn)
+                try:
+                    status, payload, total_pages = conn.recv()
+                    idle.append((conn, process))
+                except (EOFError, OSError):
+                    # The worker died mid-parse (e.g. the parser crashed)
+                    _stop_worker(conn, process, kill=True)
+                    status, payload, total_pages = "error", "extraction process exited unexpectedly", 0
+                if on_parsed is not None:
+                    on_parsed(pdf_file, time.monotonic() - started, payload if status != "ok" else None)
+                if status != "ok":
+                    yield pdf_file, None, f"Could not parse PDF: {payload}"
+                    continue
+                record = _make_record(content_hash, payload, total_pages)
+                # Empty results are cached too, so a scanned PDF isn't re-parsed every run
+                if use_cache:
+                    _write_cache(content_hash, record)
+                reason = quarantine_reason(record)
+                yield pdf_file, None if reason else record, reason
+
+            now = time.monotonic()
+            for conn, (process, pdf_file, _, deadline, started) in list(running.items()):
+                if deadline is not None and now >= deadline:
+                    del running[conn]
+                    _stop_worker(conn, process, kill=True)
+                    if on_parsed is not None:
+                        on_parsed(pdf_file, now - started, "timed out")
+                    yield pdf_file, None, f"Parsing timed out after {timeout:g}s"
+    finally:
+        # Also reached when the consumer stops early: don't leave parsers running
+        for conn, (process, *_) in running.items():
+            _stop_worker(conn, process, kill=True)
+        for conn, process in idle:
+            _stop_worker(conn, process)
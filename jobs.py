@@ -0,0 +1,377 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+
+from extraction import CACHE_DIR
+from metrics import summarize
+
+# Persistent queue of screening jobs, so a large batch doesn't depend on a
+# Streamlit session: the app submits a job (a resume pool, one or more job
+# descriptions and the screening settings) and polls it, while worker
+# processes (worker.py) claim a few of its resumes at a time and write each
+# resume's results back as it finishes. A claim is a lease that the worker
+# renews while it runs; the resumes of a worker that dies go back to the
+# queue once the lease expires, up to MAX_ATTEMPTS times.
+JOBS_DB = os.getenv("JOBS_DB", os.path.join(CACHE_DIR, "jobs.sqlite3"))
+LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+MAX_ATTEMPTS = 3
+# A worker that hasn't checked in for this long is listed as inactive
+WORKER_TIMEOUT = 60.0
+# Whether the app submits jobs to the queue by default instead of screening
+# inside the Streamlit session (set JOB_QUEUE=1 where workers run next to the
+# app, as in docker-compose), and how often it polls them
+JOB_QUEUE = os.getenv("JOB_QUEUE", "0").lower() not in ("0", "false", "no", "")
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id       TEXT PRIMARY KEY,
+    created_at   REAL NOT NULL,
+    cancelled    INTEGER NOT NULL DEFAULT 0,
+    mode         TEXT NOT NULL,
+    roles        TEXT NOT NULL,
+    settings     TEXT NOT NULL,
+    reuse_stored INTEGER NOT NULL,
+    timeout      REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    job_id      TEXT NOT NULL,
+    position    INTEGER NOT NULL,
+    resume_path TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    worker_id   TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    results     TEXT,
+    partial     TEXT,
+    started_at  REAL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (job_id, resume_path)
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, job_id, position);
+CREATE TABLE IF NOT EXISTS job_metrics (
+    job_id      TEXT NOT NULL,
+    worker_id   TEXT NOT NULL,
+    started_at  REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    resumes     INTEGER NOT NULL,
+    records     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_metrics_job ON job_metrics (job_id);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id  TEXT PRIMARY KEY,
+    ollama_url TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    last_seen  REAL NOT NULL,
+    job_id     TEXT
+);
+"""
+
+# Task states; "failed" is a resume given up on after MAX_ATTEMPTS claims
+TASK_STATES = ("queued", "running", "done", "failed", "cancelled")
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _load_results(text: str) -> dict:
+    results = json.loads(text)
+    for result in results.values():
+        result["details"] = [tuple(d) for d in result.get("details", [])]
+    return results
+
+
+class JobQueue:
+    def __init__(self, path: str = JOBS_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            # Queues created before partial output and start times were kept
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(tasks)")]
+            if "partial" not in columns:
+                conn.execute("ALTER TABLE tasks ADD COLUMN partial TEXT")
+            if "started_at" not in columns:
+                conn.execute("ALTER TABLE tasks ADD COLUMN started_at REAL")
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _connect(self):
+        # Short-lived connections, as in ResultStore; BEGIN IMMEDIATE makes
+        # claiming atomic across worker processes
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    # ----- submitting and polling -----
+    def submit(self, resume_paths, jobs: dict, settings: dict = None, mode: str = "multi",
+               reuse_stored: bool = True, timeout: float = 600.0) -> str:
+        # jobs maps role name -> JD text, as for pipeline.screen_roles; paths
+        # are stored absolute, since workers needn't run from the app's directory
+        job_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, created_at, mode, roles, settings, reuse_stored, timeout) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, now, mode, json.dumps(jobs, ensure_ascii=False), json.dumps(settings or {}),
+                 int(reuse_stored), timeout),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (job_id, position, resume_path, status, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?)",
+                [(job_id, position, os.path.abspath(path), now) for position, path in enumerate(resume_paths)],
+            )
+        return job_id
+
+    def cancel(self, job_id: str) -> None:
+        # Queued resumes and claimed ones a worker hasn't started on are
+        # dropped; the ones being screened finish
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET cancelled = 1 WHERE job_id = ?", (job_id,))
+            conn.execute(
+                "UPDATE tasks SET status = 'cancelled', worker_id = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE job_id = ? AND (status = 'queued' OR (status = 'running' AND started_at IS NULL))",
+                (time.time(), job_id),
+            )
+
+    def cancelled(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancelled FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row is None or bool(row[0])
+
+    @staticmethod
+    def _job_row(row, counts: dict) -> dict:
+        job_id, created_at, cancelled, mode, roles, settings, reuse_stored, timeout = row
+        counts = {state: counts.get(state, 0) for state in TASK_STATES}
+        total = sum(counts.values())
+        finished = counts["done"] + counts["failed"] + counts["cancelled"]
+        if cancelled:
+            status = "cancelled" if counts["running"] == 0 else "cancelling"
+        elif finished == total:
+            status = "done"
+        elif counts["queued"] == total:
+            status = "queued"
+        else:
+            status = "running"
+        return {
+            "job_id": job_id,
+            "created_at": created_at,
+            "status": status,
+            "mode": mode,
+            "roles": json.loads(roles),
+            "settings": json.loads(settings),
+            "reuse_stored": bool(reuse_stored),
+            "timeout": timeout,
+            "total": total,
+            "counts": counts,
+        }
+
+    def _counts(self, conn, job_ids) -> dict:
+        counts = {job_id: {} for job_id in job_ids}
+        marks = ",".join("?" * len(job_ids))
+        for job_id, status, n in conn.execute(
+            f"SELECT job_id, status, COUNT(*) FROM tasks WHERE job_id IN ({marks}) GROUP BY job_id, status",
+            list(job_ids),
+        ):
+            counts[job_id][status] = n
+        return counts
+
+    def job(self, job_id: str):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            return self._job_row(row, self._counts(conn, [job_id])[job_id])
+
+    def recent_jobs(self, limit: int = 20):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+            counts = self._counts(conn, [row[0] for row in rows]) if rows else {}
+        return [self._job_row(row, counts[row[0]]) for row in rows]
+
+    def results(self, job_id: str) -> dict:
+        # {role: [result, ...]} for the resumes finished so far, in submission order
+        with self._connect() as conn:
+            roles = json.loads(conn.execute("SELECT roles FROM jobs WHERE job_id = ?", (job_id,)).fetchone()[0])
+            rows = conn.execute(
+                "SELECT results FROM tasks WHERE job_id = ? AND results IS NOT NULL ORDER BY position", (job_id,)
+            ).fetchall()
+        finished = [_load_results(row[0]) for row in rows]
+        return {role: [results[role] for results in finished] for role in roles}
+
+    def partials(self, job_id: str) -> dict:
+        # {resume path: (agent label, output so far)} for resumes being screened
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT resume_path, partial FROM tasks "
+                "WHERE job_id = ? AND status = 'running' AND partial IS NOT NULL ORDER BY position",
+                (job_id,),
+            ).fetchall()
+        return {resume_path: tuple(json.loads(partial)) for resume_path, partial in rows}
+
+    def metrics_summary(self, job_id: str):
+        # The pipeline metrics of every worker run on the job put together
+        # (as MetricsRecorder.summary), timed from the first run's start to
+        # the last one's end; None before any run has finished
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT started_at, finished_at, resumes, records FROM job_metrics WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        if not rows:
+            return None
+        records = [entry for row in rows for entry in json.loads(row[3])]
+        elapsed = max(row[1] for row in rows) - min(row[0] for row in rows)
+        return summarize(records, sum(row[2] for row in rows), elapsed, job_id)
+
+    # ----- workers -----
+    def claim(self, worker_id: str, limit: int, job_id: str = None):
+        # Leases up to limit resumes of the oldest job with work left (or of
+        # job_id), taking over expired leases. Returns (job, [resume paths])
+        # or None.
+        now = time.time()
+        with self._connect() as conn:
+            # Resumes whose workers died too often are given up on
+            for job_id, resume_path in conn.execute(
+                "SELECT job_id, resume_path FROM tasks "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                (now, MAX_ATTEMPTS),
+            ).fetchall():
+                self._give_up(conn, job_id, resume_path, now)
+            row = conn.execute(
+                "SELECT t.job_id FROM tasks t JOIN jobs j ON j.job_id = t.job_id "
+                "WHERE j.cancelled = 0 AND (t.status = 'queued' OR (t.status = 'running' AND t.lease_until < ?)) "
+                + ("AND t.job_id = ? " if job_id else "")
+                + "ORDER BY j.created_at, t.position LIMIT 1",
+                (now, job_id) if job_id else (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id = row[0]
+            paths = [r[0] for r in conn.execute(
+                "SELECT resume_path FROM tasks "
+                "WHERE job_id = ? AND (status = 'queued' OR (status = 'running' AND lease_until < ?)) "
+                "ORDER BY position LIMIT ?",
+                (job_id, now, limit),
+            )]
+            conn.executemany(
+                "UPDATE tasks SET status = 'running', worker_id = ?, lease_until = ?, attempts = attempts + 1, "
+                "started_at = NULL, updated_at = ? WHERE job_id = ? AND resume_path = ?",
+                [(worker_id, now + LEASE_SECONDS, now, job_id, path) for path in paths],
+            )
+            job = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            job = self._job_row(job, self._counts(conn, [job_id])[job_id])
+        return job, paths
+
+    @staticmethod
+    def _give_up(conn, job_id: str, resume_path: str, now: float) -> None:
+        error = f"Worker lost {MAX_ATTEMPTS} times while screening this resume"
+        roles = json.loads(conn.execute("SELECT roles FROM jobs WHERE job_id = ?", (job_id,)).fetchone()[0])
+        failed = {
+            "resume_path": resume_path,
+            "score": -1,
+            "details": [("Screening", f"Error screening resume: {error}")],
+            "errors": [f"Screening: {error}"],
+        }
+        conn.execute(
+            "UPDATE tasks SET status = 'failed', results = ?, updated_at = ? WHERE job_id = ? AND resume_path = ?",
+            (json.dumps(dict.fromkeys(roles, failed)), now, job_id, resume_path),
+        )
+
+    def renew(self, worker_id: str, job_id: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET lease_until = ? WHERE job_id = ? AND worker_id = ? AND status = 'running'",
+                (now + LEASE_SECONDS, job_id, worker_id),
+            )
+
+    def start(self, worker_id: str, job_id: str, resume_path: str) -> bool:
+        # Marks a claimed resume as being screened, so cancelling the job no
+        # longer drops it; False if the worker no longer holds it (e.g. the
+        # job was cancelled in the meantime)
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET started_at = ?, updated_at = ? "
+                "WHERE job_id = ? AND resume_path = ? AND worker_id = ? AND status = 'running'",
+                (now, now, job_id, resume_path, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def update_partial(self, job_id: str, resume_path: str, label: str, text: str) -> None:
+        # Latest streamed output of a resume being screened, for the app to show
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET partial = ? WHERE job_id = ? AND resume_path = ? AND status = 'running'",
+                (json.dumps([label, text], ensure_ascii=False), job_id, resume_path),
+            )
+
+    def complete(self, job_id: str, resume_path: str, results: dict) -> None:
+        # results maps role -> result, as reported by screen_roles
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = 'done', results = ?, partial = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE job_id = ? AND resume_path = ?",
+                (json.dumps(results, ensure_ascii=False), time.time(), job_id, resume_path),
+            )
+
+    def record_metrics(self, job_id: str, worker_id: str, started_at: float, records, resumes: int) -> None:
+        # Keeps a worker run's MetricsRecorder records for the job's summary
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO job_metrics (job_id, worker_id, started_at, finished_at, resumes, records) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, worker_id, started_at, time.time(), resumes, json.dumps(records)),
+            )
+
+    def release(self, worker_id: str, refund: bool = False) -> None:
+        # Hands a worker's unfinished resumes back to the queue; refund
+        # doesn't count the claim as an attempt (e.g. Ollama was unreachable),
+        # and neither does a claim the worker never started on
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = 'queued', worker_id = NULL, lease_until = NULL, partial = NULL, "
+                "started_at = NULL, updated_at = ?, "
+                + ("attempts = attempts - 1" if refund else "attempts = attempts - (started_at IS NULL)")
+                + " WHERE worker_id = ? AND status = 'running'",
+                (time.time(), worker_id),
+            )
+
+    def heartbeat(self, worker_id: str, ollama_url: str, job_id: str = None) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO workers (worker_id, ollama_url, started_at, last_seen, job_id) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(worker_id) DO UPDATE SET ollama_url = excluded.ollama_url, last_seen = excluded.last_seen, "
+                "job_id = excluded.job_id",
+                (worker_id, ollama_url, now, now, job_id),
+            )
+
+    def remove_worker(self, worker_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def active_workers(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT worker_id, ollama_url, job_id, last_seen FROM workers WHERE last_seen >= ? ORDER BY worker_id",
+                (time.time() - WORKER_TIMEOUT,),
+            ).fetchall()
+        return [dict(zip(("worker_id", "ollama_url", "job_id", "last_seen"), row)) for row in rows]
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import threading
+
+from extraction import CACHE_DIR
+
+# Checkpoints of screening runs, so a run cut short by a crash, an Ollama
+# restart or a Streamlit session reset picks up where it stopped. Every
+# finished resume is appended to a JSONL journal named after the run's
+# inputs (resume contents, job descriptions, model and settings); starting
+# the same run again replays the journal, even when re-screening, and only
+# screens what is missing. A run that completes removes its journal.
+RUNS_DIR = os.getenv("RUNS_DIR", os.path.join(CACHE_DIR, "runs"))
+
+
+def run_id(resume_hashes, keys: dict) -> str:
+    # keys maps role -> screening_key(...)
+    payload = json.dumps({"resumes": sorted(set(resume_hashes)), "roles": keys}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+class RunJournal:
+    def __init__(self, run_id: str, runs_dir: str = RUNS_DIR):
+        self.path = os.path.join(runs_dir, f"{run_id}.jsonl")
+        self.entries = {}  # (resume_hash, role) -> result
+        self._lock = threading.Lock()
+        self._stream = None
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut off by the crash; that resume is screened again
+                        continue
+                    result = entry["result"]
+                    result["details"] = [tuple(d) for d in result.get("details", [])]
+                    self.entries[(entry["resume_hash"], entry["role"])] = result
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, resume_hash: str, role: str):
+        result = self.entries.get((resume_hash, role))
+        return dict(result) if result is not None else None
+
+    def record(self, resume_hash: str, role: str, result: dict) -> None:
+        line = json.dumps({"resume_hash": resume_hash, "role": role, "result": result}, ensure_ascii=False)
+        with self._lock:
+            if self._stream is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._stream = open(self.path, "a", encoding="utf-8")
+            self._stream.write(line + "\n")
+            # On disk before the next resume starts, so a crash loses at most one
+            self._stream.flush()
+            os.fsync(self._stream.fileno())
+            self.entries[(resume_hash, role)] = result
+
+    def close(self) -> None:
+        with self._lock:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+
+    def complete(self) -> None:
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from extraction import CACHE_DIR
+
+# Per-batch instrumentation: wall time per pipeline stage (PDF parsing, queue
+# wait, JD preparation, each agent node), the token counts and Ollama timings
+# of every LLM call made inside a stage, and errors. A batch's records are
+# appended to METRICS_FILE (JSONL) and its summary is written to
+# METRICS_PROM_FILE in the Prometheus text format, e.g. for node_exporter's
+# textfile collector.
+METRICS_FILE = os.getenv("METRICS_FILE", os.path.join(CACHE_DIR, "metrics.jsonl"))
+METRICS_PROM_FILE = os.getenv("METRICS_PROM_FILE", os.path.join(CACHE_DIR, "metrics.prom"))
+
+# Stage currently running in this thread/context; LLM calls made inside it
+# add their token counts and durations to it
+_current_stage = ContextVar("metrics_stage", default=None)
+
+
+def record_llm_call(response) -> None:
+    # Adds an LLM response's usage to the running stage, if any. Ollama
+    # reports durations in nanoseconds; calls stopped early carry estimates
+    # (multi_agents._stream) and are counted separately as well.
+    stage = _current_stage.get()
+    if stage is None:
+        return
+    meta = getattr(response, "response_metadata", None) or {}
+    usage = getattr(response, "usage_metadata", None) or {}
+    stage["llm_calls"] += 1
+    stage["estimated_calls"] += 1 if meta.get("estimated") else 0
+    stage["prompt_tokens"] += meta.get("prompt_eval_count") or usage.get("input_tokens") or 0
+    stage["completion_tokens"] += meta.get("eval_count") or usage.get("output_tokens") or 0
+    stage["prompt_eval_s"] += (meta.get("prompt_eval_duration") or 0) / 1e9
+    stage["eval_s"] += (meta.get("eval_duration") or 0) / 1e9
+
+
+def _percentile(values, pct: float):
+    # Nearest-rank percentile of a non-empty list
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(records, resumes: int, elapsed: float, batch_id: str = None) -> dict:
+    # {"stages": {stage: {...}}, "resumes", "elapsed_s", "resumes_per_min"}
+    # for a batch's records, or for several batches' records put together
+    stages = {}
+    for entry in records:
+        stages.setdefault(entry["stage"], []).append(entry)
+    return {
+        "batch_id": batch_id,
+        "resumes": resumes,
+        "elapsed_s": elapsed,
+        "resumes_per_min": resumes / elapsed * 60 if elapsed > 0 else 0.0,
+        "stages": {
+            name: {
+                "count": len(entries),
+                "p50_s": _percentile([e["seconds"] for e in entries], 50),
+                "p95_s": _percentile([e["seconds"] for e in entries], 95),
+                "total_s": sum(e["seconds"] for e in entries),
+                "errors": sum(1 for e in entries if e["error"]),
+                "llm_calls": sum(e.get("llm_calls", 0) for e in entries),
+                "estimated_calls": sum(e.get("estimated_calls", 0) for e in entries),
+                "prompt_tokens": sum(e.get("prompt_tokens", 0) for e in entries),
+                "completion_tokens": sum(e.get("completion_tokens", 0) for e in entries),
+                "prompt_eval_s": sum(e.get("prompt_eval_s", 0.0) for e in entries),
+                "eval_s": sum(e.get("eval_s", 0.0) for e in entries),
+            }
+            for name, entries in stages.items()
+        },
+    }
+
+
+class MetricsRecorder:
+    # Collects the records of one screening batch; safe to use from the batch
+    # worker threads and the extraction feeder at the same time
+    def __init__(self):
+        self.batch_id = time.strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}"
+        self.started = time.monotonic()
+        self.finished = None
+        self.resumes = 0
+        self.records = []
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, resume_path: str = None, error: str = None, **extra) -> None:
+        entry = {"stage": stage, "seconds": seconds, "resume_path": resume_path, "error": error}
+        entry.update(extra)
+        with self._lock:
+            self.records.append(entry)
+
+    @contextmanager
+    def stage(self, name: str, resume_path: str = None):
+        # Times the block and collects the LLM calls made inside it; set
+        # stage["error"] to flag a failure the block handled itself
+        stage = {"llm_calls": 0, "estimated_calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                 "prompt_eval_s": 0.0, "eval_s": 0.0, "error": None}
+        token = _current_stage.set(stage)
+        start = time.perf_counter()
+        try:
+            yield stage
+        except Exception as ex:
+            stage["error"] = f"{type(ex).__name__}: {ex}"
+            raise
+        finally:
+            _current_stage.reset(token)
+            error = stage.pop("error")
+            self.record(name, time.perf_counter() - start, resume_path, error, **stage)
+
+    def resume_done(self) -> None:
+        with self._lock:
+            self.resumes += 1
+
+    def finish(self) -> None:
+        self.finished = time.monotonic()
+
+    def summary(self) -> dict:
+        with self._lock:
+            records = list(self.records)
+            resumes = self.resumes
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return summarize(records, resumes, elapsed, self.batch_id)
+
+    def write_jsonl(self, path: str = METRICS_FILE) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._lock:
+            records = list(self.records)
+        with open(path, "a", encoding="utf-8") as f:
+            for entry in records:
+                f.write(json.dumps({"batch_id": self.batch_id, **entry}, ensure_ascii=False) + "\n")
+
+    def write_prometheus(self, path: str = METRICS_PROM_FILE) -> None:
+        summary = self.summary()
+        lines = [
+            "# HELP resume_screening_stage_seconds Wall time per pipeline stage in the last batch.",
+            "# TYPE resume_screening_stage_seconds summary",
+        ]
+        for name, stats in summary["stages"].items():
+            lines += [
+                f'resume_screening_stage_seconds{{stage="{name}",quantile="0.5"}} {stats["p50_s"]:.6f}',
+                f'resume_screening_stage_seconds{{stage="{name}",quantile="0.95"}} {stats["p95_s"]:.6f}',
+                f'resume_screening_stage_seconds_sum{{stage="{name}"}} {stats["total_s"]:.6f}',
+                f'resume_screening_stage_seconds_count{{stage="{name}"}} {stats["count"]}',
+            ]
+        for metric, key, help_text in (
+            ("resume_screening_stage_errors", "errors", "Failed stage runs in the last batch."),
+            ("resume_screening_llm_calls", "llm_calls", "LLM calls per stage in the last batch."),
+            ("resume_screening_estimated_llm_calls", "estimated_calls",
+             "LLM calls stopped early, with estimated tokens and timings, per stage in the last batch."),
+            ("resume_screening_prompt_tokens", "prompt_tokens", "Prompt tokens evaluated per stage in the last batch."),
+            ("resume_screening_completion_tokens", "completion_tokens", "Tokens generated per stage in the last batch."),
+            ("resume_screening_prompt_eval_seconds", "prompt_eval_s", "Ollama prompt_eval_duration per stage in the last batch."),
+            ("resume_screening_eval_seconds", "eval_s", "Ollama eval_duration per stage in the last batch."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+            lines += [f'{metric}{{stage="{name}"}} {stats[key]:g}' for name, stats in summary["stages"].items()]
+        lines += [
+            "# HELP resume_screening_resumes_per_minute Resumes screened per minute in the last batch.",
+            "# TYPE resume_screening_resumes_per_minute gauge",
+            f"resume_screening_resumes_per_minute {summary['resumes_per_min']:.3f}",
+        ]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Written to a temp file and renamed so a scraper never reads half a file
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+    def export(self) -> None:
+        self.write_jsonl()
+        self.write_prometheus()
+
+
+def instrument_node(name: str, node):
+    # Wraps a LangGraph node so each run is timed as stage `name` on the
+    # recorder passed in the run config ({"configurable": {"metrics": ...}}).
+    # Agents report failures in their "errors" output rather than raising.
+    def instrumented(state, config):
+        recorder = (config or {}).get("configurable", {}).get("metrics")
+        if recorder is None:
+            return node(state)
+        with recorder.stage(name, state.get("resume_path")) as stage:
+            output = node(state)
+            if output.get("errors"):
+                stage["error"] = "; ".join(output["errors"])
+            return output
+
+    instrumented.__name__ = getattr(node, "__name__", name)
+    return instrumented
@@ -1,38 +1,53 @@
 import warnings
 warnings.filterwarnings("ignore")
 
+import hashlib
+import json
 import operator
 import os
-import requests
-from typing import Annotated, Literal, TypedDict, Sequence
-from langgraph.graph import END, START, StateGraph, MessagesState
-try:
-    # Preferred modern package
-    from langchain_ollama import ChatOllama as LCChatOllama
-except Exception:
-    # Fallback to community package if the new one isn't installed yet
-    from langchain_community.chat_models import ChatOllama as LCChatOllama
-    warnings.warn(
-        "Using ChatOllama from langchain_community. Install 'langchain-ollama' and switch to the new import.",
-        category=DeprecationWarning,
-        stacklevel=2,
-    )
-from langchain_core.messages import BaseMessage
-from langchain_community.embeddings import HuggingFaceInstructEmbeddings
-from langchain.text_splitter import CharacterTextSplitter
-from langchain.memory import ConversationBufferMemory
-from langchain_community.document_loaders import PyPDFLoader, WebBaseLoader
-from langchain_community.vectorstores import Chroma
-from langchain.chains import ConversationalRetrievalChain
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Annotated, TypedDict
 from dotenv import load_dotenv
+from compaction import estimate_tokens
+from extraction import CACHE_DIR, extract_resume
+from metrics import record_llm_call
+from scoring import sum_breakdown_clamped
+
+# Heavy dependencies (LangChain/Ollama client, requests) are imported on first
+# use and the Ollama health check runs when the first LLM client is created,
+# so importing this module, e.g. for a Streamlit cold start, stays cheap.
 
 load_dotenv()
 
 # Initialize local open-source LLM via Ollama
+# Bump when any agent prompt changes so stored results are not reused
+PROMPT_VERSION = "1"
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2")
 
+# Per-node model tiers: extraction (contact details, JD requirements) and red
+# flags can run on a small fast model and scoring on a larger one. With an
+# escalation model set, resumes whose score lands within ESCALATION_MARGIN
+# points of the ranking threshold are scored again on it (see
+# pipeline.needs_escalation). Each tier defaults to OLLAMA_MODEL; escalation
+# is off by default.
+MODEL_TIERS = ("extract", "redflag", "score", "escalate")
+NODE_MODELS = {
+    "extract": os.getenv("OLLAMA_EXTRACT_MODEL") or OLLAMA_MODEL,
+    "redflag": os.getenv("OLLAMA_REDFLAG_MODEL") or OLLAMA_MODEL,
+    "score": os.getenv("OLLAMA_SCORE_MODEL") or OLLAMA_MODEL,
+    "escalate": os.getenv("OLLAMA_ESCALATE_MODEL") or "",
+}
+ESCALATION_MARGIN = int(os.getenv("ESCALATION_MARGIN", "10"))
+
 def _ensure_ollama_available() -> None:
+    import requests
+
     try:
         resp = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=3)
         if resp.status_code != 200:
@@ -45,57 +60,382 @@ def _ensure_ollama_available() -> None:
             f"- Optional: export OLLAMA_MODEL (e.g., 'llama3', 'mistral', 'qwen2.5:7b')\n"
         ) from ex
 
-_ensure_ollama_available()
-llm = LCChatOllama(base_url=OLLAMA_BASE_URL, model=OLLAMA_MODEL)
+# Per-request HTTP timeout so a hung Ollama call can't pin a batch worker forever
+OLLAMA_REQUEST_TIMEOUT = os.getenv("OLLAMA_REQUEST_TIMEOUT")
+_client_kwargs = {"timeout": float(OLLAMA_REQUEST_TIMEOUT)} if OLLAMA_REQUEST_TIMEOUT else {}
+
+# Keep the model resident between resumes and pin the context size: a model
+# unloaded between calls, or reloaded because num_ctx changed, throws away
+# the prompt cache that the shared rubric/JD prefix relies on.
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))
+OLLAMA_TEMPERATURE = os.getenv("OLLAMA_TEMPERATURE")
+OLLAMA_SEED = os.getenv("OLLAMA_SEED")
+
+# Output-token cap per agent (Ollama's num_predict), so a small model that
+# rambles can't hold a resume for thousands of tokens; 0 means no cap. Every
+# answer is streamed and can also end early on a stop condition (see _stream).
+OUTPUT_TOKEN_BUDGETS = {
+    "contact": int(os.getenv("OUTPUT_TOKEN_BUDGET_CONTACT", "256")),
+    "jd": int(os.getenv("OUTPUT_TOKEN_BUDGET_JD", "512")),
+    "redflag": int(os.getenv("OUTPUT_TOKEN_BUDGET_REDFLAG", "512")),
+    "recruiter": int(os.getenv("OUTPUT_TOKEN_BUDGET_RECRUITER", "768")),
+    "fused": int(os.getenv("OUTPUT_TOKEN_BUDGET_FUSED", "1024")),
+}
+# A line repeated this many times means the model is looping; it is cut off
+REPEATED_LINE_LIMIT = 3
+
+
+def _model_options() -> dict:
+    options = {"keep_alive": OLLAMA_KEEP_ALIVE, "num_ctx": OLLAMA_NUM_CTX}
+    if OLLAMA_TEMPERATURE:
+        options["temperature"] = float(OLLAMA_TEMPERATURE)
+    if OLLAMA_SEED:
+        options["seed"] = int(OLLAMA_SEED)
+    return options
+
+
+def _chat_model_class():
+    try:
+        # Preferred modern package
+        from langchain_ollama import ChatOllama as LCChatOllama
+    except Exception:
+        # Fallback to community package if the new one isn't installed yet
+        from langchain_community.chat_models import ChatOllama as LCChatOllama
+        warnings.warn(
+            "Using ChatOllama from langchain_community. Install 'langchain-ollama' and switch to the new import.",
+            category=DeprecationWarning,
+            stacklevel=2,
+        )
+    return LCChatOllama
+
+
+# Only a successful probe is cached, so a server started after the app
+# is picked up on the next call instead of requiring a restart
+_ollama_available = False
+_llm_lock = threading.Lock()
+_llm_clients = {}  # (model, json_mode, num_predict) -> client
+_llm_overrides = {}  # json_mode -> client injected with set_llm
+
+
+def ensure_ollama_available() -> None:
+    global _ollama_available
+    if not _ollama_available:
+        _ensure_ollama_available()
+        _ollama_available = True
+
+
+def get_llm(json_mode: bool = False, model: str = None, num_predict: int = None):
+    # Chat clients are created on first use, one per model, output mode and
+    # output-token cap, and shared across threads
+    override = _llm_overrides.get(json_mode)
+    if override is not None:
+        return override
+    key = (model or OLLAMA_MODEL, json_mode, num_predict or None)
+    client = _llm_clients.get(key)
+    if client is not None:
+        return client
+    with _llm_lock:
+        if key not in _llm_clients:
+            ensure_ollama_available()
+            extra = {"format": "json"} if json_mode else {}
+            if num_predict:
+                extra["num_predict"] = num_predict
+            _llm_clients[key] = _chat_model_class()(
+                base_url=OLLAMA_BASE_URL, model=key[0], client_kwargs=_client_kwargs, **extra, **_model_options()
+            )
+        return _llm_clients[key]
+
+
+def set_llm(client, json_mode: bool = None) -> None:
+    # Replaces the chat client every agent uses, whatever its model (both
+    # output modes when json_mode is None), e.g. with a fake model for
+    # offline benchmarks. The Ollama health check is skipped from then on,
+    # since the injected client needs no server.
+    global _ollama_available
+    with _llm_lock:
+        for mode in ((False, True) if json_mode is None else (json_mode,)):
+            _llm_overrides[mode] = client
+        _ollama_available = True
+
+
+def node_models(models: dict = None) -> dict:
+    # The model of every tier, with the ones not in models from the environment
+    return {tier: (models or {}).get(tier) or NODE_MODELS[tier] for tier in MODEL_TIERS}
+
+
+# Transient LLM failures (server restarting or overloaded, dropped
+# connection) are retried with exponential backoff and jitter before the
+# agent reports an error
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "3"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "1.0"))
+LLM_RETRY_MAX_DELAY = 30.0
+
+
+def is_transient_error(ex: Exception) -> bool:
+    status = getattr(ex, "status_code", None)
+    if isinstance(status, int):
+        # ollama.ResponseError: 5xx and 429 are worth another try, 4xx
+        # (e.g. model not found) are not
+        return status >= 500 or status == 429
+    if isinstance(ex, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        import httpx
+        if isinstance(ex, httpx.TransportError):
+            return True
+    except ImportError:
+        pass
+    try:
+        import requests
+        if isinstance(ex, (requests.ConnectionError, requests.Timeout)):
+            return True
+    except ImportError:
+        pass
+    return False
+
+
+# Receives (agent label, output so far) while agents stream; see streaming_to
+_stream_listener = ContextVar("stream_listener", default=None)
+
+
+@contextmanager
+def streaming_to(listener):
+    # Relays every agent answer generated inside the block (on this thread,
+    # including the graph nodes it runs) to listener(label, text so far) as
+    # it streams in
+    token = _stream_listener.set(listener)
+    try:
+        yield
+    finally:
+        _stream_listener.reset(token)
+
+
+class StreamedResponse:
+    # The parts of an AIMessage the agents and metrics read
+    def __init__(self, content: str, response_metadata: dict = None, usage_metadata: dict = None):
+        self.content = content
+        self.response_metadata = response_metadata or {}
+        self.usage_metadata = usage_metadata
+
+    def __str__(self):
+        return self.content
+
+
+def _cut_repetition(text: str, repeated: str) -> str:
+    # The text up to the end of the first line that is the repeated line
+    offset = 0
+    for line in text.split("\n"):
+        if line.strip() == repeated:
+            return text[:offset + len(line)].rstrip()
+        offset += len(line) + 1
+    return text
+
+
+def _repeated_line(lines: dict, completed: str):
+    # Counts the completed lines of a streamed answer; returns the first one
+    # to come up REPEATED_LINE_LIMIT times, or None
+    for line in completed.split("\n"):
+        line = line.strip()
+        if len(line) >= 4:
+            lines[line] = lines.get(line, 0) + 1
+            if lines[line] >= REPEATED_LINE_LIMIT:
+                return line
+    return None
+
+
+def _stream(llm, prompt: str, label: str = None, stop_when=None) -> StreamedResponse:
+    # Streams one answer. Generation ends early, and the connection is
+    # closed so Ollama stops generating, once stop_when(text so far) returns
+    # where the answer ends or the model repeats a line REPEATED_LINE_LIMIT
+    # times; the text is cut there (a loop is kept once).
+    listener = _stream_listener.get() if label else None
+    text, chunks, line_start, lines = "", 0, 0, {}
+    metadata, usage, stopped = {}, None, None
+    started, first_token = time.perf_counter(), None
+    stream = llm.stream(prompt)
+    try:
+        for chunk in stream:
+            chunks += 1
+            metadata = getattr(chunk, "response_metadata", None) or metadata
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if not chunk.content:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter()
+            text += chunk.content
+            if listener is not None:
+                listener(label, text)
+            end = stop_when(text) if stop_when is not None else None
+            if end:
+                text, stopped = text[:end], "stop_condition"
+                break
+            if "\n" in chunk.content:
+                line_end = text.rfind("\n")
+                repeated = _repeated_line(lines, text[line_start:line_end])
+                if repeated is not None:
+                    text, stopped = _cut_repetition(text, repeated), "repetition"
+                    break
+                line_start = line_end + 1
+    finally:
+        stream.close()
+    if stopped is None:
+        return StreamedResponse(text, metadata, usage)
+    # Ollama sends its counts and timings in the final chunk, which a stream
+    # cut short never gets, so they are estimated and marked as such: the
+    # prompt from its length, one output token per chunk, the wait for the
+    # first token as prompt evaluation and the rest as generation
+    prompt_tokens = estimate_tokens(prompt)
+    metadata = dict(
+        metadata, done_reason=stopped, estimated=True, prompt_eval_count=prompt_tokens, eval_count=chunks,
+        prompt_eval_duration=int((first_token - started) * 1e9),
+        eval_duration=int((time.perf_counter() - first_token) * 1e9),
+    )
+    usage = {"input_tokens": prompt_tokens, "output_tokens": chunks, "total_tokens": prompt_tokens + chunks}
+    return StreamedResponse(text.rstrip(), metadata, usage)
+
+
+def _invoke(prompt: str, json_mode: bool = False, model: str = None, budget: str = None, label: str = None,
+            stop_when=None):
+    # Every agent call goes through here so its token counts and Ollama
+    # timings are attributed to the running pipeline stage. The answer is
+    # streamed, capped at OUTPUT_TOKEN_BUDGETS[budget] tokens and relayed to
+    # the streaming_to listener under label; stop_when(text so far) can end
+    # it early by returning where the answer ends.
+    num_predict = OUTPUT_TOKEN_BUDGETS.get(budget)
+    for attempt in range(LLM_RETRIES + 1):
+        try:
+            response = _stream(get_llm(json_mode, model, num_predict), prompt, label, stop_when)
+            break
+        except Exception as ex:
+            if attempt == LLM_RETRIES or not is_transient_error(ex):
+                raise
+            delay = min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BACKOFF * 2 ** attempt)
+            time.sleep(delay * random.uniform(0.5, 1.0))
+    record_llm_call(response)
+    return response
+
 
 # TypedDict for AgentState
 class AgentState(TypedDict):
-    messages: Annotated[Sequence[BaseMessage], operator.add]
+    # Agent outputs (plain strings), appended by each node
+    messages: Annotated[list, operator.add]
     # Additional state passed in by the app
     resume_path: str
     jd_text: str
-
+    # Computed once per job description by prepare_jd_requirements
+    jd_requirements: str
+    # Filled by the extraction stage before the graph runs
+    resume_hash: str
+    resume_text: str
+    page_count: int
+    # Compacted resume text per agent profile (see compaction.py)
+    resume_sections: dict
+    # Structured (JSON) recruiter scoring; the typed result lands in evaluation
+    structured_output: bool
+    evaluation: dict
+    # Recruiter prompt layout, one of PROMPT_LAYOUTS
+    prompt_layout: str
+    # Model per tier (MODEL_TIERS); missing tiers use NODE_MODELS
+    models: dict
+    # {"min_score": ..., "margin": ...}: re-score near-threshold resumes on
+    # the escalation model
+    escalation: dict
+    # Node failures, so callers can tell a real low score from a failed call
+    errors: Annotated[list, operator.add]
+
+
+def _node_model(agentState: AgentState, tier: str) -> str:
+    return (agentState.get('models') or {}).get(tier) or NODE_MODELS[tier]
+
+
+def _resume_text(agentState: AgentState, profile: str = None) -> str:
+    # Prefer the compacted sections for this agent, then the full text
+    # extracted ahead of the graph; fall back to parsing the PDF
+    sections = agentState.get('resume_sections') or {}
+    if profile in sections:
+        return sections[profile]
+    resume_text = agentState.get('resume_text')
+    if resume_text is None:
+        pdf_file = agentState.get('resume_path', "Resume.pdf")
+        resume_text = extract_resume(pdf_file)["resume_text"]
+    return resume_text
 
 
 # ----------------- Resume Name Agent -----------------
 def agent(agentState: AgentState):
     try:
-        pdf_file = agentState.get('resume_path', "Resume.pdf")
-        data = PyPDFLoader(pdf_file).load()
-        resume_text = " ".join([page.page_content for page in data])
-        response = llm.invoke(
+        resume_text = _resume_text(agentState, "contact")
+        response = _invoke(
             f"Your task is to extract the candidate name and contact details from the resume data. "
-            f"Only respond with the candidate name, contact details and nothing else. Resume Data: {resume_text}"
+            f"Only respond with the candidate name, contact details and nothing else. Resume Data: {resume_text}",
+            model=_node_model(agentState, "extract"),
+            budget="contact",
+            label="Resume_agent",
         )
         answer = response.content
     except Exception as ex:
         answer = f"Error extracting name: {ex}"
+        return {"messages": [answer], "errors": [f"Resume_agent: {ex}"]}
     return {"messages": [answer]}
 
 
-# ----------------- Job Description Agent -----------------
-def JD_agent(agentState: AgentState):
+# ----------------- Job Description Preprocessing -----------------
+# Requirements depend only on the JD and the model, so they are extracted once
+# per job description and memoized in memory and on disk instead of re-asking
+# the LLM for every resume in a batch.
+JD_CACHE_DIR = os.path.join(CACHE_DIR, "jd_requirements")
+_jd_requirements_memo = {}
+
+
+def jd_cache_key(jd_text: str, model: str = NODE_MODELS["extract"]) -> str:
+    return hashlib.sha256(f"{model}\0{jd_text}".encode("utf-8")).hexdigest()
+
+
+def prepare_jd_requirements(jd_text: str = None, model: str = NODE_MODELS["extract"]) -> str:
+    jd_data = jd_text
+    if not jd_data:
+        with open("JD.txt", "r") as f:
+            jd_data = f.read()
+
+    key = jd_cache_key(jd_data, model)
+    if key in _jd_requirements_memo:
+        return _jd_requirements_memo[key]
+
+    cache_path = os.path.join(JD_CACHE_DIR, f"{key}.json")
     try:
-        jd_data = agentState.get('jd_text')
-        if not jd_data:
-            with open("JD.txt", "r") as f:
-                jd_data = f.read()
-        response = llm.invoke(
+        with open(cache_path, "r", encoding="utf-8") as f:
+            result = json.load(f)["jd_requirements"]
+        _jd_requirements_memo[key] = result
+        return result
+    except (OSError, ValueError, KeyError):
+        pass
+
+    try:
+        response = _invoke(
             f"Your task is to extract the exact job requirements from the given data. "
-            f"Only respond with the job requirements and nothing else. Data: {jd_data}"
+            f"Only respond with the job requirements and nothing else. Data: {jd_data}",
+            model=model,
+            budget="jd",
         )
         result = response.content.replace("\n", "")
     except Exception as ex:
-        result = f"Error extracting job description: {ex}"
-    return {"messages": [result]}
+        # Don't memoize failures so the next batch retries
+        return f"Error extracting job description: {ex}"
+
+    _jd_requirements_memo[key] = result
+    os.makedirs(JD_CACHE_DIR, exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"model": model, "jd_requirements": result}, f)
+    os.replace(tmp_path, cache_path)
+    return result
 
 
 # ----------------- Red Flag Detection Agent -----------------
 def redflag_agent(agentState: AgentState):
     try:
-        pdf_file = agentState.get('resume_path', "Resume.pdf")
-        data = PyPDFLoader(pdf_file).load()
-        resume_text = " ".join([page.page_content for page in data])
+        resume_text = _resume_text(agentState, "redflag")
 
         prompt = f"""
         You are a Resume Screening Assistant.
@@ -118,26 +458,17 @@ def redflag_agent(agentState: AgentState):
         Resume Data: {resume_text}
         """
 
-        response = llm.invoke(prompt)
+        response = _invoke(prompt, model=_node_model(agentState, "redflag"), budget="redflag", label="Redflag_agent")
         result = response.content
     except Exception as ex:
         result = f"Error in redflag agent: {ex}"
+        return {"messages": [result], "errors": [f"Redflag_agent: {ex}"]}
     return {"messages": [result]}
 
 
 
 # ----------------- Recruit Agent (Evaluation) -----------------
-def recruit_agent(agentState: AgentState):
-    try:
-        pdf_file = agentState.get('resume_path', "Resume.pdf")
-        data = PyPDFLoader(pdf_file).load()
-        resume_text = " ".join([page.page_content for page in data])
-        messages = agentState['messages']
-        jd_data = agentState.get('jd_text')
-        if not jd_data:
-            jd_data = str(messages[-2]) + " " + str(messages[-1])
-
-        prompt = f"""
+RECRUITER_RUBRIC = """
         You are a Recruitment AI Assistant.
 
         Your task is to evaluate how well a candidate’s resume matches a given job description and assign a score out of 100 based on the criteria below.
@@ -159,12 +490,9 @@ def recruit_agent(agentState: AgentState):
         - Extract and compare the candidate’s **skills**, **experience**, **education**, and **additional qualifications** to the job description.
         - Apply the scoring rules strictly, especially for experience and education.
         - Do not award points for irrelevant experience.
+"""
 
-        After evaluation, return:
-        1. **Total score (out of 100)**
-        2. **Score breakdown by category** (e.g., Skills: 24/30, Experience: 32/50)
-        3. **A short summary** (3–4 lines) covering major strengths and missing areas.
-        4. **A final recommendation**, based on these rules:
+RECOMMENDATION_RULES = """
             - If the candidate scores **above 75** and meets the key job requirements:
                 - Say: **✅ I recommend this candidate for the job.**
             - If the candidate scores **between 50 and 75**, with partial matches in skills or experience:
@@ -173,7 +501,138 @@ def recruit_agent(agentState: AgentState):
             - If the candidate scores **below 50**:
                 - Say: **❌ I do not recommend this candidate for the job.**
                 - Follow with a reason based on the biggest gaps (skills, experience, or education).
+"""
+
+RECRUITER_TEXT_OUTPUT = """
+        After evaluation, return:
+        1. **Total score (out of 100)**
+        2. **Score breakdown by category** (e.g., Skills: 24/30, Experience: 32/50)
+        3. **A short summary** (3–4 lines) covering major strengths and missing areas.
+        4. **A final recommendation**, based on these rules:""" + RECOMMENDATION_RULES
+
+RECRUITER_JSON_OUTPUT = """
+        After evaluation, respond with ONLY a JSON object of this exact shape and nothing else:
+        {"skills": <integer 0-30>, "experience": <integer 0-50>, "education": <integer 0-10>, "extras": <integer 0-10>, "total": <integer 0-100>, "summary": "<3-4 lines on major strengths and missing areas>", "recommendation": "<final recommendation>"}
+
+        The recommendation must follow these rules:""" + RECOMMENDATION_RULES
 
+# Category caps from the rubric; structured scores are clamped to these numerically
+SCORE_CAPS = {"skills": 30, "experience": 50, "education": 10, "extras": 10}
+
+# "json" asks Ollama for JSON-mode output and skips the regex post-processing
+STRUCTURED_SCORING = os.getenv("RECRUITER_OUTPUT", "text").lower() == "json"
+
+# "jd-first" puts the rubric and job description ahead of the resume, so every
+# prompt in a batch shares one long prefix that Ollama can serve from its
+# prompt cache; "resume-first" is the original layout.
+PROMPT_LAYOUTS = ("resume-first", "jd-first")
+PROMPT_LAYOUT = os.getenv("PROMPT_LAYOUT", "resume-first").lower()
+
+
+def _clamp_int(value, cap: int) -> int:
+    try:
+        number = int(round(float(value)))
+    except (TypeError, ValueError):
+        number = 0
+    return max(0, min(number, cap))
+
+
+def parse_evaluation(text: str):
+    # Returns the typed evaluation dict, or None when the model's JSON is unusable
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict) or not all(k in data for k in SCORE_CAPS):
+        return None
+    evaluation = {k: _clamp_int(data.get(k), cap) for k, cap in SCORE_CAPS.items()}
+    # The total is always the sum of the clamped categories, never the model's own arithmetic
+    evaluation["total"] = sum(evaluation[k] for k in SCORE_CAPS)
+    evaluation["summary"] = str(data.get("summary") or "").strip()
+    evaluation["recommendation"] = str(data.get("recommendation") or "").strip()
+    return evaluation
+
+
+def json_complete(text: str):
+    # Stop condition for JSON answers: the end of the top-level object once
+    # it has been closed, else None (JSON mode can otherwise pad the answer
+    # with whitespace up to the cap)
+    if "}" not in text:
+        return None
+    depth, in_string, escaped = 0, False, False
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    return None
+
+
+_RECOMMENDATION = re.compile(r"I (do not |don't )?recommend this candidate", re.IGNORECASE)
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+_TOTAL_SCORE = re.compile(r"Total\s*Score[^\n:]*:\s*\d{1,3}", re.IGNORECASE)
+
+
+def recommendation_complete(text: str):
+    # Stop condition for the free-text recruiter answer: the end of the final
+    # recommendation (the last part asked for) once its paragraph has ended,
+    # else None. A negative verdict is followed by one more paragraph (the
+    # internship suggestion or the main gaps), so that is waited for too.
+    # The score must come before that point: a model that gives its verdict
+    # first is left to finish.
+    match = _RECOMMENDATION.search(text)
+    if match is None:
+        return None
+    breaks = list(_PARAGRAPH_BREAK.finditer(text, match.end()))
+    paragraphs = 2 if match.group(1) else 1
+    if len(breaks) < paragraphs:
+        return None
+    end = breaks[paragraphs - 1].start()
+    if _TOTAL_SCORE.search(text, 0, end) is None and sum_breakdown_clamped(text[:end]) is None:
+        return None
+    return end
+
+
+def format_evaluation(evaluation: dict) -> str:
+    # Render in the same layout as the free-text output so display and the
+    # regex helpers keep working on structured results
+    return (
+        f"Total Score: {evaluation['total']}/100\n"
+        f"Score Breakdown:\n"
+        f"- Skills: {evaluation['skills']}/30\n"
+        f"- Experience: {evaluation['experience']}/50\n"
+        f"- Education: {evaluation['education']}/10\n"
+        f"- Extras: {evaluation['extras']}/10\n"
+        f"Summary: {evaluation['summary']}\n"
+        f"Recommendation: {evaluation['recommendation']}"
+    )
+
+
+def build_recruiter_prompt(resume_text: str, jd_data: str, structured: bool = False, layout: str = PROMPT_LAYOUT,
+                           output_spec: str = None) -> str:
+    if output_spec is None:
+        output_spec = RECRUITER_JSON_OUTPUT if structured else RECRUITER_TEXT_OUTPUT
+    if layout == "jd-first":
+        # Static rubric + JD first, per-resume content last
+        return f"""{RECRUITER_RUBRIC}{output_spec}
+        Job Description:
+        {jd_data}
+
+        Resume Data:
+        {resume_text}
+        """
+    return f"""{RECRUITER_RUBRIC}{output_spec}
         Resume Data:
         {resume_text}
 
@@ -182,10 +641,110 @@ def recruit_agent(agentState: AgentState):
         """
 
 
-
-
-        response = llm.invoke(prompt)
-        answer = response.content
+def _score_resume(agentState: AgentState, tier: str, name: str, structured: bool = None):
+    try:
+        resume_text = _resume_text(agentState, "recruiter")
+        jd_data = agentState.get('jd_text') or agentState.get('jd_requirements')
+        if not jd_data:
+            jd_data = prepare_jd_requirements(model=_node_model(agentState, "extract"))
+        if structured is None:
+            structured = agentState.get('structured_output', STRUCTURED_SCORING)
+        layout = agentState.get('prompt_layout', PROMPT_LAYOUT)
+        prompt = build_recruiter_prompt(resume_text, jd_data, structured, layout)
+        model = _node_model(agentState, tier)
+
+        if structured:
+            response = _invoke(prompt, json_mode=True, model=model, budget="recruiter", label=name,
+                               stop_when=json_complete)
+            evaluation = parse_evaluation(response.content)
+            if evaluation is not None:
+                return {"messages": [format_evaluation(evaluation)], "evaluation": evaluation}
+            # Unusable JSON: hand the raw text to the regex fallback
+            answer = response.content
+        else:
+            response = _invoke(prompt, model=model, budget="recruiter", label=name,
+                               stop_when=recommendation_complete)
+            answer = response.content
     except Exception as ex:
         answer = f"Error in recruit agent: {ex}"
+        return {"messages": [answer], "errors": [f"{name}: {ex}"]}
     return {"messages": [answer]}
+
+
+def recruit_agent(agentState: AgentState):
+    return _score_resume(agentState, "score", "Recruiter_agent")
+
+
+# ----------------- Escalation Agent -----------------
+# The recruiter prompt again on the escalation model, for resumes the
+# scoring model put close to the ranking threshold
+def _escalate(agentState: AgentState, structured: bool = None):
+    output = _score_resume(agentState, "escalate", "Escalation_agent", structured)
+    if output.get("errors"):
+        # Keep the first score; the error still marks the result for a retry
+        return {"messages": [], "errors": output["errors"]}
+    return output
+
+
+def escalation_agent(agentState: AgentState):
+    return _escalate(agentState)
+
+
+def fused_escalation_agent(agentState: AgentState):
+    # Fused results are always structured (see pipeline.screening_key), so
+    # their escalation answers in JSON too and keeps an evaluation
+    return _escalate(agentState, structured=True)
+
+
+# ----------------- Fused Agent (contact + red flags + evaluation) -----------------
+# One structured call per resume instead of three, trading some prompt
+# specialization for sending the resume text to the model only once.
+FUSED_JSON_OUTPUT = """
+        In the same pass, also extract the candidate's name and contact details, and list any **red flags** or **concerns** a recruiter might have:
+        - Frequent job switching (e.g., jobs lasting <1 year repeatedly)
+        - Unexplained employment gaps
+        - Lack of relevant experience for technical claims
+        - Missing education details
+        - Irrelevant experience
+        - Spelling or grammar issues
+
+        After evaluation, respond with ONLY a JSON object of this exact shape and nothing else:
+        {"name": "<candidate name>", "contact": "<email, phone, location, links>", "red_flags": ["<clear point>", ...], "skills": <integer 0-30>, "experience": <integer 0-50>, "education": <integer 0-10>, "extras": <integer 0-10>, "total": <integer 0-100>, "summary": "<3-4 lines on major strengths and missing areas>", "recommendation": "<final recommendation>"}
+
+        The recommendation must follow these rules:""" + RECOMMENDATION_RULES
+
+
+def parse_fused_output(text: str):
+    # Returns (contact text, red flags text, evaluation) or None if unusable
+    evaluation = parse_evaluation(text)
+    if evaluation is None:
+        return None
+    data = json.loads(text)
+    contact = "\n".join(str(data.get(k) or "").strip() for k in ("name", "contact")).strip()
+    red_flags = data.get("red_flags") or []
+    if isinstance(red_flags, str):
+        red_flags = [red_flags]
+    red_flags_text = "\n".join(f"- {flag}" for flag in red_flags) or "No red flags found."
+    return contact, red_flags_text, evaluation
+
+
+def fused_agent(agentState: AgentState):
+    try:
+        resume_text = _resume_text(agentState, "fused")
+        jd_data = agentState.get('jd_text') or agentState.get('jd_requirements')
+        if not jd_data:
+            jd_data = prepare_jd_requirements(model=_node_model(agentState, "extract"))
+        layout = agentState.get('prompt_layout', PROMPT_LAYOUT)
+        prompt = build_recruiter_prompt(resume_text, jd_data, layout=layout, output_spec=FUSED_JSON_OUTPUT)
+
+        response = _invoke(prompt, json_mode=True, model=_node_model(agentState, "score"), budget="fused",
+                           label="Fused_agent", stop_when=json_complete)
+        parsed = parse_fused_output(response.content)
+        if parsed is None:
+            # Unusable JSON: only the evaluation can be salvaged, via the regex fallback
+            return {"messages": ["", "", response.content]}
+        contact, red_flags_text, evaluation = parsed
+        return {"messages": [contact, red_flags_text, format_evaluation(evaluation)], "evaluation": evaluation}
+    except Exception as ex:
+        answer = f"Error in fused agent: {ex}"
+        return {"messages": ["", "", answer], "errors": [f"Fused_agent: {ex}"]}
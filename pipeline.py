@@ -0,0 +1,868 @@
+import hashlib
+import heapq
+import os
+import re
+import threading
+import time
+
+from batch import SCREENING_CONCURRENCY, SCREENING_TIMEOUT, run_batch
+from compaction import RESUME_COMPACTION, budget_signature, compact_resume
+from extraction import cached_record, file_sha256, iter_extract
+from journal import RunJournal, run_id
+from metrics import instrument_node
+from multi_agents import (
+    ESCALATION_MARGIN,
+    PROMPT_LAYOUT,
+    PROMPT_VERSION,
+    STRUCTURED_SCORING,
+    AgentState,
+    agent,
+    ensure_ollama_available,
+    escalation_agent,
+    fused_agent,
+    fused_escalation_agent,
+    node_models,
+    prepare_jd_requirements,
+    recruit_agent,
+    redflag_agent,
+    streaming_to,
+)
+from prefilter import prefilter_resumes
+from scoring import normalize_recruiter_output, parse_total_score, sum_breakdown_clamped
+
+SYSTEM_MESSAGE = "You are a recruitment expert and your role is to match a candidate's profile with a given job description."
+
+
+# "multi" runs the specialised agents one after another; "fused" asks a
+# single structured call for contact details, red flags and the evaluation
+SCREENING_MODES = ("multi", "fused")
+SCREENING_MODE = os.getenv("SCREENING_MODE", "multi").lower()
+
+# The fused node's three messages stand in for these agents' outputs
+FUSED_LABELS = ("Resume_agent", "Redflag_agent", "Recruiter_agent")
+
+# Label of the scoring model's answer once a resume was escalated
+ESCALATED_LABEL = "Recruiter_agent (before escalation)"
+
+# Agents whose answer is worth showing while it streams in (see on_partial)
+SCORING_LABELS = ("Recruiter_agent", "Escalation_agent", "Fused_agent")
+
+# Multi-agent nodes whose output doesn't depend on the job description; with
+# several roles they run once per resume and only the recruiter repeats
+PROFILE_AGENTS = ("Resume_agent", "Redflag_agent")
+
+# Compaction profiles (one per LLM call that sees the resume) in each mode
+MODE_PROFILES = {"multi": ("contact", "redflag", "recruiter"), "fused": ("fused",)}
+
+# Byte-identical resumes are always screened once. With RESUME_DEDUPE_TEXT,
+# files whose text matches after normalisation (re-exported or re-saved
+# copies of one CV) are collapsed too; that needs every resume extracted
+# before screening starts.
+DEDUPE_TEXT = os.getenv("RESUME_DEDUPE_TEXT", "0") not in ("0", "false", "no", "")
+
+
+# ----------------- Workflow -----------------
+def needs_escalation(state) -> bool:
+    # Routes a scored resume to the escalation model when one is configured
+    # and its score is within the margin of the ranking threshold
+    escalation = state.get("escalation")
+    if not escalation or not node_models(state.get("models"))["escalate"]:
+        return False
+    evaluation = state.get("evaluation")
+    text = "" if evaluation is not None else normalize_recruiter_output(str(state["messages"][-1]))
+    score = recruiter_score(text, evaluation)
+    margin = escalation.get("margin", ESCALATION_MARGIN)
+    return score is not None and abs(score - escalation["min_score"]) <= margin
+
+
+def _finish_scoring(workflow, scorer: str, end, escalate=escalation_agent) -> None:
+    # scorer -> END, through the escalation agent for near-threshold scores
+    workflow.add_node("Escalation_agent", instrument_node("Escalation_agent", escalate))
+    workflow.add_conditional_edges(scorer, needs_escalation, {True: "Escalation_agent", False: end})
+    workflow.add_edge("Escalation_agent", end)
+
+
+def build_workflow(mode: str = SCREENING_MODE):
+    from langgraph.graph import END, StateGraph
+
+    if mode == "fused":
+        workflow = StateGraph(AgentState)
+        workflow.add_node("Fused_agent", instrument_node("Fused_agent", fused_agent))
+        workflow.set_entry_point("Fused_agent")
+        _finish_scoring(workflow, "Fused_agent", END, escalate=fused_escalation_agent)
+        return workflow.compile()
+
+    # JD requirements are prepared once per batch (prepare_jd_requirements),
+    # not per resume, so the graph only carries the resume-specific agents
+    workflow = StateGraph(AgentState)
+    workflow.add_node("Resume_agent", instrument_node("Resume_agent", agent))
+    workflow.add_node("Redflag_agent", instrument_node("Redflag_agent", redflag_agent))
+    workflow.add_node("Recruiter_agent", instrument_node("Recruiter_agent", recruit_agent))
+
+    workflow.set_entry_point("Resume_agent")
+
+    workflow.add_edge("Resume_agent", "Redflag_agent")
+    workflow.add_edge("Redflag_agent", "Recruiter_agent")
+    _finish_scoring(workflow, "Recruiter_agent", END)
+    return workflow.compile()
+
+
+def build_profile_workflow():
+    from langgraph.graph import END, StateGraph
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("Resume_agent", instrument_node("Resume_agent", agent))
+    workflow.add_node("Redflag_agent", instrument_node("Redflag_agent", redflag_agent))
+    workflow.set_entry_point("Resume_agent")
+    workflow.add_edge("Resume_agent", "Redflag_agent")
+    workflow.add_edge("Redflag_agent", END)
+    return workflow.compile()
+
+
+def build_scoring_workflow():
+    from langgraph.graph import END, StateGraph
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("Recruiter_agent", instrument_node("Recruiter_agent", recruit_agent))
+    workflow.set_entry_point("Recruiter_agent")
+    _finish_scoring(workflow, "Recruiter_agent", END)
+    return workflow.compile()
+
+
+# ----------------- Resume discovery -----------------
+def collect_resume_paths(folder_path: str, recursive: bool = False):
+    resume_paths = []
+    if not folder_path or not os.path.isdir(folder_path):
+        return resume_paths
+    if recursive:
+        for root, dirs, files in os.walk(folder_path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(".pdf"):
+                    resume_paths.append(os.path.join(root, name))
+    else:
+        for name in os.listdir(folder_path):
+            if name.lower().endswith(".pdf"):
+                resume_paths.append(os.path.join(folder_path, name))
+    return resume_paths
+
+
+# ----------------- Deduplication -----------------
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def text_fingerprint(text: str) -> str:
+    # Hash of the resume text ignoring case, whitespace and punctuation
+    return hashlib.sha256(_NON_WORD.sub(" ", text.lower()).strip().encode("utf-8")).hexdigest()
+
+
+def group_duplicates(resume_paths, keys: dict, duplicates: dict = None):
+    # Returns (first path per key, {first path: [later paths with that key]});
+    # pass the duplicates of an earlier pass to fold them into this one
+    duplicates = dict(duplicates or {})
+    first = {}
+    primaries = []
+    for resume_path in resume_paths:
+        key = keys[resume_path]
+        if key in first:
+            later = duplicates.pop(resume_path, [])
+            duplicates.setdefault(first[key], []).extend([resume_path] + later)
+        else:
+            first[key] = resume_path
+            primaries.append(resume_path)
+    return primaries, duplicates
+
+
+def duplicate_result(resume_path: str, result: dict) -> dict:
+    # Reuses the screened copy's result; Leaderboard leaves these out
+    duplicate = dict(result, resume_path=resume_path, duplicate_of=result["resume_path"])
+    duplicate.pop("cached", None)
+    return duplicate
+
+
+# ----------------- Per-resume screening -----------------
+def quarantined(resume_path: str, reason: str):
+    # Result for a file that never reaches the LLM (unreadable, unparsable,
+    # too slow to parse or without any text)
+    return {
+        "resume_path": resume_path,
+        "score": -1,
+        "details": [("Extraction", f"Quarantined: {reason}")],
+        "errors": [f"Extraction: {reason}"],
+        "quarantine": reason,
+    }
+
+
+def extract_resumes(resume_paths, on_progress=None):
+    # Returns ({path: extraction record}, [quarantined result dicts])
+    extracted = {}
+    failed = []
+    total = len(resume_paths)
+    for done, (resume_path, record, reason) in enumerate(iter_extract(resume_paths), start=1):
+        if reason is None:
+            extracted[resume_path] = record
+        else:
+            failed.append(quarantined(resume_path, reason))
+        if on_progress is not None:
+            on_progress(done, total, resume_path)
+    return extracted, failed
+
+
+def _resume_inputs(resume_path: str, resume: dict, settings: dict = None):
+    # Graph inputs shared by every agent for one resume; returns (inputs,
+    # compaction stats). settings carries per-run options into AgentState
+    # (e.g. structured_output).
+    inputs = {
+        "messages": [SYSTEM_MESSAGE],
+        "resume_path": resume_path,
+        "resume_hash": resume["resume_hash"],
+        "resume_text": resume["resume_text"],
+        "page_count": resume["page_count"],
+    }
+    inputs.update(settings or {})
+    compaction = None
+    if inputs.pop("compact_resume", RESUME_COMPACTION):
+        compacted = compact_resume(resume.get("pages") or [resume["resume_text"]])
+        inputs["resume_sections"] = compacted["texts"]
+        compaction = compacted["stats"]
+    return inputs, compaction
+
+
+def _run_graph(app, inputs: dict, metrics=None):
+    # Streams one graph run; returns ([(agent label, text)], evaluation, errors).
+    # With a MetricsRecorder every node run is timed on it.
+    config = {"configurable": {"metrics": metrics}} if metrics is not None else None
+    messages_collected = []
+    evaluation = None
+    errors = []
+    for output in app.stream(inputs, config):
+        for key, value in output.items():
+            errors.extend(value.get("errors", []))
+            messages = value.get("messages", [])
+            if key == "Escalation_agent":
+                if not messages:
+                    # Escalation failed; the first score stands
+                    continue
+                # The escalated answer becomes the recruiter output; the first
+                # one is kept for reference
+                messages_collected = [
+                    (ESCALATED_LABEL if label == "Recruiter_agent" else label, text)
+                    for label, text in messages_collected
+                ]
+                key = "Recruiter_agent"
+            if key in ("Recruiter_agent", "Fused_agent"):
+                # Structured output is already clamped numerically; only free text needs the regex pass
+                evaluation = value.get("evaluation")
+            for idx, msg in enumerate(messages):
+                label = FUSED_LABELS[idx] if key == "Fused_agent" else key
+                text_msg = str(msg)
+                if label == "Recruiter_agent" and evaluation is None:
+                    text_msg = normalize_recruiter_output(text_msg)
+                messages_collected.append((label, text_msg))
+    return messages_collected, evaluation, errors
+
+
+def recruiter_score(recruiter_text: str, evaluation: dict = None):
+    if evaluation is not None:
+        return evaluation["total"]
+    breakdown_sum = sum_breakdown_clamped(recruiter_text)
+    # Prefer clamped breakdown sum when available to avoid LLM inconsistencies
+    if breakdown_sum is not None:
+        return breakdown_sum
+    return parse_total_score(recruiter_text)
+
+
+def _screening_result(resume_path: str, details, evaluation, errors, compaction) -> dict:
+    # Prefer the last recruiter output as final; reconcile score using clamped breakdown
+    recruiter_output_texts = [text for label, text in details if label == "Recruiter_agent"]
+    recruiter_text = recruiter_output_texts[-1] if recruiter_output_texts else ""
+    score = recruiter_score(recruiter_text, evaluation)
+    return {
+        "resume_path": resume_path,
+        "score": score if score is not None else -1,
+        "details": details,
+        "evaluation": evaluation,
+        "errors": errors,
+        "compaction": compaction,
+    }
+
+
+def screen_resume(app, resume_path: str, resume: dict, jd_text: str, jd_requirements: str, settings: dict = None,
+                  metrics=None):
+    inputs, compaction = _resume_inputs(resume_path, resume, settings)
+    inputs.update(jd_text=jd_text, jd_requirements=jd_requirements)
+    details, evaluation, errors = _run_graph(app, inputs, metrics)
+    return _screening_result(resume_path, [("JD_agent", jd_requirements)] + details, evaluation, errors, compaction)
+
+
+def profile_details(result: dict):
+    # The role-independent agent outputs of a multi-agent result, or None
+    details = [(label, text) for label, text in result.get("details", []) if label in PROFILE_AGENTS]
+    return details if len(details) == len(PROFILE_AGENTS) and not result.get("errors") else None
+
+
+def screen_resume_roles(profile_app, scoring_app, resume_path: str, resume: dict, roles: dict,
+                        settings: dict = None, profile=None, metrics=None):
+    # Runs the role-independent agents once and only the recruiter agent per
+    # role; roles maps role name -> (jd_text, jd_requirements). profile can
+    # carry those agents' outputs from a stored result so they aren't asked
+    # again. Returns {role: result}, each shaped like screen_resume's.
+    inputs, compaction = _resume_inputs(resume_path, resume, settings)
+    profile_errors = []
+    if profile is None:
+        profile, _, profile_errors = _run_graph(profile_app, inputs, metrics)
+    results = {}
+    for role, (jd_text, jd_requirements) in roles.items():
+        details, evaluation, errors = _run_graph(
+            scoring_app, dict(inputs, jd_text=jd_text, jd_requirements=jd_requirements), metrics
+        )
+        results[role] = _screening_result(
+            resume_path, [("JD_agent", jd_requirements)] + profile + details,
+            evaluation, profile_errors + errors, compaction,
+        )
+    return results
+
+
+def screening_failed(resume_path: str, ex: Exception):
+    return {
+        "resume_path": resume_path,
+        "score": -1,
+        "details": [("Screening", f"Error screening resume: {ex}")],
+        "errors": [f"Screening: {ex}"],
+    }
+
+
+# ----------------- Result store integration -----------------
+def model_signature(settings: dict = None) -> str:
+    # The models behind a result: just the model name when every tier uses
+    # the same one and nothing is escalated, so existing stored results stay
+    # valid
+    settings = settings or {}
+    models = node_models(settings.get("models"))
+    escalation = settings.get("escalation") if models["escalate"] else None
+    if escalation is None and models["extract"] == models["redflag"] == models["score"]:
+        return models["score"]
+    signature = ",".join(f"{tier}={models[tier]}" for tier in ("extract", "redflag", "score"))
+    if escalation is not None:
+        margin = escalation.get("margin", ESCALATION_MARGIN)
+        signature += f",escalate={models['escalate']}@{escalation['min_score']}+-{margin}"
+    return signature
+
+
+def screening_key(jd_text: str, settings: dict = None, mode: str = SCREENING_MODE) -> dict:
+    # Everything besides the resume itself that identifies a stored result
+    settings = settings or {}
+    # Fused mode is always structured
+    structured = mode == "fused" or settings.get("structured_output", STRUCTURED_SCORING)
+    output_mode = "json" if structured else "text"
+    layout = settings.get("prompt_layout", PROMPT_LAYOUT)
+    resume_input = budget_signature() if settings.get("compact_resume", RESUME_COMPACTION) else "full"
+    return {
+        "jd_hash": hashlib.sha256(jd_text.encode("utf-8")).hexdigest(),
+        "model": model_signature(settings),
+        "prompt_version": f"{PROMPT_VERSION}-{mode}-{output_mode}-{layout}-{resume_input}",
+    }
+
+
+def compaction_summary(scored, mode: str = SCREENING_MODE, roles: int = 1) -> dict:
+    # Estimated resume tokens sent to the LLM with and without compaction;
+    # with several roles the scoring call repeats once per role
+    profiles = MODE_PROFILES.get(mode, MODE_PROFILES["multi"])
+    repeated = profiles[-1:] * (roles - 1)
+    before = after = resumes = 0
+    for result in scored:
+        stats = result.get("compaction")
+        if not stats or result.get("duplicate_of"):
+            continue
+        resumes += 1
+        before += stats["original_tokens"] * (len(profiles) + len(repeated))
+        after += sum(stats["profile_tokens"][p] for p in profiles + repeated)
+    saved = before - after
+    return {
+        "resumes": resumes,
+        "tokens_before": before,
+        "tokens_after": after,
+        "tokens_saved": saved,
+        "saved_pct": saved / before * 100 if before else 0.0,
+    }
+
+
+def split_cached(store, hashes: dict, resume_paths, key: dict):
+    # Returns (results already in the store, paths that still need screening);
+    # hashes maps each path to its resume content hash
+    cached, remaining = [], []
+    for resume_path in resume_paths:
+        result = store.get(hashes[resume_path], **key)
+        if result is None:
+            remaining.append(resume_path)
+        else:
+            result["resume_path"] = resume_path
+            result["cached"] = True
+            cached.append(result)
+    return cached, remaining
+
+
+def store_result(store, hashes: dict, result: dict, key: dict) -> None:
+    # Failed, skipped, duplicate or already stored resumes are not written,
+    # so the next run retries the failures
+    resume_hash = hashes.get(result["resume_path"])
+    if resume_hash is None or result.get("errors") or result.get("cached") or result.get("duplicate_of"):
+        return
+    store.put(resume_hash, result, **key)
+
+
+def screen_roles(resume_paths, jobs: dict, settings: dict = None, mode: str = SCREENING_MODE,
+                 store=None, reuse_stored: bool = True, prefilter: dict = None, dedupe_text: bool = DEDUPE_TEXT,
+                 max_workers: int = SCREENING_CONCURRENCY, timeout: float = SCREENING_TIMEOUT,
+                 on_progress=None, on_status=None, metrics=None, checkpoint: bool = False, index=None,
+                 on_partial=None):
+    # Screens a resume pool against one or more job descriptions (jobs maps
+    # role name -> JD text) and returns {role: [one result per path, in
+    # order]}. Each resume is parsed once; in multi mode with several roles
+    # its contact and red-flag agents also run once and only the recruiter
+    # repeats per role. Results that need no LLM call (stored, quarantined,
+    # pre-filtered) are reported first.
+    #
+    # Without the pre-filter, PDF parsing on the process pool feeds the LLM
+    # batch directly, so screening starts with the first parsed resume
+    # instead of after the whole folder; the pre-filter and text
+    # deduplication need every resume's text up front, so they extract
+    # first. Duplicates are screened once and reported with their copy.
+    #
+    # prefilter is None or {"top_k": ..., "threshold": ...}, applied per role.
+    # on_progress(done, total, resume_path, {role: result}) and
+    # on_status(message) run on the calling thread. Raises RuntimeError when
+    # resumes need screening (always, for an iterator) and Ollama is
+    # unreachable. A MetricsRecorder passed as metrics gets PDF parsing, queue
+    # wait, JD preparation and per-node timings; the caller exports it.
+    #
+    # With checkpoint, every finished resume is journaled (journal.py); if
+    # the same run was interrupted before, its journaled results are reused
+    # like stored ones, even when re-screening, and the journal is removed
+    # once the run completes.
+    #
+    # A SkillIndex passed as index gets every screened resume's text and
+    # agent outputs as it finishes, and reused results whose resume it
+    # doesn't have yet (their text comes from the extraction cache).
+    #
+    # on_partial(resume_path, agent label, text so far) gets each agent's
+    # answer while it streams in, at most about twice a second per resume
+    # and on the calling thread, e.g. to show the recruiter's output live.
+    #
+    # resume_paths may also be an iterator, e.g. resumes handed over by a job
+    # queue as screening slots free up: each path is hashed, looked up and
+    # parsed when it arrives, and on_progress gets the number of paths
+    # received so far as its total. The pre-filter, text deduplication and
+    # checkpoints need the whole pool up front, so they take a list.
+    from_iterator = not isinstance(resume_paths, (list, tuple))
+    if from_iterator and (prefilter or dedupe_text or checkpoint):
+        raise ValueError("prefilter, dedupe_text and checkpoint need a list of resume paths")
+    roles = list(jobs)
+    received = [] if from_iterator else list(resume_paths)
+    keys = {role: screening_key(jobs[role], settings, mode) for role in roles}
+    # Fused mode has no role-independent call to share
+    shared = mode == "multi" and len(roles) > 1
+    results = {}
+    resolved = {}  # path -> {role: result} known without screening
+    pending = {}  # path -> roles still to screen
+    duplicates = {}
+    # An iterator's copies are matched up on run_batch's feeder thread
+    results_lock = threading.Lock()
+
+    def report(resume_path, role_results):
+        role_results = {role: role_results[role] for role in roles}
+        with results_lock:
+            results[resume_path] = role_results
+            done = len(results)
+            later = list(duplicates.get(resume_path, []))
+        if on_progress is not None:
+            on_progress(done, len(received), resume_path, role_results)
+        for path in later:
+            item = {role: duplicate_result(path, result) for role, result in role_results.items()}
+            with results_lock:
+                results[path] = item
+                done = len(results)
+            if on_progress is not None:
+                on_progress(done, len(received), path, item)
+
+    def report_quarantined(resume_path, reason):
+        report(resume_path, dict.fromkeys(roles, quarantined(resume_path, reason)))
+
+    def status(message):
+        if on_status is not None:
+            on_status(message)
+
+    def update_index(resume_path, role_results, record=None):
+        if index is None:
+            return
+        resume_hash = hashes[resume_path]
+        if record is None:
+            if index.has(resume_hash):
+                return
+            record = cached_record(resume_hash)
+        index.add(resume_hash, resume_path, record["resume_text"] if record else None, role_results.values())
+
+    def parsed(pdf_file, seconds, error):
+        if metrics is not None:
+            metrics.record("PDF_extraction", seconds, pdf_file, error)
+
+    def lookup(resume_path):
+        # Reuses journaled and stored results role by role; returns the
+        # roles the resume still has to be screened for
+        known = resolved.setdefault(resume_path, {})
+        for role in roles:
+            if role in known:
+                continue
+            cached = None
+            if journal is not None:
+                cached = journal.get(hashes[resume_path], role)
+            if cached is None and store is not None and reuse_stored:
+                cached = store.get(hashes[resume_path], **keys[role])
+            if cached is not None:
+                cached.update(resume_path=resume_path, cached=True)
+                known[role] = cached
+        needed = [role for role in roles if role not in known]
+        if needed:
+            pending[resume_path] = needed
+        return needed
+
+    # Content hashes identify stored results before any PDF is parsed
+    hashes = {}
+    to_screen = []
+    journal = None
+    extracted = None
+    if not from_iterator:
+        for resume_path in received:
+            try:
+                hashes[resume_path] = file_sha256(resume_path)
+            except OSError as ex:
+                report_quarantined(resume_path, f"Unreadable file: {ex}")
+        to_screen, duplicates = group_duplicates([p for p in received if p in hashes], hashes)
+        journal = RunJournal(run_id(hashes.values(), keys)) if checkpoint else None
+        if journal is not None and len(journal):
+            status(f"Resuming an interrupted run: {len(journal)} result(s) already screened")
+
+        if (prefilter or dedupe_text) and to_screen:
+            status("Extracting resume text...")
+            extracted = {}
+            for resume_path, record, reason in iter_extract(to_screen, hashes, on_parsed=parsed):
+                if reason is None:
+                    extracted[resume_path] = record
+                else:
+                    report_quarantined(resume_path, reason)
+            to_screen = [p for p in to_screen if p in extracted]
+            if dedupe_text:
+                fingerprints = {p: text_fingerprint(extracted[p]["resume_text"]) for p in to_screen}
+                to_screen, duplicates = group_duplicates(to_screen, fingerprints, duplicates)
+            if prefilter:
+                status("Ranking resumes by embedding similarity...")
+                try:
+                    skipped_by_role = {}
+                    for role in roles:
+                        _, skipped = prefilter_resumes(jobs[role], {p: extracted[p] for p in to_screen}, **prefilter)
+                        for result in skipped:
+                            skipped_by_role.setdefault(result["resume_path"], {})[role] = result
+                    resolved.update(skipped_by_role)
+                except Exception as ex:
+                    status(f"Embedding pre-filter unavailable, screening all resumes: {ex}")
+
+        # A resume is only screened for the roles still missing
+        for resume_path in to_screen:
+            if not lookup(resume_path):
+                update_index(resume_path, resolved[resume_path])
+                report(resume_path, resolved[resume_path])
+        to_screen = [p for p in to_screen if p in pending]
+
+    if to_screen or from_iterator:
+        ensure_ollama_available()
+        status("Extracting job requirements...")
+        extract_model = node_models((settings or {}).get("models"))["extract"]
+        requirements = {}
+        for role in roles:
+            if metrics is None:
+                requirements[role] = prepare_jd_requirements(jobs[role], extract_model)
+                continue
+            with metrics.stage("JD_agent") as stage:
+                requirements[role] = prepare_jd_requirements(jobs[role], extract_model)
+                if requirements[role].startswith("Error extracting job description"):
+                    stage["error"] = requirements[role]
+        if shared:
+            profile_app, scoring_app = build_profile_workflow(), build_scoring_workflow()
+        else:
+            app = build_workflow(mode)
+
+        copy_of = {}  # streamed path -> the already reported path with its content
+
+        def arrivals():
+            # Runs on run_batch's feeder thread: a streamed copy of a resume
+            # still being screened is reported with it, and one whose results
+            # need no screening is passed on as it is
+            first = {}
+            for resume_path in resume_paths:
+                with results_lock:
+                    received.append(resume_path)
+                try:
+                    hashes[resume_path] = file_sha256(resume_path)
+                except OSError as ex:
+                    pending[resume_path] = roles
+                    yield resume_path, None, f"Unreadable file: {ex}", time.perf_counter()
+                    continue
+                original = first.setdefault(hashes[resume_path], resume_path)
+                if original != resume_path:
+                    with results_lock:
+                        if original not in results:
+                            duplicates.setdefault(original, []).append(resume_path)
+                            continue
+                    copy_of[resume_path] = original
+                    yield resume_path, None, None, time.perf_counter()
+                elif not lookup(resume_path):
+                    yield resume_path, None, None, time.perf_counter()
+                else:
+                    # One file at a time: the source only hands over a path
+                    # when a screening slot is free
+                    for item in iter_extract([resume_path], hashes, on_parsed=parsed):
+                        yield (*item, time.perf_counter())
+
+        # Each item carries the time it became ready, for the queue wait metric
+        if from_iterator:
+            items = arrivals()
+        elif extracted is not None:
+            queued_at = time.perf_counter()
+            items = [(p, extracted[p], None, queued_at) for p in to_screen]
+        else:
+            items = (
+                (p, record, reason, time.perf_counter())
+                for p, record, reason in iter_extract(to_screen, hashes, on_parsed=parsed)
+            )
+
+        # Latest streamed output per resume, handed to on_partial by tick()
+        streamed = {}
+        streamed_lock = threading.Lock()
+
+        def tick():
+            with streamed_lock:
+                updates = list(streamed.items())
+                streamed.clear()
+            for resume_path, (label, text) in updates:
+                on_partial(resume_path, label, text)
+
+        def screen(item):
+            resume_path = item[0]
+            if on_partial is None:
+                return screen_item(item)
+
+            def relay(label, text):
+                with streamed_lock:
+                    streamed[resume_path] = (label, text)
+
+            with streaming_to(relay):
+                return screen_item(item)
+
+        def screen_item(item):
+            resume_path, record, reason, queued_at = item
+            needed = pending.get(resume_path)
+            if not needed:
+                # A streamed copy, or a resume with all its results stored
+                return {}
+            if reason is not None:
+                return dict.fromkeys(needed, quarantined(resume_path, reason))
+            if metrics is not None:
+                metrics.record("Queue_wait", time.perf_counter() - queued_at, resume_path)
+            if not shared:
+                return {
+                    role: screen_resume(app, resume_path, record, jobs[role], requirements[role], settings, metrics)
+                    for role in needed
+                }
+            stored_profiles = (profile_details(result) for result in resolved[resume_path].values())
+            return screen_resume_roles(
+                profile_app, scoring_app, resume_path, record,
+                {role: (jobs[role], requirements[role]) for role in needed},
+                settings, next((p for p in stored_profiles if p), None), metrics,
+            )
+
+        def failed(item, ex):
+            return dict.fromkeys(pending.get(item[0], ()), screening_failed(item[0], ex))
+
+        def finished(done, received_count, item, role_results):
+            resume_path, record, reason, _ = item
+            with streamed_lock:
+                streamed.pop(resume_path, None)
+            if resume_path in copy_of:
+                original = results[copy_of[resume_path]]
+                report(resume_path, {role: duplicate_result(resume_path, r) for role, r in original.items()})
+                return
+            if metrics is not None and reason is None and role_results:
+                metrics.resume_done()
+            for role, result in role_results.items():
+                if store is not None:
+                    store_result(store, hashes, result, keys[role])
+                # Failures are left out so a resumed run retries them
+                if journal is not None and not (result.get("errors") or result.get("cached")):
+                    journal.record(hashes[resume_path], role, result)
+            known = resolved.get(resume_path, {})
+            if reason is None:
+                update_index(resume_path, {**known, **role_results}, record)
+            report(resume_path, {**known, **role_results})
+
+        status("Screening resumes...")
+        try:
+            run_batch(items, screen, failed, max_workers=max_workers, timeout=timeout, on_progress=finished,
+                      on_tick=tick if on_partial is not None else None)
+        finally:
+            if journal is not None:
+                journal.close()
+    if journal is not None:
+        journal.complete()
+    if metrics is not None:
+        metrics.finish()
+    return {role: [results[p][role] for p in received] for role in roles}
+
+
+def role_names(names):
+    # Role labels from JD file names ("backend.txt" -> "backend"), made unique
+    roles = []
+    for name in names:
+        base = os.path.splitext(os.path.basename(name))[0] or "JD"
+        role, n = base, 2
+        while role in roles:
+            role, n = f"{base} ({n})", n + 1
+        roles.append(role)
+    return roles
+
+
+# Role name used when screening against a single job description
+_SINGLE_ROLE = "JD"
+
+
+def run_screening(resume_paths, jd_text: str, settings: dict = None, mode: str = SCREENING_MODE,
+                  on_progress=None, **options):
+    # screen_roles for a single job description: returns one result per path,
+    # in order, and calls on_progress(done, total, result). Other options are
+    # passed through to screen_roles.
+    progress = None
+    if on_progress is not None:
+        def progress(done, total, resume_path, role_results):
+            on_progress(done, total, role_results[_SINGLE_ROLE])
+    return screen_roles(
+        resume_paths, {_SINGLE_ROLE: jd_text}, settings, mode, on_progress=progress, **options
+    )[_SINGLE_ROLE]
+
+
+def best_fit(results_by_role: dict) -> dict:
+    # {resume_path: (role, score)} with each screened candidate's highest
+    # scoring role; failed, skipped and duplicate entries are left out
+    best = {}
+    for role, results in results_by_role.items():
+        for result in results:
+            if result["score"] < 0 or result.get("duplicate_of"):
+                continue
+            current = best.get(result["resume_path"])
+            if current is None or result["score"] > current[1]:
+                best[result["resume_path"]] = (role, result["score"])
+    return best
+
+
+class Leaderboard:
+    # Bounded top-N by score, kept in a min-heap so each finished resume is an
+    # O(log N) update instead of re-sorting every result. Ties keep arrival
+    # order, matching a stable sort of the full list.
+    def __init__(self, top_n: int, min_score: int):
+        self.top_n = int(top_n)
+        self.min_score = min_score
+        self._heap = []
+        self._seq = 0
+
+    def add(self, result: dict) -> bool:
+        # Returns True when the top-N changed
+        score = result.get("score")
+        if score is None or score < self.min_score or self.top_n <= 0:
+            return False
+        # Guard: drop any entries with empty filenames (platform-specific edge cases)
+        if not os.path.basename(result["resume_path"]).strip():
+            return False
+        # A duplicate file is ranked once, under the copy that was screened
+        if result.get("duplicate_of"):
+            return False
+        entry = (score, -self._seq, result)
+        self._seq += 1
+        if len(self._heap) < self.top_n:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def top(self):
+        return [entry[2] for entry in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+
+def rank_results(scored, min_score: int, top_n: int):
+    board = Leaderboard(top_n, min_score)
+    for result in scored:
+        board.add(result)
+    return board.top()
+
+
+# ----------------- Mode agreement -----------------
+def _recommendation_band(score: int) -> str:
+    # Bands from the recruiter rubric's recommendation rules
+    if score > 75:
+        return "recommend"
+    if score >= 50:
+        return "entry-level"
+    return "reject"
+
+
+def _ranks(values):
+    # Average ranks (1-based) with ties sharing their mean rank
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def _spearman(a, b):
+    if len(a) < 2:
+        return None
+    ra, rb = _ranks(a), _ranks(b)
+    mean_a, mean_b = sum(ra) / len(ra), sum(rb) / len(rb)
+    cov = sum((x - mean_a) * (y - mean_b) for x, y in zip(ra, rb))
+    var_a = sum((x - mean_a) ** 2 for x in ra)
+    var_b = sum((y - mean_b) ** 2 for y in rb)
+    if not var_a or not var_b:
+        return None
+    return cov / (var_a * var_b) ** 0.5
+
+
+def mode_agreement(results_a, results_b, min_score: int = 85, top_n: int = 20) -> dict:
+    # Compares two screening runs over the same resumes (e.g. multi vs fused);
+    # resumes that failed in either run (score -1) are left out
+    scores_b = {r["resume_path"]: r["score"] for r in results_b}
+    pairs = [
+        (r["score"], scores_b[r["resume_path"]])
+        for r in results_a
+        if r["resume_path"] in scores_b and r["score"] >= 0 and scores_b[r["resume_path"]] >= 0
+    ]
+    if not pairs:
+        return {"compared": 0}
+    a, b = [p[0] for p in pairs], [p[1] for p in pairs]
+    diffs = [abs(x - y) for x, y in pairs]
+    top_a = {r["resume_path"] for r in rank_results(results_a, min_score, top_n)}
+    top_b = {r["resume_path"] for r in rank_results(results_b, min_score, top_n)}
+    return {
+        "compared": len(pairs),
+        "mean_abs_score_diff": sum(diffs) / len(diffs),
+        "max_abs_score_diff": max(diffs),
+        "recommendation_agreement": sum(_recommendation_band(x) == _recommendation_band(y) for x, y in pairs) / len(pairs),
+        "threshold_agreement": sum((x >= min_score) == (y >= min_score) for x, y in pairs) / len(pairs),
+        "spearman": _spearman(a, b),
+        "top_n_overlap": len(top_a & top_b) / max(len(top_a | top_b), 1),
+    }
@@ -0,0 +1,112 @@
+import hashlib
+import os
+
+from extraction import CACHE_DIR
+
+# Optional retrieval stage: rank resumes by embedding similarity to the JD and
+# only send the closest ones through the LLM agents. Embeddings are stored in a
+# persistent Chroma collection keyed by resume content hash, so a resume is
+# embedded once no matter how many job descriptions it is screened against.
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_INDEX_DIR = os.path.join(CACHE_DIR, "embeddings")
+EMBEDDING_CHUNK_SIZE = 1000
+EMBEDDING_CHUNK_OVERLAP = 100
+
+_model = None
+_collection = None
+
+
+def _get_model():
+    global _model
+    if _model is None:
+        from sentence_transformers import SentenceTransformer
+        _model = SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+    return _model
+
+
+def _get_collection():
+    global _collection
+    if _collection is None:
+        import chromadb
+        client = chromadb.PersistentClient(path=EMBEDDING_INDEX_DIR)
+        # One collection per embedding model so vectors are never mixed
+        model_tag = hashlib.sha256(EMBEDDING_MODEL.encode("utf-8")).hexdigest()[:16]
+        _collection = client.get_or_create_collection(
+            name=f"resumes-{model_tag}",
+            metadata={"hnsw:space": "cosine"},
+        )
+    return _collection
+
+
+def _embed_text(text: str):
+    import numpy as np
+    from langchain.text_splitter import CharacterTextSplitter
+
+    # The encoder truncates long inputs, so embed chunks and mean-pool them
+    splitter = CharacterTextSplitter(
+        separator=" ", chunk_size=EMBEDDING_CHUNK_SIZE, chunk_overlap=EMBEDDING_CHUNK_OVERLAP
+    )
+    chunks = splitter.split_text(text) or [text or " "]
+    vectors = _get_model().encode(chunks, normalize_embeddings=True)
+    pooled = np.mean(vectors, axis=0)
+    norm = np.linalg.norm(pooled)
+    return pooled / norm if norm else pooled
+
+
+def embed_resumes(extracted: dict) -> dict:
+    # Returns {resume_hash: vector}, embedding only hashes not already indexed
+    import numpy as np
+
+    collection = _get_collection()
+    hashes = list({resume["resume_hash"] for resume in extracted.values()})
+    vectors = {}
+    if hashes:
+        stored = collection.get(ids=hashes, include=["embeddings"])
+        for resume_hash, embedding in zip(stored["ids"], stored["embeddings"]):
+            vectors[resume_hash] = np.asarray(embedding)
+
+    new_ids, new_embeddings = [], []
+    for resume in extracted.values():
+        resume_hash = resume["resume_hash"]
+        if resume_hash in vectors:
+            continue
+        vectors[resume_hash] = _embed_text(resume["resume_text"])
+        new_ids.append(resume_hash)
+        new_embeddings.append(vectors[resume_hash].tolist())
+    if new_ids:
+        collection.upsert(ids=new_ids, embeddings=new_embeddings)
+    return vectors
+
+
+def rank_by_similarity(jd_text: str, extracted: dict):
+    # Returns [(resume_path, cosine similarity)] sorted best first
+    import numpy as np
+
+    vectors = embed_resumes(extracted)
+    jd_vector = _embed_text(jd_text)
+    ranked = [
+        (resume_path, float(np.dot(vectors[resume["resume_hash"]], jd_vector)))
+        for resume_path, resume in extracted.items()
+    ]
+    ranked.sort(key=lambda x: x[1], reverse=True)
+    return ranked
+
+
+def prefilter_resumes(jd_text: str, extracted: dict, top_k: int = None, threshold: float = None):
+    # Returns (paths to screen with the LLM, result dicts for skipped resumes)
+    ranked = rank_by_similarity(jd_text, extracted)
+    kept, skipped = [], []
+    for rank, (resume_path, similarity) in enumerate(ranked):
+        if top_k and rank >= top_k:
+            reason = f"outside the top {top_k} by similarity"
+        elif threshold is not None and similarity < threshold:
+            reason = f"below the similarity threshold {threshold:.2f}"
+        else:
+            kept.append(resume_path)
+            continue
+        skipped.append({
+            "resume_path": resume_path,
+            "score": -1,
+            "details": [("Prefilter", f"Skipped LLM screening: similarity {similarity:.3f} to the job description, {reason}.")],
+        })
+    return kept, skipped
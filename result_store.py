@@ -0,0 +1,83 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from extraction import CACHE_DIR
+
+# Screening results persisted across runs. A row is keyed by everything that
+# can change the LLM's answer: the resume content, the job description, the
+# model and the prompt version. Re-runs only screen resumes without a row.
+RESULTS_DB = os.getenv("RESULTS_DB", os.path.join(CACHE_DIR, "results.sqlite3"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    resume_hash    TEXT NOT NULL,
+    jd_hash        TEXT NOT NULL,
+    model          TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    resume_path    TEXT NOT NULL,
+    score          INTEGER NOT NULL,
+    details        TEXT NOT NULL,
+    evaluation     TEXT,
+    created_at     REAL NOT NULL,
+    PRIMARY KEY (resume_hash, jd_hash, model, prompt_version)
+)
+"""
+
+
+class ResultStore:
+    def __init__(self, path: str = RESULTS_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps the store usable from any
+        # thread (Streamlit reruns, batch callbacks) without sharing handles
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row_to_result(row) -> dict:
+        resume_path, score, details, evaluation = row
+        return {
+            "resume_path": resume_path,
+            "score": score,
+            "details": [tuple(d) for d in json.loads(details)],
+            "evaluation": json.loads(evaluation) if evaluation else None,
+        }
+
+    def get(self, resume_hash: str, jd_hash: str, model: str, prompt_version: str):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT resume_path, score, details, evaluation FROM results "
+                "WHERE resume_hash = ? AND jd_hash = ? AND model = ? AND prompt_version = ?",
+                (resume_hash, jd_hash, model, prompt_version),
+            ).fetchone()
+        return self._row_to_result(row) if row else None
+
+    def put(self, resume_hash: str, result: dict, jd_hash: str, model: str, prompt_version: str) -> None:
+        evaluation = result.get("evaluation")
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results "
+                "(resume_hash, jd_hash, model, prompt_version, resume_path, score, details, evaluation, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    resume_hash, jd_hash, model, prompt_version,
+                    result["resume_path"],
+                    result["score"],
+                    json.dumps(result["details"], ensure_ascii=False),
+                    json.dumps(evaluation, ensure_ascii=False) if evaluation is not None else None,
+                    time.time(),
+                ),
+            )
@@ -0,0 +1,220 @@
+import re
+
+# Parsing and clamping of the recruiter's free-text scores, shared by the
+# pipeline and by the streaming checks in multi_agents.py
+
+
+def _extract_first_int(pattern: str, s: str):
+    m = re.search(pattern, s, flags=re.IGNORECASE)
+    if not m:
+        return None
+    val = m.group(1)
+    try:
+        return int(val)
+    except Exception:
+        return None
+
+def parse_total_score(text: str):
+    if not isinstance(text, str):
+        return None
+    # 0) Prefer summing simple category breakdown if present; clamp per category to cap
+    try:
+        skills = _extract_first_int(r"Skills[^\n:]*:\s*(\d{1,3})", text)
+        if skills is None:
+            skills = _extract_first_int(r"Skills\s*Match[^\n:]*:\s*(\d{1,3})", text)
+
+        experience = _extract_first_int(r"Experience[^\n:]*:\s*(\d{1,3})", text)
+        if experience is None:
+            experience = _extract_first_int(r"Experience\s*Match[^\n:]*:\s*(\d{1,3})", text)
+
+        education = _extract_first_int(r"Education[^\n:]*:\s*(\d{1,3})", text)
+        if education is None:
+            education = _extract_first_int(r"Education\s*Match[^\n:]*:\s*(\d{1,3})", text)
+
+        extras = _extract_first_int(r"Extras[^\n:]*:\s*(\d{1,3})", text)
+        if extras is None:
+            extras = _extract_first_int(r"Certifications[^\n:]*:\s*(\d{1,3})", text)
+        if extras is None:
+            extras = _extract_first_int(r"Certifications\s*Match[^\n:]*:\s*(\d{1,3})", text)
+        if extras is None:
+            extras = _extract_first_int(r"Awards[^\n:]*:\s*(\d{1,3})", text)
+        if extras is None:
+            extras = _extract_first_int(r"Side\s*Projects[^\n:]*:\s*(\d{1,3})", text)
+
+        parts = [v for v in [skills, experience, education, extras] if v is not None]
+        if len(parts) >= 3:
+            # clamp each category to its cap before summing
+            s_val = min(skills if skills is not None else 0, 30)
+            e_val = min(experience if experience is not None else 0, 50)
+            ed_val = min(education if education is not None else 0, 10)
+            ex_val = min(extras if extras is not None else 0, 10)
+            total_breakdown = s_val + e_val + ed_val + ex_val
+            if 0 <= total_breakdown <= 100:
+                return total_breakdown
+    except Exception:
+        pass
+    # 1) Prefer explicit Total Score line, take the number after colon if within 0..100
+    m = re.search(r"Total\s*Score[^\n:]*:\s*(\d{1,3})(?:\s*/\s*(\d{1,3}))?", text, flags=re.IGNORECASE)
+    if m:
+        try:
+            val = int(m.group(1))
+            if 0 <= val <= 100:
+                return val
+        except Exception:
+            pass
+    # 2) Prefer numerator when denominator is 100
+    m = re.search(r"(\d{1,3})\s*/\s*100", text)
+    if m:
+        try:
+            val = int(m.group(1))
+            if 0 <= val <= 100:
+                return val
+        except Exception:
+            pass
+    # 3) Handle phrasing like "85 out of 100"
+    m = re.search(r"(\d{1,3})\s*out\s*of\s*100", text, flags=re.IGNORECASE)
+    if m:
+        try:
+            val = int(m.group(1))
+            if 0 <= val <= 100:
+                return val
+        except Exception:
+            pass
+    # 4) Fallback: choose largest plausible integer < 100; avoid denominators and stray 100s
+    candidates = []
+    for match in re.finditer(r"\b(\d{1,3})\b", text):
+        num = int(match.group(1))
+        if num > 100:
+            continue
+        start = max(0, match.start() - 20)
+        end = min(len(text), match.end() + 20)
+        context = text[start:end].lower()
+        if ("out of" in context) or ("/100" in context):
+            continue
+        # Avoid picking 100 in fallback unless clearly marked as total score nearby
+        if num == 100 and ("total score" not in context and "score:" not in context):
+            continue
+        candidates.append(num)
+    if candidates:
+        return max(candidates)
+    return None
+
+def normalize_recruiter_output(text: str):
+    if not isinstance(text, str) or not text:
+        return text
+    caps = {
+        "Skills": 30,
+        "Skills Match": 30,
+        "Experience": 50,
+        "Experience Match": 50,
+        "Education": 10,
+        "Education Match": 10,
+        "Extras": 10,
+        "Certifications": 10,
+        "Certifications Match": 10,
+        "Awards": 10,
+        "Side Projects": 10,
+    }
+
+    normalized = text
+
+    def _cap_num(num: int, cap: int, den: int = None):
+        val = min(num, cap)
+        if den is not None:
+            val = min(val, den)
+        return val
+
+    # Cap (NN points), ": NN points", and "NN/YY" for each label
+    for label, cap in caps.items():
+        # (NN points)
+        normalized = re.sub(
+            rf"({re.escape(label)}[^\n]*?\()(\d{{1,3}})(\s*points?\))",
+            lambda m: f"{m.group(1)}{_cap_num(int(m.group(2)), cap)}{m.group(3)}",
+            normalized,
+            flags=re.IGNORECASE,
+        )
+        # : NN points
+        normalized = re.sub(
+            rf"({re.escape(label)}[^\n:]*:\s*)(\d{{1,3}})(\s*points?)",
+            lambda m: f"{m.group(1)}{_cap_num(int(m.group(2)), cap)}{m.group(3)}",
+            normalized,
+            flags=re.IGNORECASE,
+        )
+        # NN/YY
+        normalized = re.sub(
+            rf"({re.escape(label)}[^\n]*?)(\d{{1,3}})\s*/\s*(\d{{1,3}})",
+            lambda m: f"{m.group(1)}{_cap_num(int(m.group(2)), cap, int(m.group(3)))}/{m.group(3)}",
+            normalized,
+            flags=re.IGNORECASE,
+        )
+
+    # Recompute clamped total and update Total Score line if present
+    s_val = _extract_first_int(r"Skills[^\n:]*:\s*(\d{1,3})", normalized) or _extract_first_int(r"Skills\s*Match[^\n:]*:\s*(\d{1,3})", normalized) or 0
+    e_val = _extract_first_int(r"Experience[^\n:]*:\s*(\d{1,3})", normalized) or _extract_first_int(r"Experience\s*Match[^\n:]*:\s*(\d{1,3})", normalized) or 0
+    ed_val = _extract_first_int(r"Education[^\n:]*:\s*(\d{1,3})", normalized) or _extract_first_int(r"Education\s*Match[^\n:]*:\s*(\d{1,3})", normalized) or 0
+    ex_val = (
+        _extract_first_int(r"Extras[^\n:]*:\s*(\d{1,3})", normalized)
+        or _extract_first_int(r"Certifications[^\n:]*:\s*(\d{1,3})", normalized)
+        or _extract_first_int(r"Certifications\s*Match[^\n:]*:\s*(\d{1,3})", normalized)
+        or _extract_first_int(r"Awards[^\n:]*:\s*(\d{1,3})", normalized)
+        or _extract_first_int(r"Side\s*Projects[^\n:]*:\s*(\d{1,3})", normalized)
+        or 0
+    )
+    # clamp again to be safe
+    s_val = min(s_val, 30)
+    e_val = min(e_val, 50)
+    ed_val = min(ed_val, 10)
+    ex_val = min(ex_val, 10)
+    total = s_val + e_val + ed_val + ex_val
+    total = max(0, min(total, 100))
+
+    # Update Total Score in common formats
+    # 1) Total Score: NN/100
+    if re.search(r"Total\s*Score[^\n:]*:\s*\d{1,3}\s*/\s*100", normalized, flags=re.IGNORECASE):
+        normalized = re.sub(
+            r"(Total\s*Score[^\n:]*:\s*)(\d{1,3})(\s*/\s*100)",
+            lambda m: f"{m.group(1)}{total}{m.group(3)}",
+            normalized,
+            flags=re.IGNORECASE,
+        )
+    # 2) Total Score: NN out of 100
+    if re.search(r"Total\s*Score[^\n:]*:\s*\d{1,3}\s*out\s*of\s*100", normalized, flags=re.IGNORECASE):
+        normalized = re.sub(
+            r"(Total\s*Score[^\n:]*:\s*)(\d{1,3})(\s*out\s*of\s*100)",
+            lambda m: f"{m.group(1)}{total}{m.group(3)}",
+            normalized,
+            flags=re.IGNORECASE,
+        )
+    # 3) Total Score: NN    (case-insensitive; also handle 'Total score' lowercased)
+    if re.search(r"Total\s*Score[^\n:]*:\s*\d{1,3}(?![^\n]*?/\s*100)(?![^\n]*?out\s*of\s*100)", normalized, flags=re.IGNORECASE):
+        normalized = re.sub(
+            r"(Total\s*Score[^\n:]*:\s*)(\d{1,3})(?![^\n]*?/\s*100)(?![^\n]*?out\s*of\s*100)",
+            lambda m: f"{m.group(1)}{total}",
+            normalized,
+            flags=re.IGNORECASE,
+        )
+
+    return normalized
+
+def sum_breakdown_clamped(text: str):
+    if not isinstance(text, str) or not text:
+        return None
+    skills = _extract_first_int(r"Skills[^\n:]*:\s*(\d{1,3})", text) or _extract_first_int(r"Skills\s*Match[^\n:]*:\s*(\d{1,3})", text)
+    experience = _extract_first_int(r"Experience[^\n:]*:\s*(\d{1,3})", text) or _extract_first_int(r"Experience\s*Match[^\n:]*:\s*(\d{1,3})", text)
+    education = _extract_first_int(r"Education[^\n:]*:\s*(\d{1,3})", text) or _extract_first_int(r"Education\s*Match[^\n:]*:\s*(\d{1,3})", text)
+    extras = (
+        _extract_first_int(r"Extras[^\n:]*:\s*(\d{1,3})", text)
+        or _extract_first_int(r"Certifications[^\n:]*:\s*(\d{1,3})", text)
+        or _extract_first_int(r"Certifications\s*Match[^\n:]*:\s*(\d{1,3})", text)
+        or _extract_first_int(r"Awards[^\n:]*:\s*(\d{1,3})", text)
+        or _extract_first_int(r"Side\s*Projects[^\n:]*:\s*(\d{1,3})", text)
+    )
+    parts_present = [v for v in [skills, experience, education, extras] if v is not None]
+    if len(parts_present) < 3:
+        return None
+    s_val = min(skills or 0, 30)
+    e_val = min(experience or 0, 50)
+    ed_val = min(education or 0, 10)
+    ex_val = min(extras or 0, 10)
+    total = s_val + e_val + ed_val + ex_val
+    return max(0, min(total, 100))
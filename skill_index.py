@@ -0,0 +1,383 @@
+import math
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from extraction import CACHE_DIR
+
+# Inverted index of skills and terms over every resume screened so far, so
+# questions like "who mentions PyTorch and Kubernetes?" are answered from
+# disk in milliseconds instead of by another LLM run. Each resume's
+# extracted text and its agents' outputs are split into normalised terms
+# (lowercased words and two-word phrases, with common aliases folded into
+# one spelling: k8s -> kubernetes, golang -> go) and stored per resume
+# content hash. screen_roles adds resumes as they finish.
+SKILL_INDEX_DB = os.getenv("SKILL_INDEX_DB", os.path.join(CACHE_DIR, "skills.sqlite3"))
+
+# Bump when the tokenizer, stopwords or aliases change; an index built by an
+# older version is cleared and refilled as resumes are screened or reused
+INDEX_VERSION = "1"
+
+# What each indexed text is: the extracted resume, the contact/profile
+# agent's output and the recruiter's evaluation. Evaluations also name the
+# skills a candidate lacks, so searches leave them out unless asked.
+SOURCES = ("resume", "profile", "evaluation")
+SEARCH_SOURCES = ("resume", "profile")
+SOURCE_LABELS = {"Resume_agent": "profile", "Recruiter_agent": "evaluation"}
+
+SKILL_ALIASES = {
+    "k8s": "kubernetes",
+    "k8": "kubernetes",
+    "golang": "go",
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "tf": "tensorflow",
+    "torch": "pytorch",
+    "sklearn": "scikit-learn",
+    "scikit learn": "scikit-learn",
+    "nodejs": "node.js",
+    "node js": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "angularjs": "angular",
+    "cpp": "c++",
+    "c sharp": "c#",
+    "dotnet": ".net",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "amazon web services": "aws",
+    "google cloud platform": "gcp",
+    "google cloud": "gcp",
+    "ms azure": "azure",
+    "microsoft azure": "azure",
+    "ci cd": "ci/cd",
+    "gitlab ci": "gitlab-ci",
+    "full stack": "full-stack",
+    "fullstack": "full-stack",
+    "rest api": "rest",
+    "restful": "rest",
+}
+
+# Words that carry no skill on their own, in resumes and job descriptions
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could did do does during each
+etc for from had has have having he her his i if in into is it its may me more most must my no not of on or our
+out over own per she should so some such than that the their them then there these they this those through to
+under up us very was we were what when where which while who will with within would you your
+ability able candidate candidates experience experienced familiarity good hands including knowledge plus
+preferred proficiency proficient required requirement requirements responsibilities role skill skills strong
+understanding using work working year years
+""".split())
+
+# Single letters that are skills
+SHORT_TERMS = frozenset(("c", "r"))
+
+# Word pairs don't span list separators or sentence ends ("Python, Kubernetes")
+_SEGMENT = re.compile(r"[,;:|•()\[\]\n\r\t]+|\.\s")
+_TOKEN = re.compile(r"\.?[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+_QUERY_TOKEN = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+_OPERATORS = ("and", "or", "not")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resumes (
+    doc_id      INTEGER PRIMARY KEY,
+    resume_hash TEXT NOT NULL UNIQUE,
+    resume_path TEXT NOT NULL,
+    indexed_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paths (
+    resume_path TEXT PRIMARY KEY,
+    doc_id      INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term   TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    count  INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id, source)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id, source);
+"""
+
+
+def _tokens(text: str):
+    return _TOKEN.findall(text.lower())
+
+
+def _alias(term: str) -> str:
+    return SKILL_ALIASES.get(term, term)
+
+
+def terms(text: str) -> dict:
+    # {normalised term: occurrences} for a text: words, two-word phrases and
+    # aliases of up to three words
+    counts = {}
+
+    def add(term):
+        counts[term] = counts.get(term, 0) + 1
+
+    for segment in _SEGMENT.split(text):
+        tokens = _tokens(segment)
+        for i, token in enumerate(tokens):
+            keep = token not in STOPWORDS and (len(token) > 1 or token in SHORT_TERMS)
+            if keep:
+                add(_alias(token))
+            if i + 1 < len(tokens):
+                pair = f"{token} {tokens[i + 1]}"
+                if pair in SKILL_ALIASES:
+                    add(SKILL_ALIASES[pair])
+                elif keep and tokens[i + 1] not in STOPWORDS:
+                    add(pair)
+            if i + 2 < len(tokens):
+                triple = f"{token} {tokens[i + 1]} {tokens[i + 2]}"
+                if triple in SKILL_ALIASES:
+                    add(SKILL_ALIASES[triple])
+    return counts
+
+
+def _phrase(text: str):
+    # Query node for one search word or quoted phrase; longer phrases
+    # match resumes that have each of their word pairs
+    phrase = " ".join(_tokens(text))
+    if not phrase:
+        raise ValueError(f"Nothing to search for in {text!r}")
+    words = phrase.split()
+    if phrase in SKILL_ALIASES or len(words) <= 2:
+        return ("term", _alias(phrase))
+    return ("and", [("term", _alias(f"{a} {b}")) for a, b in zip(words, words[1:])])
+
+
+def parse_query(expression: str):
+    # Boolean skill query -> tree of ("term", t), ("and"/"or", [nodes]) and
+    # ("not", node). AND, OR and NOT (any case) and parentheses are
+    # supported; words next to each other must all match, and quoted text
+    # is one phrase: pytorch AND (kubernetes OR "docker swarm") NOT php
+    tokens = _QUERY_TOKEN.findall(expression)
+    pos = 0
+
+    def peek():
+        return tokens[pos].lower() if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        pos += 1
+        return tokens[pos - 1]
+
+    def either():
+        nodes = [both()]
+        while peek() == "or":
+            take()
+            nodes.append(both())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def both():
+        nodes = [negated()]
+        while peek() not in (None, "or", ")"):
+            if peek() == "and":
+                take()
+            nodes.append(negated())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def negated():
+        if peek() == "not":
+            take()
+            return ("not", negated())
+        return atom()
+
+    def atom():
+        token = peek()
+        if token is None:
+            raise ValueError("Query ends too early")
+        if token == ")" or token in _OPERATORS:
+            raise ValueError(f"Unexpected {tokens[pos]!r} in query")
+        take()
+        if token == "(":
+            node = either()
+            if peek() != ")":
+                raise ValueError("Missing ')' in query")
+            take()
+            return node
+        return _phrase(token.strip('"'))
+
+    if not tokens:
+        raise ValueError("Empty query")
+    tree = either()
+    if pos < len(tokens):
+        raise ValueError(f"Unexpected {tokens[pos]!r} in query")
+    return tree
+
+
+def _query_terms(node):
+    if node[0] == "term":
+        return {node[1]}
+    if node[0] == "not":
+        return _query_terms(node[1])
+    return set().union(*(_query_terms(child) for child in node[1]))
+
+
+def _evaluate(node, postings: dict, universe: set) -> set:
+    kind = node[0]
+    if kind == "term":
+        return postings.get(node[1], set()) & universe
+    if kind == "not":
+        return universe - _evaluate(node[1], postings, universe)
+    sets = [_evaluate(child, postings, universe) for child in node[1]]
+    return set.intersection(*sets) if kind == "and" else set.union(*sets)
+
+
+def _chunks(items, size: int = 500):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class SkillIndex:
+    def __init__(self, path: str = SKILL_INDEX_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != INDEX_VERSION:
+                for table in ("resumes", "paths", "postings"):
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (INDEX_VERSION,))
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # Short-lived connections, as in ResultStore
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+
+    def has(self, resume_hash: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM resumes WHERE resume_hash = ?", (resume_hash,)).fetchone() is not None
+
+    def add(self, resume_hash: str, resume_path: str, resume_text: str = None, results=()) -> None:
+        # Indexes (or re-indexes) one resume from its extracted text and its
+        # screening results (one per role). Failed results are skipped; a
+        # source with nothing new keeps its earlier terms.
+        texts = {}
+        if resume_text:
+            texts["resume"] = [resume_text]
+        for result in results:
+            if result.get("errors"):
+                continue
+            for label, text in result.get("details", []):
+                source = SOURCE_LABELS.get(label)
+                if source is not None:
+                    texts.setdefault(source, []).append(text)
+        counts = {source: terms("\n".join(parts)) for source, parts in texts.items()}
+        with self._connect() as conn:
+            # Postings refer to resumes by a small integer id, which keeps
+            # them compact and quick to read back
+            conn.execute(
+                "INSERT INTO resumes (resume_hash, resume_path, indexed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(resume_hash) DO UPDATE SET resume_path = excluded.resume_path, "
+                "indexed_at = excluded.indexed_at",
+                (resume_hash, resume_path, time.time()),
+            )
+            doc_id = conn.execute("SELECT doc_id FROM resumes WHERE resume_hash = ?", (resume_hash,)).fetchone()[0]
+            conn.execute("INSERT OR REPLACE INTO paths (resume_path, doc_id) VALUES (?, ?)", (resume_path, doc_id))
+            for source in texts:
+                conn.execute("DELETE FROM postings WHERE doc_id = ? AND source = ?", (doc_id, source))
+            conn.executemany(
+                "INSERT INTO postings (term, doc_id, source, count) VALUES (?, ?, ?, ?)",
+                [(term, doc_id, source, n) for source, found in counts.items() for term, n in found.items()],
+            )
+
+    def _pool(self, conn, resume_paths=None) -> dict:
+        # {doc_id: resume_path} of the resumes to search: the given paths,
+        # or every indexed resume under its latest path
+        if resume_paths is None:
+            return dict(conn.execute("SELECT doc_id, resume_path FROM resumes"))
+        pool = {}
+        for chunk in _chunks(set(resume_paths)):
+            marks = ",".join("?" * len(chunk))
+            for resume_path, doc_id in conn.execute(
+                f"SELECT resume_path, doc_id FROM paths WHERE resume_path IN ({marks})", chunk
+            ):
+                pool.setdefault(doc_id, resume_path)
+        return pool
+
+    @staticmethod
+    def _postings(conn, wanted, sources) -> dict:
+        # {term: {doc_id, ...}} for the given terms; one row per term, as
+        # building a Python row per posting costs more than the lookup
+        postings = {}
+        source_marks = ",".join("?" * len(sources))
+        for chunk in _chunks(wanted):
+            marks = ",".join("?" * len(chunk))
+            for term, doc_ids in conn.execute(
+                f"SELECT term, group_concat(doc_id) FROM postings "
+                f"WHERE term IN ({marks}) AND source IN ({source_marks}) GROUP BY term",
+                chunk + list(sources),
+            ):
+                postings[term] = set(map(int, doc_ids.split(",")))
+        return postings
+
+    def query(self, expression: str, resume_paths=None, sources=SEARCH_SOURCES):
+        # Paths of the resumes matching a boolean skill query (see
+        # parse_query), limited to resume_paths when given. Raises
+        # ValueError for a malformed query.
+        tree = parse_query(expression)
+        with self._connect() as conn:
+            pool = self._pool(conn, resume_paths)
+            postings = self._postings(conn, _query_terms(tree), sources)
+        return sorted(pool[doc_id] for doc_id in _evaluate(tree, postings, set(pool)))
+
+    def rank(self, requirements: str, resume_paths=None, expression: str = None, sources=SEARCH_SOURCES):
+        # Ranks resumes by how many of the job requirements' terms they
+        # mention, rarer terms counting more (inverse document frequency
+        # over the searched resumes). Only requirement terms that some
+        # resume mentions count, so generic phrasing in the requirements
+        # doesn't drag every score down. An optional boolean query filters
+        # the resumes first. Returns [{"resume_path", "score" (0-100),
+        # "matched", "missing"}], best first.
+        tree = parse_query(expression) if expression and expression.strip() else None
+        wanted = set(terms(requirements))
+        with self._connect() as conn:
+            pool = self._pool(conn, resume_paths)
+            postings = self._postings(conn, wanted | (_query_terms(tree) if tree else set()), sources)
+        searched = set(pool)
+        candidates = _evaluate(tree, postings, searched) if tree else searched
+        known = {t: postings[t] & searched for t in wanted if postings.get(t, set()) & searched}
+        weights = {t: math.log(1 + len(pool) / len(docs)) for t, docs in known.items()}
+        total = sum(weights.values())
+        by_weight = sorted(known, key=lambda t: (-weights[t], t))
+        overlap = dict.fromkeys(candidates, 0.0)
+        for t, docs in known.items():
+            for doc_id in docs & candidates:
+                overlap[doc_id] += weights[t]
+        ranked = [
+            {
+                "resume_path": pool[doc_id],
+                "score": round(overlap[doc_id] / total * 100, 1) if total else 0.0,
+                "matched": [t for t in by_weight if doc_id in known[t]],
+                "missing": [t for t in by_weight if doc_id not in known[t]],
+            }
+            for doc_id in candidates
+        ]
+        ranked.sort(key=lambda item: (-item["score"], item["resume_path"]))
+        return ranked
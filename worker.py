@@ -0,0 +1,181 @@
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from batch import SCREENING_CONCURRENCY
+from jobs import LEASE_SECONDS, JobQueue, worker_name
+
+# Background screening worker: claims resumes of queued jobs (jobs.py), runs
+# them through the same pipeline as the app and the CLI, and writes each
+# resume's results back as it finishes. A worker screens a job in one batch,
+# so the JD is prepared once, but claims its resumes --concurrency at a time
+# as screening slots free up, so workers joining later get a part of it.
+# Several workers can share one queue, spread over one or more Ollama hosts:
+#   python worker.py --workers 4 --ollama-url http://gpu1:11434 --ollama-url http://gpu2:11434
+# Workers are assigned to the URLs round-robin. Each one is a separate
+# process, since the Ollama URL is fixed when the pipeline is imported.
+
+POLL_SECONDS = 2.0
+# Pause before retrying when the worker's Ollama host is unreachable
+UNAVAILABLE_PAUSE = 30.0
+
+
+def log(message: str) -> None:
+    print(f"[{worker_name()}] {message}", file=sys.stderr, flush=True)
+
+
+def run_worker(queue: JobQueue, concurrency: int, once: bool = False) -> int:
+    # Checks in before the slow imports below, so the app lists the worker
+    # right away
+    queue.heartbeat(worker_name(), os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"))
+    # Imported here so OLLAMA_BASE_URL is already set for this process
+    from metrics import MetricsRecorder
+    from multi_agents import OLLAMA_BASE_URL
+    from pipeline import SCORING_LABELS, screen_roles
+    from result_store import ResultStore
+    from skill_index import SkillIndex
+
+    worker_id = worker_name()
+    store = ResultStore()
+    index = SkillIndex()
+    log(f"Worker started with Ollama at {OLLAMA_BASE_URL}")
+    try:
+        while True:
+            queue.heartbeat(worker_id, OLLAMA_BASE_URL)
+            claimed = queue.claim(worker_id, concurrency)
+            if claimed is None:
+                if once:
+                    return 0
+                time.sleep(POLL_SECONDS)
+                continue
+            job, paths = claimed
+            job_id = job["job_id"]
+            log(f"Job {job_id}: screening")
+
+            # Keeps the lease (and the worker's heartbeat) alive while the batch runs
+            stop = threading.Event()
+
+            def keep_alive():
+                while not stop.wait(LEASE_SECONDS / 3):
+                    queue.renew(worker_id, job_id)
+                    queue.heartbeat(worker_id, OLLAMA_BASE_URL, job_id)
+
+            renewer = threading.Thread(target=keep_alive, daemon=True)
+            renewer.start()
+
+            # The scoring agent's answer so far, for the app's job view
+            def show_partial(path, label, text):
+                if label in SCORING_LABELS:
+                    queue.update_partial(job_id, path, label, text)
+
+            # Resumes handed to screen_roles and not reported yet
+            slots = threading.Condition()
+            in_flight = [0]
+
+            def source(paths):
+                # Feeds the job's resumes to screen_roles one at a time as
+                # slots free up, claiming more when the last claim runs out;
+                # stops when the job is cancelled or has nothing left
+                while paths:
+                    for path in paths:
+                        with slots:
+                            while in_flight[0] >= concurrency and not stop.is_set():
+                                slots.wait(POLL_SECONDS)
+                        if stop.is_set() or queue.cancelled(job_id):
+                            return
+                        if queue.start(worker_id, job_id, path):
+                            with slots:
+                                in_flight[0] += 1
+                            yield path
+                    claimed = queue.claim(worker_id, concurrency, job_id)
+                    paths = claimed[1] if claimed else []
+
+            def finished(done, total, path, results):
+                queue.complete(job_id, path, results)
+                with slots:
+                    in_flight[0] -= 1
+                    slots.notify()
+
+            metrics = MetricsRecorder()
+            started_at = time.time()
+            try:
+                screen_roles(
+                    source(paths),
+                    job["roles"],
+                    job["settings"],
+                    job["mode"],
+                    store=store,
+                    reuse_stored=job["reuse_stored"],
+                    dedupe_text=False,
+                    max_workers=concurrency,
+                    timeout=job["timeout"],
+                    on_progress=finished,
+                    metrics=metrics,
+                    index=index,
+                    on_partial=show_partial,
+                )
+            except RuntimeError as ex:
+                # Ollama unreachable: hand the resumes back for another worker
+                log(str(ex))
+                queue.release(worker_id, refund=True)
+                if once:
+                    return 1
+                time.sleep(UNAVAILABLE_PAUSE)
+            finally:
+                stop.set()
+                renewer.join()
+                metrics.finish()
+                metrics.export()
+                if metrics.records:
+                    queue.record_metrics(job_id, worker_id, started_at, list(metrics.records), metrics.resumes)
+            log(f"Job {job_id}: screened {metrics.resumes} resume(s)")
+            # Anything screen_roles didn't report goes back to the queue
+            queue.release(worker_id)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        # Resumes claimed but not finished are picked up by another worker
+        # right away instead of after their lease expires
+        queue.release(worker_id)
+        queue.remove_worker(worker_id)
+
+
+def supervise(args) -> int:
+    # Starts one worker process per --workers, spread over the Ollama URLs
+    urls = args.ollama_url or [os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")]
+    processes = []
+    for index in range(args.workers):
+        env = dict(os.environ, OLLAMA_BASE_URL=urls[index % len(urls)])
+        command = [sys.executable, os.path.abspath(__file__), "--workers", "1", "--concurrency", str(args.concurrency)]
+        if args.once:
+            command.append("--once")
+        processes.append(subprocess.Popen(command, env=env))
+    try:
+        return max(process.wait() for process in processes)
+    except KeyboardInterrupt:
+        # The workers got the interrupt too; wait for them to hand back their work
+        return max(process.wait() for process in processes)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Screen resumes from the background job queue.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes to run (default: 1)")
+    parser.add_argument("--ollama-url", action="append",
+                        help="Ollama base URL; repeat to spread workers over several hosts (default: OLLAMA_BASE_URL)")
+    parser.add_argument("--concurrency", type=int, default=SCREENING_CONCURRENCY,
+                        help=f"Resumes each worker screens in parallel (default: {SCREENING_CONCURRENCY})")
+    parser.add_argument("--once", action="store_true", help="Exit when the queue is empty instead of waiting")
+    args = parser.parse_args(argv)
+
+    if args.workers > 1 or (args.ollama_url and len(args.ollama_url) > 1):
+        return supervise(args)
+    if args.ollama_url:
+        os.environ["OLLAMA_BASE_URL"] = args.ollama_url[0]
+    return run_worker(JobQueue(), args.concurrency, once=args.once)
+
+
+if __name__ == "__main__":
+    sys.exit(main())